@@ -0,0 +1,65 @@
+from micropython import const
+
+# Buffer circular de payloads recibidos por el nRF24L01 (nrf24l01_slave.py).
+# Copiar a la Pico del slave junto con nrf24l01.py.
+#
+# El FIFO de recepción del nRF24L01 tiene solo 3 payloads: se vacía al
+# anillo apenas hay algo y los paquetes se decodifican después, entre
+# vaciado y vaciado.
+R_RX_PAYLOAD = const(0x61)
+STATUS = const(0x07)
+RX_DR = const(0x40)
+
+
+def recibir_en(nrf, destino):
+    """Como nrf.recv() pero leyendo sobre destino, sin crear un bytes por paquete"""
+    nrf.cs(0)
+    nrf.spi.readinto(nrf.buf, R_RX_PAYLOAD)
+    nrf.spi.readinto(destino)
+    nrf.cs(1)
+    nrf.reg_write(STATUS, RX_DR)
+
+
+class Anillo:
+    """
+    paquetes lugares de tam bytes reservados al inicio. vaciar_fifo() copia
+    lo que haya en el FIFO del radio; sacar() devuelve el próximo payload
+    (una vista del anillo, válida hasta el próximo vaciar_fifo()) o None.
+    Con el anillo lleno los paquetes se leen igual y se cuentan en desbordes
+    """
+
+    def __init__(self, paquetes=64, tam=32):
+        self.buf = bytearray(paquetes * tam)
+        mv = memoryview(self.buf)
+        self._lugares = [mv[i * tam:(i + 1) * tam] for i in range(paquetes)]
+        self._descarte = bytearray(tam)
+        self.capacidad = paquetes
+        self._cabeza = 0  # próximo lugar a escribir
+        self._cola = 0  # próximo lugar a leer
+        self.n = 0
+        self.maximo = 0  # mayor ocupación vista
+        self.desbordes = 0
+
+    def vaciar_fifo(self, nrf):
+        """Pasa el FIFO del radio al anillo; devuelve cuántos paquetes leyó"""
+        leidos = 0
+        while nrf.any():
+            if self.n == self.capacidad:
+                recibir_en(nrf, self._descarte)
+                self.desbordes += 1
+            else:
+                recibir_en(nrf, self._lugares[self._cabeza])
+                self._cabeza = (self._cabeza + 1) % self.capacidad
+                self.n += 1
+            leidos += 1
+        if self.n > self.maximo:
+            self.maximo = self.n
+        return leidos
+
+    def sacar(self):
+        if self.n == 0:
+            return None
+        p = self._lugares[self._cola]
+        self._cola = (self._cola + 1) % self.capacidad
+        self.n -= 1
+        return p
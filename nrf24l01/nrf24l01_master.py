@@ -2,16 +2,30 @@ import usys
 import ustruct as struct
 import network
 import time
-import math
 from machine import Pin, I2C, SPI
 from ssd1306 import SSD1306_I2C
+from pantalla import Pantalla
+from estadistica import Welford
+from telemetria import Telemetria
 from nrf24l01 import NRF24L01
 from micropython import const
 
 WIDTH = 128
 HEIGHT = 32
 i2c = I2C(1, scl=Pin(15), sda=Pin(14), freq=200000)
-oled = SSD1306_I2C(WIDTH, HEIGHT, i2c)
+# Solo se transfiere lo que cambió, a lo sumo cada PERIODO_PANTALLA_MS
+# salvo show(True) (ver pantalla.py)
+PERIODO_PANTALLA_MS = 40
+oled = Pantalla(SSD1306_I2C(WIDTH, HEIGHT, i2c), periodo_ms=PERIODO_PANTALLA_MS)
+SAMPLE_MS = 100
+FRAME_MS = 20  # cuadros de las animaciones
+# Telemetría en ráfagas (ver telemetria.py): las muestras se encolan y se
+# mandan juntas cuando se llenan TELEMETRY_PACKETS payloads, pasan
+# TELEMETRY_WINDOW_MS o termina la medición. En False se manda un float
+# suelto cada dos muestras, como antes.
+TELEMETRY = True
+TELEMETRY_PACKETS = 2
+TELEMETRY_WINDOW_MS = 2000
 
 POWER = {"0 dBm": const(0x06), "-6 dBm": const(0x04), "-12 dBm": const(0x02), "-18 dBm": const(0x00)}
 DATA_RATE = {"250 kbps": const(0x20), "1 Mbps": const(0x00), "2 Mbps": const(0x08),}
@@ -38,6 +52,7 @@ pipes = (b"\xe1\xf0\xf0\xf0\xf0", b"\xd2\xf0\xf0\xf0\xf0")
 nrf.open_tx_pipe(pipes[0])
 nrf.open_rx_pipe(1, pipes[1])
 nrf.start_listening()
+telemetry = Telemetria(nrf, SAMPLE_MS, TELEMETRY_PACKETS)
 
 linkStatus = True
 j = 0
@@ -57,7 +72,7 @@ def buttonAnimation():
         oled.invert(True)
         oled.fill(0)
         oled.text("PRESS BUTTON", 18, 8)
-        oled.show()
+        oled.show(True)
     for x in range(6):
         oled.fill_rect(37, 19, 51, 12, 0)
         for i in range(3):
@@ -70,14 +85,17 @@ def buttonAnimation():
             oled.text(".", 70, 23 - i)
         for i in range(3):
             oled.text("-", 73 + i, 26)
-        oled.show()
+        # Antes el ritmo lo marcaba la transferencia completa por I2C
+        oled.show(True)
+        time.sleep_ms(FRAME_MS)
     
     for i in range(3):
         oled.text(".", 35 + 3 * i, 17 + i)
         oled.text(".", 68 - 2 * i, 14 + i)
         oled.text(".", 49 + 2 * i, 14 + i)
         oled.text(".", 81 - 3 * i, 17 + i)
-        oled.show()
+        oled.show(True)
+        time.sleep_ms(FRAME_MS)
     time.sleep(0.1)
     ledAdvance.value(0)
     time.sleep(0.2)
@@ -92,12 +110,22 @@ def buttonAnimation():
         oled.text(".", 70, 23 - i)
     for i in range(3):
             oled.text("-", 73 + i, 26)
-    oled.show()
-def standardDeviation(data):
-    n = len(data)
-    median = sum(data) / n
-    variance = sum((x - median) ** 2 for x in data) / (n - 1)
-    return math.sqrt(variance)
+    oled.show(True)
+
+def drawMeasureFrame():
+    """
+    Capa estática de la medición (y el progreso ya hecho): se dibuja al
+    empezar y otra vez si algo borró el framebuffer en medio de la medición
+    """
+    oled.invert(True)
+    oled.fill(0)
+    oled.text("ON", 5, 2)
+    oled.text("MEASURING", 28, 11)
+    for x in range(99):
+        oled.text("-", 10 + x, 17)
+        oled.text("-", 10 + x, 19)
+    for k in range(1, j + 1):
+        oled.text(".", 8 + k, 16)
 
 def wifiStatus():
     counter = 0
@@ -126,7 +154,7 @@ def wifiStatus():
     oled.invert(True)
     oled.fill(0)
     oled.text("Connection Up", 12, 10)
-    oled.show()
+    oled.show(True)
     time.sleep(2)
     oled.fill(0)
     
@@ -139,7 +167,7 @@ while True:
     if counter == -1:
         oled.fill(0)
         oled.text("Connection Up", 12, 10)
-        oled.show()
+        oled.show(True)
     buttonAnimation()
     if wifi.isconnected() == False:
         print("Conexión perdida!")
@@ -150,22 +178,34 @@ while True:
         oled.fill(0)
         oled.text("MEASURE", 36, 11)
         oled.text("#" + str(counter + 1), 58, 20)
-        oled.show()
+        oled.show(True)
         while button.value() == 1:
             time.sleep(0.1)
         time.sleep(0.1)
         print(counter)
         if counter >= 0:
             ledMeasure.value(1)
-            oled.invert(True)
-            oled.fill(0)
-            rssiMeasureArray = []
+            # Capa estática: se dibuja una sola vez por medición
+            drawMeasureFrame()
+            # Media y desviación en línea (ver estadistica.py, en poyecto comdig/codigos)
+            stats = Welford()
+            # Muestras cada SAMPLE_MS contadas desde el inicio: lo que tarda
+            # la pantalla no corre el instante de la próxima muestra
+            nextSample = time.ticks_ms()
+            lastBurst = nextSample
             for i in range(200):
+                time.sleep_ms(max(time.ticks_diff(nextSample, time.ticks_ms()), 0))
+                sampleTime = nextSample
+                nextSample = time.ticks_add(nextSample, SAMPLE_MS)
                 rssiMeasure = wifi.status('rssi')
-                rssiMeasureArray.append(rssiMeasure)
-                oled.text("ON", 5, 2)
-                time.sleep(0.1)
-                oled.text("MEASURING", 28, 11)
+                stats.agregar(rssiMeasure)
+                if TELEMETRY:
+                    telemetry.agregar(rssiMeasure, sampleTime, counter, i)
+                    # Un solo cambio TX/RX por ráfaga, fuera del resto de la muestra
+                    if (telemetry.llena() or i == 199 or rssiMeasure == 0.0
+                            or time.ticks_diff(sampleTime, lastBurst) >= TELEMETRY_WINDOW_MS):
+                        telemetry.enviar(i == 199)
+                        lastBurst = sampleTime
                 oled.fill_rect(100, -5, 20, 15, 0)
                 if rssiMeasure >= -60:
                     for b in range(7):
@@ -185,38 +225,34 @@ while True:
                         oled.text(".", 110 + 2 * b, -3 + b)
                     for b in range(5):
                         oled.text(".", 118 - 2 * b, -3 + b)
-                for x in range(99):
-                    oled.text("-", 10 + x, 17)
-                    oled.text("-", 10 + x, 19)
                 if i % 2 == 0:
-                    nrf.stop_listening()
-                    print("sending:", rssiMeasure)
-                    try:
-                        nrf.send(struct.pack("f", rssiMeasure))
-                    except OSError:
-                        pass
-                    nrf.start_listening()
+                    if not TELEMETRY:
+                        nrf.stop_listening()
+                        print("sending:", rssiMeasure)
+                        try:
+                            nrf.send(struct.pack("f", rssiMeasure))
+                        except OSError:
+                            pass
+                        nrf.start_listening()
                     j += 1
                     oled.text(".", 8 + j, 16)
                     oled.fill_rect(36, 2, 55, 7, 0)
                     oled.text(str(rssiMeasure) + " dBm", 35, 2)
-                    oled.show()
-                for x in range(j):
-                    oled.text(".", 8 + x, 16)
                 if i % 5 == 0:
                     oled.fill_rect(50, 25, 80, 7, 0)
                     oled.text(str(i) + "/200", 60, 25)
                 if i % 10 == 0:
                     oled.fill_rect(5, 25, 40, 7, 0)
                     oled.text(str(i / 10) + "s", 5, 25)
-                    oled.show()
+                # Un solo show() por muestra, limitado a PERIODO_PANTALLA_MS
+                oled.show()
                 if i == 199:
                     oled.fill_rect(5, 25, 40, 7, 0)
                     oled.fill_rect(50, 25, 80, 7, 0)
                     oled.text(".", 109, 16)
                     oled.text("200/200", 60, 25)
                     oled.text("20.0s", 5, 25)
-                    oled.show()
+                    oled.show(True)
                     j = 0
                     time.sleep(2)
                     ledMeasure(0)
@@ -227,13 +263,18 @@ while True:
                     oled.fill_rect(36, 2, 55, 7, 0)
                     oled.text(str(rssiMeasure) + " dBm", 45, 2)
                     oled.text("OFF", 5, 2)
-                    oled.show()
+                    oled.show(True)
                     time.sleep(2)
                     oled.fill(0)
                     wifi.connect(ssid, password)
                     wifiStatus()
-            rssiAverage = sum(rssiMeasureArray) / len(rssiMeasureArray)
-            deviation = standardDeviation(rssiMeasureArray)
+                    # wifiStatus() borró la pantalla y la medición sigue
+                    drawMeasureFrame()
+            if TELEMETRY:
+                print("Telemetría:", telemetry.enviados, "paquetes,", telemetry.fallidos, "sin ACK,",
+                      telemetry.rafagas, "ráfagas")
+            rssiAverage = stats.media
+            deviation = stats.desviacion
             if linkStatus == True:
                 oled.invert(True)
                 oled.fill(0)
@@ -241,7 +282,7 @@ while True:
                 oled.text("Dev: " + str(round(deviation, 3)), 4, 11)
                 oled.text("Avg: " + str(round(rssiAverage,2)) + " dBm", 4, 2)
                 oled.text("#" + str(counter + 1), 105, 25)
-                oled.show()
+                oled.show(True)
                 time.sleep(4)
                 oled.fill(0)
                 oled.text("SAVING DATA", 20, 11)
@@ -266,7 +307,7 @@ while True:
                 time.sleep(0.2)
                 oled.fill(0)
                 oled.text("PRESS BUTTON", 18, 8)
-                oled.show()
+                oled.show(True)
             else:
                 oled.invert(True)
                 oled.fill(0)
@@ -293,4 +334,4 @@ while True:
                 oled.invert(True)
                 oled.fill(0)
                 oled.text("PRESS BUTTON", 18, 8)
-                oled.show()
+                oled.show(True)
@@ -5,6 +5,10 @@ import time
 import math
 import utime
 from sh1106 import SH1106_I2C  
+from pantalla import Pantalla, SH1106
+from telemetria import es_telemetria, cabecera, Reensamblador, LARGO_CABECERA, MAX_MUESTRAS
+from anillo import Anillo
+from registro import RegistroCrudo
 from machine import Pin, I2C, SPI
 from nrf24l01 import NRF24L01
 from micropython import const
@@ -13,7 +17,22 @@ i2c = I2C(1, scl=Pin(15), sda=Pin(14), freq=400000)
 ANCHO = 128
 ALTO = 64
 
-oled = SH1106_I2C(ANCHO, ALTO, i2c, addr=0x3C, rotate=180)
+# Solo se transfiere lo que cambió, a lo sumo cada PERIODO_PANTALLA_MS
+# (ver pantalla.py)
+PERIODO_PANTALLA_MS = 200
+RATE_MS = 1000  # ventana de paquetes/s, bytes/s y pérdida
+# bytes/s: bytes útiles de cada payload (cabecera + muestras de la
+# telemetría, 4 del float viejo); en el aire siempre van los 32
+RING_PACKETS = 64  # payloads que entran en el anillo de recepción (ver anillo.py)
+# Muestras recibidas en el formato binario de rssi.py, escritas en bloques
+# de 4 KB (ver registro.py, en la carpeta rssi; en la PC se leen con
+# poyecto comdig/codigos/registro_crudo.py)
+LOG = True
+logFilename = "nrf_rssi.bin"
+# Sin paquetes durante LOG_FLUSH_MS se escribe el bloque a medias: si se
+# pierde la última ráfaga o el master se reinicia no queda nada en RAM
+LOG_FLUSH_MS = 2000
+oled = Pantalla(SH1106_I2C(ANCHO, ALTO, i2c, addr=0x3C, rotate=180), SH1106, PERIODO_PANTALLA_MS)
 oled.contrast(255)
 oled.fill(1)
 POWER = {"0 dBm": const(0x06), "-6 dBm": const(0x04), "-12 dBm": const(0x02), "-18 dBm": const(0x00)}
@@ -31,7 +50,7 @@ nrf = NRF24L01(SPI(cfg["spi"]), csn, ce, channel = CH_FREQ, payload_size=32)
 ############################################
 
 potencia = POWER["0 dBm"] # 0 dBm, -6 dBm, -12 dBm, -18 dBm
-tasaDeBits = DATA_RATE["2 Mbps"] # 250 kbps, 1 Mbps, 2 Mbps
+tasaDeBits = DATA_RATE["1 Mbps"] # 250 kbps, 1 Mbps, 2 Mbps
 
 nrf.set_power_speed(potencia, tasaDeBits)
 
@@ -40,4 +59,80 @@ nrf.open_tx_pipe(pipes[1])
 nrf.open_rx_pipe(1, pipes[0])
 nrf.start_listening()
 
+# Capa estática
+oled.fill(0)
+oled.text("RSSI", 0, 0)
+oled.text("Paso", 0, 11)
+oled.text("Paq/s", 0, 22)
+oled.text("B/s", 0, 33)
+oled.text("Perd", 0, 44)
+oled.text("Desb", 0, 55)
+oled.guardar_fondo()
+oled.show(True)
 
+def guardar(paso, indice, t, rssi):
+    registro.agregar(t, paso, rssi, rx.mediciones)
+
+anillo = Anillo(RING_PACKETS, 32)
+rx = Reensamblador(guardar if LOG else None)
+registro = None
+legacy = 0
+payloadBytes = 0
+lastBytes = 0
+lastRate = utime.ticks_ms()
+lastPacket = lastRate
+lastPackets = 0
+lastLost = 0
+redraw = True
+while True:
+    anillo.vaciar_fifo(nrf)
+    # Decodificar de a un paquete y volver a vaciar el FIFO entre paquetes
+    p = anillo.sacar()
+    while p is not None:
+        if es_telemetria(p):
+            if LOG and registro is None:
+                # El período del registro es el SAMPLE_MS del master
+                registro = RegistroCrudo(logFilename, cabecera(p)[6])
+            payloadBytes += LARGO_CABECERA + min(p[1], MAX_MUESTRAS)
+            rx.agregar(p)
+            if rx.terminada and LOG:
+                registro.vaciar()
+        else:
+            # Master con TELEMETRY = False: un float por paquete
+            rx.ultimo = int(struct.unpack_from("<f", p, 0)[0])
+            payloadBytes += 4
+            legacy += 1
+        lastPacket = utime.ticks_ms()
+        redraw = True
+        anillo.vaciar_fifo(nrf)
+        p = anillo.sacar()
+    if nrf.any():
+        continue
+    # Tasas cada RATE_MS; la pantalla solo con el FIFO vacío
+    now = utime.ticks_ms()
+    if registro is not None and registro.n and utime.ticks_diff(now, lastPacket) >= LOG_FLUSH_MS:
+        registro.vaciar()
+    dt = utime.ticks_diff(now, lastRate)
+    if dt >= RATE_MS:
+        packets = rx.paquetes + legacy
+        lost = rx.paquetes_perdidos - lastLost
+        received = packets - lastPackets
+        packetsPerSecond = received * 1000 / dt
+        oled.restaurar_fondo()
+        oled.text("{:.1f}".format(packetsPerSecond), 48, 22)
+        oled.text("{:.0f}".format((payloadBytes - lastBytes) * 1000 / dt), 48, 33)
+        oled.text("{:.1f}%".format(100 * lost / (received + lost) if received + lost else 0), 48, 44)
+        oled.text(str(anillo.desbordes), 48, 55)
+        lastRate = now
+        lastPackets = packets
+        lastBytes = payloadBytes
+        lastLost = rx.paquetes_perdidos
+        redraw = True
+    if redraw:
+        oled.fill_rect(48, 0, ANCHO - 48, 19, 0)
+        oled.text(str(rx.ultimo) + " dBm", 48, 0)
+        if rx.paso >= 0:
+            oled.text(str(rx.paso) + " m" + (" fin" if rx.terminada else ""), 48, 11)
+        redraw = False
+    # A lo sumo cada PERIODO_PANTALLA_MS; lo pendiente sale en otra vuelta
+    oled.show()
@@ -0,0 +1,170 @@
+import utime
+
+# Pantalla OLED que transfiere por I2C solo lo que cambió.
+# Copiar a la Pico junto con ssd1306.py o sh1106.py (nrf24l01_master.py,
+# nrf24l01_slave.py y ../rssi/rssi.py).
+#
+# El framebuffer de los dos controladores es MONO_VLSB: cada byte es una
+# columna de 8 píxeles de una página, byte = página * ancho + x.
+SSD1306 = 0
+SH1106 = 1
+COLUMNA_SH1106 = 2  # el SH1106 tiene 132 columnas y la pantalla usa 2..129
+
+
+class Pantalla:
+    """
+    Envoltura de SSD1306_I2C / SH1106_I2C con la misma interfaz de dibujo.
+    Cada dibujo marca las páginas y columnas que toca; show() compara esa
+    zona con lo último transferido y envía, por página, solo el rango de
+    columnas que cambió. Redibujar lo mismo no transfiere nada.
+    periodo_ms: presupuesto de cuadros; un show() antes de periodo_ms desde
+    la última transferencia no envía y lo pendiente sale en el próximo
+    show(). show(True) transfiere siempre.
+    guardar_fondo() / restaurar_fondo(): capa estática que se dibuja una sola
+    vez y se copia al framebuffer en lugar de volver a dibujarla.
+    """
+
+    def __init__(self, oled, controlador=SSD1306, periodo_ms=0):
+        self.oled = oled
+        self.controlador = controlador
+        self.periodo_ms = periodo_ms
+        self.ancho = oled.width
+        self.paginas = oled.height // 8
+        if controlador == SH1106:
+            self.buf = oled.displaybuf
+            self._columna = COLUMNA_SH1106
+        else:
+            self.buf = oled.buffer
+            # Las pantallas de 64 columnas del SSD1306 empiezan en la columna 32
+            self._columna = 32 if self.ancho == 64 else 0
+        self._mv = memoryview(self.buf)
+        self._enviado = bytearray(len(self.buf))
+        self._desde = bytearray([self.ancho] * self.paginas)  # primera columna sucia
+        self._hasta = bytearray(self.paginas)  # última columna sucia + 1
+        self._ultimo = utime.ticks_ms()
+        self._invertido = None
+        self._fondo = None
+        self.transferidos = 0  # bytes de datos enviados por I2C
+        self._completo = True  # no se sabe qué muestra la pantalla: el primer show() envía todo
+        self.marcar(0, 0, self.ancho, self.paginas * 8)
+
+    def marcar(self, x, y, w, h):
+        """Marca como sucio el rectángulo (recortado a la pantalla)"""
+        x0 = max(x, 0)
+        x1 = min(x + w, self.ancho)
+        p0 = max(y, 0) >> 3
+        p1 = min((y + h - 1) >> 3, self.paginas - 1)
+        if x0 >= x1 or h <= 0:
+            return
+        for p in range(p0, p1 + 1):
+            if x0 < self._desde[p]:
+                self._desde[p] = x0
+            if x1 > self._hasta[p]:
+                self._hasta[p] = x1
+
+    # Dibujo: igual que framebuf, marcando la zona tocada
+    def fill(self, c):
+        self.oled.fill(c)
+        self.marcar(0, 0, self.ancho, self.paginas * 8)
+
+    def fill_rect(self, x, y, w, h, c):
+        self.oled.fill_rect(x, y, w, h, c)
+        self.marcar(x, y, w, h)
+
+    def rect(self, x, y, w, h, c):
+        self.oled.rect(x, y, w, h, c)
+        self.marcar(x, y, w, h)
+
+    def hline(self, x, y, w, c):
+        self.oled.hline(x, y, w, c)
+        self.marcar(x, y, w, 1)
+
+    def vline(self, x, y, h, c):
+        self.oled.vline(x, y, h, c)
+        self.marcar(x, y, 1, h)
+
+    def line(self, x1, y1, x2, y2, c):
+        self.oled.line(x1, y1, x2, y2, c)
+        self.marcar(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return self.oled.pixel(x, y)
+        self.oled.pixel(x, y, c)
+        self.marcar(x, y, 1, 1)
+
+    def text(self, s, x, y, c=1):
+        self.oled.text(s, x, y, c)
+        self.marcar(x, y, 8 * len(s), 8)
+
+    def invert(self, v):
+        # Es un comando del controlador: enviarlo solo si cambia
+        if v != self._invertido:
+            self.oled.invert(v)
+            self._invertido = v
+
+    def contrast(self, v):
+        self.oled.contrast(v)
+
+    def guardar_fondo(self):
+        """Guarda el framebuffer actual como capa estática"""
+        if self._fondo is None:
+            self._fondo = bytearray(self.buf)
+        else:
+            self._fondo[:] = self.buf
+
+    def restaurar_fondo(self):
+        """Vuelve el framebuffer a la capa estática guardada"""
+        self.buf[:] = self._fondo
+        self.marcar(0, 0, self.ancho, self.paginas * 8)
+
+    def _enviar(self, pagina, x0, x1):
+        oled = self.oled
+        c = self._columna + x0
+        if self.controlador == SH1106:
+            oled.write_cmd(0xB0 | pagina)
+            oled.write_cmd(c & 0x0F)
+            oled.write_cmd(0x10 | (c >> 4))
+        else:
+            oled.write_cmd(0x21)  # rango de columnas
+            oled.write_cmd(c)
+            oled.write_cmd(self._columna + x1 - 1)
+            oled.write_cmd(0x22)  # rango de páginas
+            oled.write_cmd(pagina)
+            oled.write_cmd(pagina)
+        i = pagina * self.ancho
+        oled.write_data(self._mv[i + x0:i + x1])
+        self._enviado[i + x0:i + x1] = self._mv[i + x0:i + x1]
+        self.transferidos += x1 - x0
+
+    def show(self, forzar=False):
+        """Transfiere las columnas que cambiaron; devuelve False si se postergó"""
+        ahora = utime.ticks_ms()
+        if not forzar and utime.ticks_diff(ahora, self._ultimo) < self.periodo_ms:
+            return False
+        self._ultimo = ahora
+        buf = self.buf
+        enviado = self._enviado
+        ancho = self.ancho
+        for p in range(self.paginas):
+            x0 = self._desde[p]
+            x1 = self._hasta[p]
+            if x0 >= x1:
+                continue
+            self._desde[p] = ancho
+            self._hasta[p] = 0
+            i = p * ancho
+            if self._completo:
+                self._enviar(p, 0, ancho)
+                continue
+            # Recortar a las columnas distintas comparando en el lugar
+            # (comparar rebanadas crearía dos copias por página y cuadro)
+            while x0 < x1 and buf[i + x0] == enviado[i + x0]:
+                x0 += 1
+            if x0 == x1:
+                continue
+            while buf[i + x1 - 1] == enviado[i + x1 - 1]:
+                x1 -= 1
+            self._enviar(p, x0, x1)
+        self._completo = False
+        return True
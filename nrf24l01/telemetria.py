@@ -0,0 +1,157 @@
+import struct
+
+# Telemetría de RSSI por nRF24L01 en lotes de varias muestras.
+# Copiar a la Pico del master (nrf24l01_master.py) y del slave (nrf24l01_slave.py).
+#
+#   0: tipo (TIPO_RSSI, | FIN en el último paquete de la medición) | 1: cantidad
+#   2-3: seq | 4-5: paso (m) | 6-7: índice de la primera muestra en la medición
+#   8-11: ticks_ms de la primera muestra | 12-13: SAMPLE_MS
+#   14..31: RSSI (dBm, i8), una muestra cada SAMPLE_MS desde la primera
+#
+# El master muestrea contra un horario fijo (inicio + i * SAMPLE_MS), así que
+# la hora de cada muestra sale del índice y no hace falta mandarla.
+# Los paquetes viejos del master (struct.pack("f", rssi)) empiezan con 0:
+# el RSSI es entero y los bytes bajos del float quedan en cero.
+TIPO_RSSI = 1
+FIN = 0x80
+CABECERA = "<BBHHHIH"
+LARGO_CABECERA = 14
+TAM_PAYLOAD = 32
+MAX_MUESTRAS = TAM_PAYLOAD - LARGO_CABECERA  # 18
+TICKS_MAX = (1 << 30) - 1  # ticks_ms vuelve a 0 en 2**30
+
+
+class Telemetria:
+    """
+    Encola muestras en payloads de MAX_MUESTRAS y los manda en ráfaga con
+    enviar(): un solo stop_listening() / start_listening() por ráfaga en
+    lugar de uno por muestra. max_paquetes: paquetes que entran en la cola;
+    si se llena, agregar() manda la ráfaga antes de seguir
+    """
+
+    def __init__(self, nrf, periodo_ms, max_paquetes=4):
+        self.nrf = nrf
+        self.periodo_ms = periodo_ms
+        self._cola = [bytearray(TAM_PAYLOAD) for _ in range(max_paquetes)]
+        self._llenos = 0  # paquetes completos en la cola
+        self._n = 0  # muestras en el paquete que se está armando
+        self.seq = 0
+        self.enviados = 0
+        self.fallidos = 0  # sin ACK después de los reintentos automáticos
+        self.rafagas = 0
+
+    def pendientes(self):
+        return self._llenos + (1 if self._n else 0)
+
+    def llena(self):
+        return self._llenos == len(self._cola)
+
+    def agregar(self, rssi, t_ms, paso, indice):
+        if self.llena():
+            self.enviar()
+        buf = self._cola[self._llenos]
+        if self._n == 0:
+            struct.pack_into(CABECERA, buf, 0, TIPO_RSSI, 0, self.seq & 0xFFFF,
+                             paso & 0xFFFF, indice & 0xFFFF, t_ms, self.periodo_ms)
+            self.seq += 1
+        struct.pack_into("b", buf, LARGO_CABECERA + self._n, max(-128, min(127, int(rssi))))
+        self._n += 1
+        buf[1] = self._n
+        if self._n == MAX_MUESTRAS:
+            self._llenos += 1
+            self._n = 0
+
+    def enviar(self, fin=False):
+        """Manda la cola completa; fin marca el último paquete de la medición"""
+        n = self.pendientes()
+        if n == 0:
+            return 0
+        if fin:
+            self._cola[n - 1][0] |= FIN
+        self.nrf.stop_listening()
+        for i in range(n):
+            try:
+                self.nrf.send(self._cola[i])
+                self.enviados += 1
+            except OSError:
+                self.fallidos += 1
+        self.nrf.start_listening()
+        self._llenos = 0
+        self._n = 0
+        self.rafagas += 1
+        return n
+
+
+def es_telemetria(buf):
+    return buf[0] & ~FIN == TIPO_RSSI
+
+
+def cabecera(buf):
+    """(fin, cantidad, seq, paso, indice, t_ms, periodo_ms)"""
+    tipo, n, seq, paso, indice, t_ms, periodo = struct.unpack_from(CABECERA, buf, 0)
+    return bool(tipo & FIN), min(n, MAX_MUESTRAS), seq, paso, indice, t_ms, periodo
+
+
+def muestra(buf, k):
+    """RSSI de la muestra k del paquete"""
+    return struct.unpack_from("b", buf, LARGO_CABECERA + k)[0]
+
+
+class Reensamblador:
+    """
+    Rearma las mediciones a partir de los paquetes: ordena por índice,
+    descarta duplicados (reenvíos cuyo ACK se perdió) y cuenta las muestras
+    que faltan. Los paquetes perdidos salen de los saltos de seq.
+    Por cada muestra nueva llama a al_recibir(paso, indice, t_ms, rssi)
+    """
+
+    def __init__(self, al_recibir=None):
+        self.al_recibir = al_recibir
+        self.paso = -1
+        self.esperado = 0  # próximo índice de la medición actual
+        self.muestras = 0  # de la medición actual
+        self.perdidas = 0  # muestras que faltan en la medición actual
+        self.duplicados = 0
+        self.paquetes = 0
+        self.paquetes_perdidos = 0
+        self.mediciones = 0
+        self.terminada = False
+        self.ultimo = 0  # último RSSI recibido
+        self._seq = -1
+
+    def agregar(self, buf):
+        """Procesa un payload de telemetría; devuelve las muestras nuevas"""
+        fin, n, seq, paso, indice, t_ms, periodo = cabecera(buf)
+        if seq == self._seq:
+            self.duplicados += 1
+            return 0
+        if self._seq >= 0:
+            salto = (seq - self._seq - 1) & 0xFFFF
+            # Un salto hacia atrás es un master reiniciado, no una pérdida
+            if salto < 0x8000:
+                self.paquetes_perdidos += salto
+        self._seq = seq
+        self.paquetes += 1
+        if paso != self.paso or (indice == 0 and self.esperado > 0):
+            # Medición nueva (o la misma distancia medida otra vez)
+            self.paso = paso
+            self.mediciones += 1
+            self.esperado = 0
+            self.muestras = 0
+            self.perdidas = 0
+            self.terminada = False
+        if indice + n <= self.esperado:
+            self.duplicados += 1
+            return 0
+        if indice > self.esperado:
+            self.perdidas += indice - self.esperado
+        k0 = max(self.esperado - indice, 0)
+        for k in range(k0, n):
+            rssi = muestra(buf, k)
+            if self.al_recibir:
+                self.al_recibir(paso, indice + k, (t_ms + k * periodo) & TICKS_MAX, rssi)
+            self.ultimo = rssi
+        self.muestras += n - k0
+        self.esperado = indice + n
+        self.terminada = fin
+        return n - k0
@@ -0,0 +1,161 @@
+import struct
+
+import pytest
+
+from telemetria import (Reensamblador, Telemetria, cabecera, es_telemetria, muestra, FIN, LARGO_CABECERA,
+                        MAX_MUESTRAS, TAM_PAYLOAD, TICKS_MAX, TIPO_RSSI)
+
+
+class NrfFalso:
+    """Guarda una copia de cada payload enviado; falla en los envíos indicados"""
+
+    def __init__(self, fallar=()):
+        self.enviados = []
+        self.fallar = set(fallar)
+        self.escuchando = True
+        self.cambios = 0
+
+    def stop_listening(self):
+        self.escuchando = False
+        self.cambios += 1
+
+    def start_listening(self):
+        self.escuchando = True
+
+    def send(self, buf):
+        assert not self.escuchando
+        k = len(self.enviados)
+        self.enviados.append(bytes(buf))
+        if k in self.fallar:
+            raise OSError("send failed")
+
+
+def medir(tx, cantidad, t0=1000, paso=2, rssi=lambda i: -40 - i % 50):
+    for i in range(cantidad):
+        tx.agregar(rssi(i), t0 + i * tx.periodo_ms, paso, i)
+    tx.enviar(fin=True)
+
+
+def recibir(paquetes):
+    recibidas = []
+    rx = Reensamblador(lambda *m: recibidas.append(m))
+    for p in paquetes:
+        rx.agregar(p)
+    return rx, recibidas
+
+
+def test_cabecera_byte_a_byte():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 50)
+    tx.agregar(-61, 0x01020304, 0x0A0B, 0x0C0D)
+    tx.agregar(300, 0, 0, 0)  # fuera de rango: se recorta a i8
+    tx.enviar(fin=True)
+    (p,) = nrf.enviados
+    assert len(p) == TAM_PAYLOAD
+    assert p[:LARGO_CABECERA] == bytes([TIPO_RSSI | FIN, 2, 0, 0, 0x0B, 0x0A, 0x0D, 0x0C,
+                                        4, 3, 2, 1, 50, 0])
+    assert struct.unpack_from("bb", p, LARGO_CABECERA) == (-61, 127)
+    assert cabecera(p) == (True, 2, 0, 0x0A0B, 0x0C0D, 0x01020304, 50)
+    assert muestra(p, 0) == -61
+
+
+def test_es_telemetria():
+    assert es_telemetria(bytes([TIPO_RSSI]) + bytes(31))
+    assert es_telemetria(bytes([TIPO_RSSI | FIN]) + bytes(31))
+    # Master viejo: un float con el RSSI entero, el primer byte es 0
+    for rssi in (-30.0, -57.0, -100.0):
+        assert not es_telemetria(struct.pack("<f", rssi) + bytes(28))
+
+
+def test_ida_y_vuelta_en_una_rafaga():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 20)
+    medir(tx, 40)
+    assert [cabecera(p)[:3] for p in nrf.enviados] == [(False, 18, 0), (False, 18, 1), (True, 4, 2)]
+    assert nrf.cambios == 1 and tx.rafagas == 1 and tx.enviados == 3
+    rx, recibidas = recibir(nrf.enviados)
+    assert recibidas == [(2, i, 1000 + 20 * i, -40 - i) for i in range(40)]
+    assert (rx.muestras, rx.perdidas, rx.paquetes_perdidos, rx.duplicados) == (40, 0, 0, 0)
+    assert rx.terminada and rx.mediciones == 1 and rx.ultimo == -79
+
+
+def test_cola_llena_manda_sola():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 10, max_paquetes=2)
+    medir(tx, 2 * MAX_MUESTRAS + 1)
+    assert nrf.cambios == 2  # una ráfaga al llenarse y otra al final
+    assert [cabecera(p)[1] for p in nrf.enviados] == [18, 18, 1]
+    assert tx.pendientes() == 0 and tx.enviar() == 0
+
+
+def test_envio_fallido():
+    nrf = NrfFalso(fallar={1})
+    tx = Telemetria(nrf, 10)
+    medir(tx, 40)
+    assert (tx.enviados, tx.fallidos) == (2, 1)
+    assert nrf.escuchando
+
+
+def test_paquete_perdido():
+    nrf = NrfFalso()
+    medir(Telemetria(nrf, 10), 50)
+    rx, recibidas = recibir([nrf.enviados[0], nrf.enviados[2]])
+    assert rx.paquetes_perdidos == 1
+    assert rx.perdidas == 18
+    assert rx.muestras == 32
+    assert [m[1] for m in recibidas] == list(range(18)) + list(range(36, 50))
+
+
+def test_reenvios_duplicados():
+    nrf = NrfFalso()
+    medir(Telemetria(nrf, 10), 40)
+    a, b, c = nrf.enviados
+    rx, recibidas = recibir([a, a, b, c, b])
+    assert rx.duplicados == 2
+    assert rx.muestras == 40 and len(recibidas) == 40
+    assert rx.paquetes_perdidos == 0
+
+
+def test_vuelta_de_seq():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 10)
+    tx.seq = 0xFFFE
+    medir(tx, 5 * MAX_MUESTRAS)
+    assert [cabecera(p)[2] for p in nrf.enviados] == [0xFFFE, 0xFFFF, 0, 1, 2]
+    rx, _ = recibir(nrf.enviados[:2] + nrf.enviados[3:])
+    assert rx.paquetes_perdidos == 1
+    assert rx.perdidas == MAX_MUESTRAS
+
+
+def test_master_reiniciado_no_es_perdida():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 10)
+    tx.seq = 500
+    medir(tx, 10, paso=1)
+    medir(Telemetria(nrf, 10), 10, paso=1)  # seq vuelve a 0, misma distancia
+    rx, recibidas = recibir(nrf.enviados)
+    assert rx.paquetes_perdidos == 0
+    assert rx.mediciones == 2 and rx.muestras == 10
+    assert len(recibidas) == 20
+
+
+def test_mediciones_por_paso():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 10)
+    medir(tx, 5, paso=1)
+    medir(tx, 7, paso=2)
+    rx, recibidas = recibir(nrf.enviados)
+    assert rx.mediciones == 2
+    assert (rx.paso, rx.muestras, rx.terminada) == (2, 7, True)
+    assert [m[0] for m in recibidas] == [1] * 5 + [2] * 7
+
+
+def test_hora_de_las_muestras_con_vuelta_de_ticks():
+    nrf = NrfFalso()
+    tx = Telemetria(nrf, 100)
+    medir(tx, 20, t0=TICKS_MAX - 250)
+    _, recibidas = recibir(nrf.enviados)
+    t = [m[2] for m in recibidas]
+    assert t[:3] == [TICKS_MAX - 250, TICKS_MAX - 150, TICKS_MAX - 50]
+    assert t[3] == 49  # sigue a ticks_ms, que vuelve a 0 en 2**30
+    assert all((b - a) & TICKS_MAX == 100 for a, b in zip(t, t[1:]))
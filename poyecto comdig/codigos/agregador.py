@@ -0,0 +1,114 @@
+from array import array
+
+# Agregación de muestras enteras (RSSI en dBm) para nodoConcentrador.py.
+# Copiar este archivo a la Pico junto con trama.py.
+#
+# agregar() no crea objetos: la ventana y su copia ordenada son arrays
+# preasignados y las sumas son enteros. Solo resultado() devuelve un float,
+# y se llama únicamente cuando hay un valor para enviar.
+
+# Modos de ventana
+DESLIZANTE = 0  # un resultado por muestra con las últimas `ventana` muestras
+BLOQUES = 1     # un resultado cada `ventana` muestras, bloques sin solape
+
+# Reductores
+MEDIA = 0
+MEDIANA = 1
+EMA = 2
+
+ESCALA_EMA = 256  # la EMA se guarda en 1/256 dB para operar con enteros
+
+
+def int32_en(buf, i):
+    """Lee un int32 little-endian de buf[i:i+4] sin crear una tupla como struct"""
+    return (buf[i] | (buf[i + 1] << 8) | (buf[i + 2] << 16)
+            | (((buf[i + 3] ^ 0x80) - 0x80) << 24))
+
+
+class Agregador:
+    """
+    Ventana circular de enteros con suma acumulada.
+    ventana: cantidad de muestras que se combinan
+    modo: DESLIZANTE o BLOQUES
+    reductor: MEDIA, MEDIANA o EMA (alfa = peso de la muestra nueva)
+    """
+
+    def __init__(self, ventana=5, modo=BLOQUES, reductor=MEDIA, alfa=0.25):
+        self.ventana = ventana
+        self.modo = modo
+        self.reductor = reductor
+        self._datos = array('i', bytes(4 * ventana))
+        self._orden = array('i', bytes(4 * ventana))  # solo para MEDIANA
+        self._alfa = int(alfa * ESCALA_EMA)
+        self.reiniciar()
+
+    def reiniciar(self):
+        self._i = 0       # próxima posición a escribir
+        self._n = 0       # muestras en la ventana
+        self._suma = 0
+        self._ema = None
+        self._cuenta = 0  # muestras desde el último resultado (BLOQUES)
+
+    def agregar(self, valor):
+        """Agrega una muestra; devuelve True si hay un resultado nuevo"""
+        i = self._i
+        if self._n == self.ventana:
+            viejo = self._datos[i]
+            self._suma -= viejo
+            if self.reductor == MEDIANA:
+                self._quitar_orden(viejo)
+        else:
+            self._n += 1
+        self._datos[i] = valor
+        self._suma += valor
+        if self.reductor == MEDIANA:
+            self._insertar_orden(valor)
+        elif self.reductor == EMA:
+            if self._ema is None:
+                self._ema = valor * ESCALA_EMA
+            else:
+                # Redondeado: // solo truncaría hacia -inf y con dBm negativos
+                # la EMA quedaría corrida hacia abajo
+                self._ema += (self._alfa * (valor * ESCALA_EMA - self._ema) + ESCALA_EMA // 2) // ESCALA_EMA
+        i += 1
+        self._i = 0 if i == self.ventana else i
+
+        if self.modo == BLOQUES:
+            # Con la ventana llena, cada `ventana` muestras el buffer
+            # contiene exactamente el bloque nuevo
+            self._cuenta += 1
+            if self._cuenta < self.ventana:
+                return False
+            self._cuenta = 0
+            return True
+        return self.reductor == EMA or self._n == self.ventana
+
+    def resultado(self):
+        n = self._n
+        if self.reductor == MEDIA:
+            return self._suma / n
+        if self.reductor == MEDIANA:
+            m = n // 2
+            if n & 1:
+                return float(self._orden[m])
+            return (self._orden[m - 1] + self._orden[m]) / 2
+        return self._ema / ESCALA_EMA
+
+    def _insertar_orden(self, valor):
+        o = self._orden
+        j = self._n - 1
+        while j > 0 and o[j - 1] > valor:
+            o[j] = o[j - 1]
+            j -= 1
+        o[j] = valor
+
+    def _quitar_orden(self, valor):
+        # Se llama antes de _insertar_orden con la ventana llena
+        o = self._orden
+        n = self._n
+        j = 0
+        while o[j] != valor:
+            j += 1
+        while j < n - 1:
+            o[j] = o[j + 1]
+            j += 1
@@ -0,0 +1,211 @@
+"""
+Benchmark del procesamiento en la PC con tráfico sintético (sintetico.py).
+
+Mide muestras por segundo y latencia p50/p99 de cada etapa:
+parser de tramas, fspl_to_distance, trilaterate (por muestra y en lote),
+procesar_muestra completo, filtro de partículas y actualización de la
+gráfica (backend Agg).
+El resultado es JSON para poder compararlo entre versiones.
+
+Uso:
+    python benchmark_host.py --muestras 20000 --salida base.json
+    python benchmark_host.py --beacons 12 --comparar base.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+import sintetico
+import trilateracion
+from filtro_particulas import FiltroParticulas
+from trama import ParserTramas, TIPO_GYRO, TIPO_RSSI
+from trilaterador import Multilaterator
+
+# Caída de muestras/s (fracción) a partir de la cual --comparar falla
+TOLERANCIA = 0.25
+
+
+def resumen(latencias_ns, muestras, total_s):
+    lat = np.asarray(latencias_ns, dtype=float) / 1000
+    return {
+        "muestras": int(muestras),
+        "muestras_s": muestras / total_s if total_s > 0 else float("inf"),
+        "p50_us": float(np.percentile(lat, 50)),
+        "p99_us": float(np.percentile(lat, 99)),
+    }
+
+
+def medir(funcion, entradas, muestras_por_llamada=1):
+    """Llama funcion(e) para cada entrada y devuelve el resumen de la etapa"""
+    latencias = []
+    reloj = time.perf_counter_ns
+    inicio = reloj()
+    for e in entradas:
+        t = reloj()
+        funcion(e)
+        latencias.append(reloj() - t)
+    total = (reloj() - inicio) / 1e9
+    return resumen(latencias, len(entradas) * muestras_por_llamada, total)
+
+
+def beacons_perimetro(n, ancho=50.0, alto=20.0):
+    """n beacons repartidos sobre el perímetro de un rectángulo"""
+    s = np.linspace(0, 2 * (ancho + alto), n, endpoint=False)
+    beacons = []
+    for i, d in enumerate(s):
+        if d < ancho:
+            x, y = d, 0.0
+        elif d < ancho + alto:
+            x, y = ancho, d - ancho
+        elif d < 2 * ancho + alto:
+            x, y = ancho - (d - ancho - alto), alto
+        else:
+            x, y = 0.0, alto - (d - 2 * ancho - alto)
+        beacons.append({"x": x, "y": y, "name": f"Nodo {i + 1}", "pipe": i + 1})
+    return beacons
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del procesamiento en la PC")
+    parser.add_argument("--muestras", type=int, default=20000, help="muestras RSSI a generar")
+    parser.add_argument("--beacons", type=int, default=len(trilateracion.beacons),
+                        help="beacons para la etapa de multilateración")
+    parser.add_argument("--ruido", type=float, default=2.0)
+    parser.add_argument("--perdida", type=float, default=0.05)
+    parser.add_argument("--particulas", type=int, default=trilateracion.N_PARTICULAS)
+    parser.add_argument("--cuadros", type=int, default=200, help="cuadros de la etapa de gráfica")
+    parser.add_argument("--sin-grafica", action="store_true")
+    parser.add_argument("--salida", default="-", help="archivo JSON ('-' = stdout)")
+    parser.add_argument("--comparar", metavar="BASE", help="JSON previo; falla si alguna etapa empeora")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="caída máxima de muestras/s aceptada por --comparar (fracción)")
+    args = parser.parse_args()
+
+    beacons = trilateracion.beacons
+    nb = len(beacons)
+    tasa = 50.0
+    duracion = args.muestras / (tasa * nb)
+    tramas, tiempos, verdad = sintetico.generar(beacons, duracion, tasa, ruido_db=args.ruido,
+                                                perdida=args.perdida)
+    flujo = b"".join(tramas)
+    etapas = {}
+
+    # Parser: bloques de 4 KB como los entrega el puerto
+    bloques = [flujo[i:i + 4096] for i in range(0, len(flujo), 4096)]
+    p = ParserTramas()
+    etapas["parser"] = medir(p.feed, bloques, len(tramas) / len(bloques))
+    muestras = ParserTramas().feed(flujo)
+    rssi = np.array([m[4][0] for m in muestras if m[1] == TIPO_RSSI])
+
+    # Conversión RSSI -> distancia
+    etapas["fspl_to_distance"] = medir(trilateracion.fspl_to_distance, rssi.tolist())
+    lotes = np.array_split(rssi, max(len(rssi) // 1000, 1))
+    etapas["distancias_lote"] = medir(trilateracion.localizador.distancias, lotes, len(rssi) / len(lotes))
+
+    # Trilateración por muestra y en lote
+    tripletes = rssi[:len(rssi) // 3 * 3].reshape(-1, 3)
+    etapas["trilaterate"] = medir(lambda r: trilateracion.trilaterate(r, beacons), list(tripletes))
+    lotes = np.array_split(tripletes, max(len(tripletes) // 1000, 1))
+    etapas["trilaterate_lote"] = medir(trilateracion.trilaterador.resolver, lotes,
+                                       len(tripletes) / len(lotes))
+
+    # Multilateración con N beacons (lotes de 1000 muestras)
+    anclas = beacons_perimetro(args.beacons)
+    multi = Multilaterator(anclas)
+    rssi_n = np.random.default_rng(0).uniform(-80, -40, (len(tripletes), args.beacons))
+    lotes = np.array_split(rssi_n, max(len(rssi_n) // 1000, 1))
+    etapas["multilateracion_lote"] = medir(multi.resolver, lotes, len(rssi_n) / len(lotes))
+
+    # Camino completo por muestra ya decodificada y error contra la trayectoria real
+    posiciones = []
+    def procesar(m):
+        pipe, tipo, seq, t_ms, valores = m
+        pos = trilateracion.procesar_muestra(pipe, tipo, valores, t_ms / 1000)
+        if pos is not None:
+            posiciones.append((t_ms / 1000, pos[0], pos[1]))
+    etapas["procesar_muestra"] = medir(procesar, muestras)
+    pos = np.array(posiciones)
+    real = sintetico.trayectoria(beacons, pos[:, 0])
+    error = np.linalg.norm(pos[:, 1:] - real, axis=1)
+
+    # Filtro de partículas: una predicción y una actualización por muestra
+    filtro = FiltroParticulas(beacons, args.particulas, semilla=0)
+    pipe_a_beacon = {b["pipe"]: i for i, b in enumerate(beacons)}
+    estimaciones = []
+    def filtrar(m):
+        pipe, tipo, seq, t_ms, valores = m
+        filtro.predecir(t_ms / 1000)
+        if tipo == TIPO_GYRO:
+            filtro.actualizar_giro(valores[2])
+        elif pipe in pipe_a_beacon:
+            filtro.actualizar_rssi(pipe_a_beacon[pipe], valores[0])
+            x, y, _ = filtro.estimacion()
+            estimaciones.append((t_ms / 1000, x, y))
+    etapas["filtro_particulas"] = medir(filtrar, muestras)
+    est = np.array(estimaciones)
+    # Se descartan los primeros 2 s mientras el filtro converge
+    est = est[est[:, 0] >= 2]
+    error_filtro = np.linalg.norm(est[:, 1:] - sintetico.trayectoria(beacons, est[:, 0]), axis=1)
+
+    # Actualización de la gráfica con blitting
+    if not args.sin_grafica:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            from dashboard import Dashboard
+        except ImportError:
+            print("matplotlib no disponible, se omite la gráfica", file=sys.stderr)
+        else:
+            dashboard = Dashboard(beacons)
+            dashboard.canvas.draw()
+            reciente = trilateracion.historial.ultimos(trilateracion.WINDOW_SIZE)
+            def cuadro(i):
+                x, y = pos[i % len(pos), 1:]
+                dashboard.actualizar(x, y, reciente['t'], reciente['rssi'], reciente['dist'],
+                                     reciente['gyro'])
+                dashboard.refrescar()
+                if dashboard._redibujar:
+                    dashboard.canvas.draw()
+            etapas["grafica"] = medir(cuadro, range(args.cuadros))
+
+    resultado = {
+        "config": {
+            "muestras": len(tramas),
+            "beacons": nb,
+            "beacons_multilateracion": args.beacons,
+            "particulas": args.particulas,
+            "ruido_db": args.ruido,
+            "perdida": args.perdida,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "maquina": platform.machine(),
+        },
+        "etapas": etapas,
+        "error_m": {"p50": float(np.median(error)), "p90": float(np.percentile(error, 90))},
+        "error_filtro_m": {"p50": float(np.median(error_filtro)),
+                           "p90": float(np.percentile(error_filtro, 90))},
+    }
+    texto = json.dumps(resultado, indent=2)
+    if args.salida == "-":
+        print(texto)
+    else:
+        with open(args.salida, "w") as f:
+            f.write(texto)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)["etapas"]
+        regresiones = []
+        for nombre, etapa in etapas.items():
+            if nombre in base and etapa["muestras_s"] < base[nombre]["muestras_s"] * (1 - args.tolerancia):
+                regresiones.append(f"{nombre}: {base[nombre]['muestras_s']:.0f} -> {etapa['muestras_s']:.0f} muestras/s")
+        for r in regresiones:
+            print("Regresión " + r, file=sys.stderr)
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
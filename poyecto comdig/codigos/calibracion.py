@@ -0,0 +1,73 @@
+"""
+Calibración del modelo de propagación log-distancia por beacon
+
+    RSSI(d) = p0 - 10 n log10(d)
+
+a partir de los archivos rssi_measurements.txt que genera rssi/rssi.py
+(distancia, RSSI promedio y desviación estándar por paso).
+
+Uso:
+    python calibracion.py 1:medidas_nodo1.txt 2:medidas_nodo2.txt 3:medidas_nodo3.txt
+    python calibracion.py 1:medidas_nodo1.txt -o calibracion.json
+
+Cada argumento es pipe:archivo. El resultado se guarda en JSON y
+trilateracion.py lo carga como tabla RSSI -> distancia (TablaDistancias).
+"""
+import argparse
+import json
+import numpy as np
+
+
+def leer_mediciones(ruta):
+    """
+    Devuelve distancia, RSSI promedio y desviación estándar de un archivo
+    de rssi.py. Se ignoran las cabeceras repetidas y la distancia 0.
+    """
+    datos = np.genfromtxt(ruta, delimiter='\t', invalid_raise=False)
+    datos = np.atleast_2d(datos)[:, :3]
+    datos = datos[~np.isnan(datos).any(axis=1)]
+    datos = datos[datos[:, 0] > 0]
+    return datos[:, 0], datos[:, 1], datos[:, 2]
+
+
+def ajustar(distancia, rssi, desviacion):
+    """
+    Mínimos cuadrados ponderados (peso 1/desviación) de p0 y n.
+    var es la varianza promedio del RSSI, usada como peso en multilateración.
+    """
+    if len(distancia) < 2:
+        raise ValueError("Se necesitan al menos 2 distancias distintas de 0")
+    w = 1 / np.maximum(desviacion, 0.5)
+    X = np.column_stack([np.ones_like(distancia), -10 * np.log10(distancia)])
+    (p0, n), *_ = np.linalg.lstsq(X * w[:, None], rssi * w, rcond=None)
+    residuo = rssi - X @ [p0, n]
+    return {
+        "p0": float(p0),
+        "n": float(n),
+        "var": float(np.mean(desviacion ** 2)),
+        "rmse": float(np.sqrt(np.mean(residuo ** 2))),
+        "muestras": int(len(distancia)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ajusta el modelo log-distancia por beacon")
+    parser.add_argument("archivos", nargs="+", help="pipe:archivo de mediciones de rssi.py")
+    parser.add_argument("-o", "--salida", default="calibracion.json")
+    args = parser.parse_args()
+
+    calibracion = {}
+    for arg in args.archivos:
+        pipe, ruta = arg.split(":", 1)
+        calibracion[pipe] = ajustar(*leer_mediciones(ruta))
+        c = calibracion[pipe]
+        print(f"Pipe {pipe}: p0 = {c['p0']:.2f} dBm, n = {c['n']:.2f}, "
+              f"RMSE = {c['rmse']:.2f} dB ({c['muestras']} distancias)")
+
+    with open(args.salida, "w") as f:
+        json.dump(calibracion, f, indent=2)
+    print(f"Calibración guardada en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
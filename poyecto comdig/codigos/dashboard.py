@@ -0,0 +1,184 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+class Dashboard:
+    """
+    Figura de trilateracion.py dibujada con blitting.
+
+    El fondo (ejes, rejilla, etiquetas, beacons) se dibuja completo solo al
+    inicio y cuando algún eje cambia de límites; en cada cuadro se restaura
+    el fondo guardado y se dibujan únicamente las líneas y el nodo móvil.
+    Los límites solo cambian cuando los datos salen de ellos: el eje de
+    tiempo avanza a saltos de una ventana y el eje Y se amplía con margen.
+    """
+
+    def __init__(self, beacons, blit=True):
+        self.beacons = beacons
+
+        # Configuración de la gráfica principal
+        plt.style.use('default')
+        fig = plt.figure(figsize=(15, 14))
+        gs = fig.add_gridspec(4, 2)
+        ax_main = fig.add_subplot(gs[0:2, 0:2])  # Gráfica principal
+        ax_rssi = fig.add_subplot(gs[2, 0])     # Subgráfica RSSI
+        ax_dist = fig.add_subplot(gs[2, 1])     # Subgráfica distancias
+        ax_gyro = fig.add_subplot(gs[3, 0])
+        ax_rssi_node1 = fig.add_subplot(gs[3, 1])
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.blit = blit and self.canvas.supports_blit
+        animado = self.blit
+
+        ax_main.set_xlim(-2, 52)
+        ax_main.set_ylim(-2, 6)
+        ax_main.set_xlabel('Coordenada X (metros)')
+        ax_main.set_ylabel('Coordenada Y (metros)')
+        ax_main.set_title(f'Sistema de Localización con {len(beacons)} Nodos (Espacio Libre)')
+        ax_main.grid(True)
+
+        # Elementos gráficos
+        self._pos = np.zeros((1, 2))
+        self.scatter = ax_main.scatter([], [], color='blue', s=100, label='Nodo Móvil', animated=animado)
+        self._rayos = [np.array([[b["x"], 0.0], [b["y"], 0.0]]) for b in beacons]
+        self.lines = [ax_main.plot([], [], 'k--', alpha=0.5, animated=animado)[0] for _ in beacons]
+
+        # Dibujar nodos fijos (solo una etiqueta en la leyenda)
+        for i, beacon in enumerate(beacons):
+            if i == 0:
+                ax_main.scatter(beacon["x"], beacon["y"], color='red', s=100, label='Nodos Fijos')
+            else:
+                ax_main.scatter(beacon["x"], beacon["y"], color='red', s=100)
+            ax_main.text(beacon["x"] + 0.3, beacon["y"] + 0.3, beacon["name"], fontsize=10)
+
+        # Configurar leyenda principal
+        ax_main.legend(loc='upper left', bbox_to_anchor=(0, 1), frameon=True, fancybox=True)
+        self.texto_metricas = ax_main.text(0.99, 0.02, '', transform=ax_main.transAxes,
+                                           ha='right', fontsize=8, animated=animado)
+
+        # Configuración de subgráficas
+        ax_rssi.set_title('Valores RSSI en Tiempo Real')
+        ax_rssi.set_ylabel('RSSI (dBm)')
+        ax_rssi.grid(True)
+        self.rssi_lines = [ax_rssi.plot([], [], label=f'Nodo {i+1}', animated=animado)[0] for i in range(3)]
+        ax_rssi.legend(loc='upper right', bbox_to_anchor=(1, 1), ncol=1, frameon=True)
+
+        ax_gyro.set_title('Datos del Giroscopio (X, Y, Z)')
+        ax_gyro.set_xlabel('Tiempo')
+        ax_gyro.set_ylabel('Velocidad angular (°/s)')
+        ax_gyro.grid(True)
+        self.gyro_lines = [
+            ax_gyro.plot([], [], label='Eje X', animated=animado)[0],
+            ax_gyro.plot([], [], label='Eje Y', animated=animado)[0],
+            ax_gyro.plot([], [], label='Eje Z', animated=animado)[0]
+        ]
+        ax_gyro.legend(loc='upper right')
+
+        ax_rssi_node1.set_title('RSSI Nodo 1')
+        ax_rssi_node1.set_xlabel('Tiempo')
+        ax_rssi_node1.set_ylabel('RSSI (dBm)')
+        ax_rssi_node1.grid(True)
+        self.rssi_node1_line = ax_rssi_node1.plot([], [], 'r-', label='RSSI Nodo 1', animated=animado)[0]
+        ax_rssi_node1.legend(loc='upper right')
+
+        ax_dist.set_title('Distancias Estimadas')
+        ax_dist.set_ylabel('Distancia')
+        ax_dist.grid(True)
+        self.dist_lines = [ax_dist.plot([], [], label=f'Dist a Nodo {i+1}', animated=animado)[0] for i in range(3)]
+        ax_dist.legend(loc='upper right', bbox_to_anchor=(1, 1), ncol=1, frameon=True)
+
+        self.ax_main = ax_main
+        self.ax_rssi = ax_rssi
+        self.ax_dist = ax_dist
+        self.ax_gyro = ax_gyro
+        self.ax_rssi_node1 = ax_rssi_node1
+        self.ejes_tiempo = [ax_rssi, ax_dist, ax_gyro, ax_rssi_node1]
+
+        self.artistas = ([self.scatter] + self.lines + self.rssi_lines + self.dist_lines
+                         + self.gyro_lines + [self.rssi_node1_line, self.texto_metricas])
+        self._fondo = None
+        self._redibujar = True
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+        fig.tight_layout()
+
+    def _al_dibujar(self, event):
+        # Después de cada dibujo completo se guarda el fondo sin los artistas animados
+        if self.blit:
+            self._fondo = self.canvas.copy_from_bbox(self.fig.bbox)
+            for a in self.artistas:
+                self.fig.draw_artist(a)
+
+    def _ajustar_x(self, ax, t0, t1):
+        lo, hi = ax.get_xlim()
+        if t0 < lo or t1 > hi:
+            # Dejar espacio libre de una ventana a la derecha
+            span = max(t1 - t0, 1e-3)
+            ax.set_xlim(t0, t1 + span)
+            self._redibujar = True
+
+    def _ajustar_y(self, ax, datos):
+        vmin = np.nanmin(datos)
+        vmax = np.nanmax(datos)
+        lo, hi = ax.get_ylim()
+        if vmin < lo or vmax > hi:
+            margen = max((vmax - vmin) * 0.1, 1.0)
+            ax.set_ylim(min(vmin, lo) - margen, max(vmax, hi) + margen)
+            self._redibujar = True
+
+    def actualizar(self, x, y, t, rssi, dist, gyro, texto=''):
+        """
+        x, y: posición actual del nodo móvil
+        t: arreglo (W,) con el tiempo de cada fila
+        rssi, dist, gyro: arreglos (W, 3) alineados con t
+        """
+        self._pos[0, 0] = x
+        self._pos[0, 1] = y
+        self.scatter.set_offsets(self._pos)
+        for rayo, line in zip(self._rayos, self.lines):
+            rayo[0, 1] = x
+            rayo[1, 1] = y
+            line.set_data(rayo[0], rayo[1])
+        self.texto_metricas.set_text(texto)
+
+        if len(t) == 0:
+            return
+        for i, line in enumerate(self.rssi_lines):
+            line.set_data(t, rssi[:, i])
+        for i, line in enumerate(self.dist_lines):
+            line.set_data(t, dist[:, i])
+        for i, line in enumerate(self.gyro_lines):
+            line.set_data(t, gyro[:, i])
+        self.rssi_node1_line.set_data(t, rssi[:, 0])
+
+        for ax in self.ejes_tiempo:
+            self._ajustar_x(ax, t[0], t[-1])
+        self._ajustar_y(self.ax_rssi, rssi)
+        self._ajustar_y(self.ax_dist, dist)
+        self._ajustar_y(self.ax_gyro, gyro)
+        self._ajustar_y(self.ax_rssi_node1, rssi[:, 0])
+
+    def refrescar(self):
+        """Dibuja el cuadro actual: blit si el fondo sigue siendo válido"""
+        if not self.blit or self._redibujar or self._fondo is None:
+            self._redibujar = False
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._fondo)
+        for a in self.artistas:
+            self.fig.draw_artist(a)
+        self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+
+    def animar(self, actualizar, intervalo_ms):
+        """Llama actualizar() y refresca la figura cada intervalo_ms (bloquea hasta cerrar)"""
+        def cuadro():
+            actualizar()
+            self.refrescar()
+
+        self._timer = self.canvas.new_timer(interval=intervalo_ms)
+        self._timer.add_callback(cuadro)
+        self._timer.start()
+        plt.show()
+
+    def cerrar(self):
+        plt.close(self.fig)
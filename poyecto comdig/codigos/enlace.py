@@ -0,0 +1,79 @@
+from array import array
+
+# Estadísticas del enlace de radio por pipe para nodoConcentrador.py.
+# Copiar este archivo a la Pico junto con trama.py y agregador.py, y a la
+# de cada beacon (nodo1.py..nodo3.py toman de aquí los formatos del payload).
+#
+# Cada beacon envía struct.pack(FORMATO_BEACON, rssi, seq, tick_ms) con seq
+# incrementado en cada intento de envío y tick_ms = utime.ticks_ms() del nodo.
+FORMATO_BEACON = "<iHI"
+OFFSET_SEQ = 4
+OFFSET_TICK = 6
+
+# Con pre-agregación en el nodo se envía un resumen de K lecturas con el
+# mismo seq/tick y un byte de tipo que en FORMATO_BEACON es relleno (0):
+#   media (1/100 dBm), seq, tick, tipo, n, mínimo, máximo, varianza (1/100 dBm²)
+FORMATO_RESUMEN = "<iHIBBbbH"
+OFFSET_TIPO = 10
+PAYLOAD_CRUDO = 0
+PAYLOAD_RESUMEN = 1
+# PAYLOAD_LOTE = 2 está en lotes.py
+
+# Mientras el beacon no tiene WiFi (no hay RSSI) envía avisos periódicos:
+#   ms sin conexión, seq, tick, tipo, intentos de reconexión
+FORMATO_SIN_WIFI = "<IHIBB"
+PAYLOAD_SIN_WIFI = 3
+
+PERIODO_TICKS = 1 << 30  # utime.ticks_ms() da la vuelta en 2**30
+
+
+def dif_ticks(a, b):
+    """a - b con vuelta de ticks_ms (como utime.ticks_diff, también en la PC)"""
+    return ((a - b + PERIODO_TICKS // 2) & (PERIODO_TICKS - 1)) - PERIODO_TICKS // 2
+
+
+class EstadisticasEnlace:
+    """
+    Contadores por pipe: recibidos, perdidos, duplicados y jitter entre
+    llegadas (estimador de RFC 3550 con la diferencia entre el intervalo de
+    llegada al concentrador y el intervalo según el reloj del nodo).
+    Los contadores son arrays preasignados, registrar() no crea objetos.
+    """
+
+    def __init__(self, pipes=6):
+        self.recibidos = array('i', bytes(4 * pipes))
+        self.perdidos = array('i', bytes(4 * pipes))
+        self.duplicados = array('i', bytes(4 * pipes))
+        self._jitter16 = array('i', bytes(4 * pipes))  # en 1/16 ms
+        self._seq = array('i', bytes(4 * pipes))
+        self._tick = array('i', bytes(4 * pipes))
+        self.llegada = array('i', bytes(4 * pipes))  # ticks_ms del último paquete
+
+    def registrar(self, pipe, seq, tick, llegada):
+        if self.recibidos[pipe]:
+            avance = (seq - self._seq[pipe]) & 0xFFFF
+            if avance == 0:
+                self.duplicados[pipe] += 1
+                return
+            if avance >= 0x8000:
+                # Llegó tarde: ya se había contado como perdido
+                if self.perdidos[pipe] > 0:
+                    self.perdidos[pipe] -= 1
+                self.recibidos[pipe] += 1
+                return
+            self.perdidos[pipe] += avance - 1
+            d = dif_ticks(llegada, self.llegada[pipe]) - dif_ticks(tick, self._tick[pipe])
+            if d < 0:
+                d = -d
+            self._jitter16[pipe] += d - ((self._jitter16[pipe] + 8) >> 4)
+        self.recibidos[pipe] += 1
+        self._seq[pipe] = seq
+        self._tick[pipe] = tick
+        self.llegada[pipe] = llegada
+
+    def jitter_ms(self, pipe):
+        return self._jitter16[pipe] / 16
+
+    def edad_ms(self, pipe, ahora):
+        """Tiempo desde el último paquete del pipe"""
+        return dif_ticks(ahora, self.llegada[pipe])
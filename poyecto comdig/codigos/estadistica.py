@@ -0,0 +1,191 @@
+from array import array
+
+# Estadísticas en línea, sin guardar las muestras.
+# Funciona en MicroPython (copiar a la Pico) y en la PC, así la PC puede
+# repetir exactamente las mismas cuentas sobre datos grabados.
+
+
+class Welford:
+    """Media, varianza, mínimo y máximo acumulados (algoritmo de Welford)"""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.n = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def agregar(self, x):
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self._m2 += delta * (x - self.media)
+        if self.minimo is None or x < self.minimo:
+            self.minimo = x
+        if self.maximo is None or x > self.maximo:
+            self.maximo = x
+
+    @property
+    def varianza(self):
+        """Varianza muestral (n - 1); 0 con menos de 2 muestras"""
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def desviacion(self):
+        return self.varianza ** 0.5
+
+
+class CuantilP2:
+    """
+    Cuantil p aproximado con el algoritmo P² (Jain y Chlamtac, 1985):
+    cinco marcadores cuyas alturas se ajustan con interpolación parabólica,
+    sin guardar las muestras
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.reiniciar()
+
+    def reiniciar(self):
+        p = self.p
+        self.n = 0
+        self._q = [0.0] * 5  # alturas de los marcadores
+        self._pos = [1, 2, 3, 4, 5]  # posiciones reales
+        self._deseada = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+        self._paso = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def agregar(self, x):
+        q = self._q
+        pos = self._pos
+        if self.n < 5:
+            q[self.n] = x
+            self.n += 1
+            if self.n == 5:
+                q.sort()
+            return
+        self.n += 1
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        deseada = self._deseada
+        for i in range(5):
+            deseada[i] += self._paso[i]
+        for i in (1, 2, 3):
+            d = deseada[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                # Parabólica; si se sale de los vecinos, lineal
+                qi = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qi < q[i + 1]:
+                    qi = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qi
+                pos[i] += d
+
+    @property
+    def valor(self):
+        """Cuantil estimado; exacto con menos de 5 muestras, None sin muestras"""
+        if self.n >= 5:
+            return self._q[2]
+        if self.n == 0:
+            return None
+        return sorted(self._q[:self.n])[int(self.p * (self.n - 1) + 0.5)]
+
+
+class Histograma:
+    """
+    Conteos en clases de ancho fijo entre minimo y maximo; los valores
+    fuera del rango se cuentan aparte en debajo/encima
+    """
+
+    def __init__(self, minimo, maximo, ancho=1):
+        self.minimo = minimo
+        self.ancho = ancho
+        self.clases = int((maximo - minimo + ancho - 1) // ancho)
+        self.conteos = array('I', bytes(4 * self.clases))
+        self.reiniciar()
+
+    def reiniciar(self):
+        for i in range(self.clases):
+            self.conteos[i] = 0
+        self.n = 0
+        self.debajo = 0
+        self.encima = 0
+
+    def agregar(self, x):
+        self.n += 1
+        i = int((x - self.minimo) // self.ancho)
+        if i < 0:
+            self.debajo += 1
+        elif i >= self.clases:
+            self.encima += 1
+        else:
+            self.conteos[i] += 1
+
+    def limite(self, i):
+        """Límite inferior de la clase i"""
+        return self.minimo + i * self.ancho
+
+    def cuantil(self, p):
+        """Cuantil interpolado dentro de la clase; None sin muestras"""
+        if self.n == 0:
+            return None
+        objetivo = p * self.n - self.debajo
+        if objetivo <= 0:
+            return self.minimo
+        acumulado = 0
+        for i in range(self.clases):
+            c = self.conteos[i]
+            if acumulado + c >= objetivo:
+                return self.limite(i) + self.ancho * (objetivo - acumulado) / c
+            acumulado += c
+        return self.limite(self.clases)
+
+
+class Estadisticas(Welford):
+    """
+    Welford más cuantiles P² y, opcionalmente, un histograma; la memoria
+    no crece con la cantidad de muestras
+    """
+
+    def __init__(self, cuantiles=(0.5,), histograma=None):
+        self.cuantiles = [CuantilP2(p) for p in cuantiles]
+        self.histograma = histograma
+        super().__init__()
+
+    def reiniciar(self):
+        super().reiniciar()
+        for c in self.cuantiles:
+            c.reiniciar()
+        if self.histograma is not None:
+            self.histograma.reiniciar()
+
+    def agregar(self, x):
+        super().agregar(x)
+        for c in self.cuantiles:
+            c.agregar(x)
+        if self.histograma is not None:
+            self.histograma.agregar(x)
+
+    def cuantil(self, p):
+        for c in self.cuantiles:
+            if c.p == p:
+                return c.valor
+        raise ValueError("cuantil no registrado")
+
+    @property
+    def mediana(self):
+        return self.cuantil(0.5)
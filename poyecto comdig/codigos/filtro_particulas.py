@@ -0,0 +1,115 @@
+import numpy as np
+from trilaterador import fspl_cte
+
+
+class FiltroParticulas:
+    """
+    Seguimiento del nodo móvil con un filtro de partículas que fusiona el
+    RSSI de cada beacon con el giroscopio de nodoMovil.py.
+
+    Estado de cada partícula: x, y, rumbo (rad) y rapidez (m/s).
+    - predecir(): avanza todas las partículas dt segundos; el giroscopio Z
+      hace girar el rumbo y la rapidez y la posición siguen caminatas
+      aleatorias (ruido proporcional a √dt).
+    - actualizar_rssi(): pondera las partículas con la verosimilitud del
+      RSSI medido de un beacon según el modelo log-distancia. Cada beacon
+      se incorpora apenas llega, sin esperar a tener los tres.
+    Todas las operaciones son sobre arreglos de n_particulas elementos.
+    """
+
+    def __init__(self, beacons, n_particulas=2000, p0=None, n=None, sigma_rssi=4.0,
+                 sigma_aceleracion=0.5, sigma_giro=10.0, sigma_posicion=0.3,
+                 rapidez_max=3.0, semilla=None):
+        self.beacons = beacons
+        self.n_particulas = n_particulas
+        self.sigma_rssi = sigma_rssi
+        self.sigma_aceleracion = sigma_aceleracion  # m/s²
+        self.sigma_giro = np.radians(sigma_giro)     # rad/s
+        self.sigma_posicion = sigma_posicion         # m/√s, evita que las partículas colapsen
+        self.rapidez_max = rapidez_max
+        self._rng = np.random.default_rng(semilla)
+
+        self._pb = np.array([[b["x"], b["y"]] for b in beacons], dtype=float)
+        nb = len(beacons)
+        self._p0 = np.full(nb, fspl_cte()) if p0 is None else np.asarray(p0, dtype=float)
+        self._n10 = 10 * (np.full(nb, 2.0) if n is None else np.asarray(n, dtype=float))
+
+        self._giro = 0.0  # última velocidad angular Z (rad/s)
+        self._t = None
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Partículas uniformes sobre el área de los beacons con 5 m de margen"""
+        lo = self._pb.min(axis=0) - 5
+        hi = self._pb.max(axis=0) + 5
+        N = self.n_particulas
+        rng = self._rng
+        self.x = rng.uniform(lo[0], hi[0], N)
+        self.y = rng.uniform(lo[1], hi[1], N)
+        self.rumbo = rng.uniform(-np.pi, np.pi, N)
+        self.rapidez = rng.uniform(0, self.rapidez_max / 2, N)
+        self.pesos = np.full(N, 1.0 / N)
+
+    def predecir(self, t):
+        """Avanza las partículas hasta el tiempo t (s)"""
+        if self._t is None:
+            self._t = t
+            return
+        dt = t - self._t
+        if dt <= 0:
+            return
+        self._t = t
+        N = self.n_particulas
+        rng = self._rng
+        raiz = np.sqrt(dt)
+        self.rumbo += self._giro * dt + rng.normal(0, self.sigma_giro * raiz, N)
+        self.rapidez += rng.normal(0, self.sigma_aceleracion * raiz, N)
+        np.clip(self.rapidez, 0, self.rapidez_max, out=self.rapidez)
+        paso = self.rapidez * dt
+        self.x += paso * np.cos(self.rumbo) + rng.normal(0, self.sigma_posicion * raiz, N)
+        self.y += paso * np.sin(self.rumbo) + rng.normal(0, self.sigma_posicion * raiz, N)
+
+    def actualizar_giro(self, gyro_z):
+        """gyro_z en °/s (eje vertical del MPU6050)"""
+        self._giro = np.radians(gyro_z)
+
+    def actualizar_rssi(self, i, rssi, sigma=None):
+        """Incorpora el RSSI (dBm) medido del beacon i"""
+        sigma = self.sigma_rssi if sigma is None else sigma
+        d2 = (self.x - self._pb[i, 0]) ** 2 + (self.y - self._pb[i, 1]) ** 2
+        # p0 - 10 n log10(d) con d² para evitar la raíz
+        esperado = self._p0[i] - self._n10[i] * 0.5 * np.log10(np.maximum(d2, 1e-4))
+        error = (rssi - esperado) / sigma
+        self.pesos *= np.exp(-0.5 * error * error)
+        total = self.pesos.sum()
+        if not np.isfinite(total) or total < 1e-300:
+            # Ninguna partícula explica la medición: reiniciar
+            self.reiniciar()
+            return
+        self.pesos /= total
+        if 1.0 / np.dot(self.pesos, self.pesos) < self.n_particulas / 2:
+            self._remuestrear()
+
+    def _remuestrear(self):
+        """Remuestreo sistemático"""
+        N = self.n_particulas
+        acumulado = np.cumsum(self.pesos)
+        acumulado[-1] = 1.0
+        posiciones = (self._rng.random() + np.arange(N)) / N
+        idx = np.searchsorted(acumulado, posiciones)
+        self.x = self.x[idx]
+        self.y = self.y[idx]
+        self.rumbo = self.rumbo[idx]
+        self.rapidez = self.rapidez[idx]
+        self.pesos.fill(1.0 / N)
+
+    def estimacion(self):
+        """Devuelve la posición media (x, y) y su covarianza 2x2"""
+        w = self.pesos
+        mx = np.dot(w, self.x)
+        my = np.dot(w, self.y)
+        dx = self.x - mx
+        dy = self.y - my
+        cxy = np.dot(w, dx * dy)
+        cov = np.array([[np.dot(w, dx * dx), cxy], [cxy, np.dot(w, dy * dy)]])
+        return mx, my, cov
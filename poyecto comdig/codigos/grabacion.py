@@ -0,0 +1,156 @@
+"""
+Grabación y reproducción del flujo serial del concentrador.
+
+Formato del archivo (little-endian):
+    cabecera:  b"CDGRAB" | version (u8) | hora de inicio (f64, epoch)
+    registros: t_us (u64, desde el inicio) | largo (u16) | bytes recibidos
+
+GrabadorSerial envuelve un serial.Serial y guarda cada bloque leído con su
+hora de llegada. ReproductorSerial reemplaza a serial.Serial leyendo una
+grabación a 1x, Nx o lo más rápido posible (velocidad = 0).
+
+Uso directo (solo grabar, sin procesar):
+    python grabacion.py COM8 sesion.bin --baudrate 921600
+"""
+import argparse
+import struct
+import sys
+import time
+
+MAGICO = b"CDGRAB"
+VERSION = 1
+CABECERA = "<6sBd"
+REGISTRO = "<QH"
+LARGO_CABECERA = struct.calcsize(CABECERA)
+LARGO_REGISTRO = struct.calcsize(REGISTRO)
+MAX_BLOQUE = 0xFFFF
+
+
+class GrabadorSerial:
+    """Misma interfaz que serial.Serial; guarda todo lo que se lee"""
+
+    def __init__(self, ser, ruta):
+        self.ser = ser
+        self._archivo = open(ruta, "wb")
+        self._archivo.write(struct.pack(CABECERA, MAGICO, VERSION, time.time()))
+        self._t0 = time.perf_counter()
+        self.bytes_grabados = 0
+
+    @property
+    def in_waiting(self):
+        return self.ser.in_waiting
+
+    @property
+    def is_open(self):
+        return self.ser.is_open
+
+    def read(self, n=1):
+        datos = self.ser.read(min(n, MAX_BLOQUE))
+        if datos:
+            t_us = int((time.perf_counter() - self._t0) * 1e6)
+            self._archivo.write(struct.pack(REGISTRO, t_us, len(datos)))
+            self._archivo.write(datos)
+            self.bytes_grabados += len(datos)
+        return datos
+
+    def close(self):
+        self._archivo.close()
+        self.ser.close()
+
+
+class ReproductorSerial:
+    """
+    Sustituto de serial.Serial que entrega una grabación respetando los
+    tiempos de llegada divididos por velocidad (0 = sin esperas).
+    terminado pasa a True cuando ya se entregó todo el archivo.
+    """
+
+    def __init__(self, ruta, velocidad=1.0, timeout=1):
+        with open(ruta, "rb") as f:
+            self._datos = f.read()
+        magico, version, self.inicio = struct.unpack_from(CABECERA, self._datos, 0)
+        if magico != MAGICO or version != VERSION:
+            raise ValueError(f"{ruta} no es una grabación válida")
+        self.velocidad = velocidad
+        self.timeout = timeout
+        self.is_open = True
+        self.terminado = False
+        self._pos = LARGO_CABECERA
+        self._pendiente = bytearray()
+        self._t0 = None
+
+    def _siguiente_t(self):
+        """Tiempo de reproducción (s) del próximo registro, None si no quedan"""
+        if self._pos + LARGO_REGISTRO > len(self._datos):
+            return None
+        t_us, _ = struct.unpack_from(REGISTRO, self._datos, self._pos)
+        return t_us / 1e6 / self.velocidad if self.velocidad > 0 else 0.0
+
+    def _llegar(self):
+        """Pasa a _pendiente los registros cuyo tiempo de llegada ya pasó"""
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        ahora = time.perf_counter() - self._t0
+        # Sin esperas: entregar por bloques para no copiar todo el archivo
+        limite = 1 << 16 if self.velocidad <= 0 else None
+        while True:
+            t = self._siguiente_t()
+            if t is None or t > ahora:
+                break
+            if limite is not None and len(self._pendiente) >= limite:
+                break
+            _, largo = struct.unpack_from(REGISTRO, self._datos, self._pos)
+            inicio = self._pos + LARGO_REGISTRO
+            self._pendiente += self._datos[inicio:inicio + largo]
+            self._pos = inicio + largo
+
+    @property
+    def in_waiting(self):
+        self._llegar()
+        return len(self._pendiente)
+
+    def read(self, n=1):
+        limite = time.perf_counter() + (self.timeout or 0)
+        self._llegar()
+        while not self._pendiente:
+            t = self._siguiente_t()
+            if t is None:
+                self.terminado = True
+                return b""
+            espera = min(t - (time.perf_counter() - self._t0), limite - time.perf_counter())
+            if espera <= 0 and time.perf_counter() >= limite:
+                return b""
+            if espera > 0:
+                time.sleep(espera)
+            self._llegar()
+        datos = bytes(self._pendiente[:n])
+        del self._pendiente[:n]
+        return datos
+
+    def close(self):
+        self.is_open = False
+
+
+def main():
+    import serial
+
+    parser = argparse.ArgumentParser(description="Graba el flujo serial del concentrador")
+    parser.add_argument("puerto")
+    parser.add_argument("archivo")
+    parser.add_argument("--baudrate", type=int, default=921600)
+    args = parser.parse_args()
+
+    grabador = GrabadorSerial(serial.Serial(args.puerto, args.baudrate, timeout=1), args.archivo)
+    print(f"Grabando {args.puerto} en {args.archivo} (Ctrl+C para terminar)...", file=sys.stderr)
+    try:
+        while True:
+            grabador.read(grabador.in_waiting or 1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        grabador.close()
+        print(f"{grabador.bytes_grabados} bytes grabados", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
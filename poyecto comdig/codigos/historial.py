@@ -0,0 +1,68 @@
+import numpy as np
+
+# Una fila por muestra fusionada (posición calculada con el último RSSI
+# de cada beacon y la última lectura del giroscopio)
+FILA = np.dtype([
+    ('t', 'f8'),          # tiempo (s)
+    ('rssi', 'f4', 3),    # RSSI de los nodos 1..3 (dBm)
+    ('dist', 'f4', 3),    # distancia estimada a los nodos 1..3
+    ('x', 'f4'),
+    ('y', 'f4'),
+    ('gyro', 'f4', 3),    # giroscopio X, Y, Z (°/s)
+    ('cov', 'f4', 3),     # covarianza de la posición xx, xy, yy (m², 0 sin filtro)
+])
+
+
+class Historial:
+    """
+    Buffer circular de filas FILA con append O(1) y ventanas sin copia.
+
+    Las primeras ventana_max filas del buffer se escriben también a
+    continuación del final, de modo que las últimas w <= ventana_max filas
+    siempre son un bloque contiguo y ultimos(w) devuelve una vista.
+    """
+
+    def __init__(self, capacidad, ventana_max):
+        if ventana_max > capacidad:
+            raise ValueError("ventana_max no puede ser mayor que la capacidad")
+        self.capacidad = capacidad
+        self.ventana_max = ventana_max
+        self._datos = np.zeros(capacidad + ventana_max, dtype=FILA)
+        self._i = 0  # próxima posición a escribir
+        self.n = 0   # filas válidas
+
+    def __len__(self):
+        return self.n
+
+    def agregar(self, t, rssi, dist, x, y, gyro, cov=None):
+        i = self._i
+        fila = self._datos[i]
+        fila['t'] = t
+        fila['rssi'] = rssi[:3]
+        fila['dist'] = dist[:3]
+        fila['x'] = x
+        fila['y'] = y
+        fila['gyro'] = gyro
+        if cov is None:
+            fila['cov'] = 0
+        else:
+            fila['cov'] = (cov[0][0], cov[0][1], cov[1][1])
+        if i < self.ventana_max:
+            self._datos[self.capacidad + i] = fila
+        self._i = i + 1 if i + 1 < self.capacidad else 0
+        if self.n < self.capacidad:
+            self.n += 1
+
+    def ultimos(self, w):
+        """Vista de las últimas w filas (w <= ventana_max), de la más vieja a la más nueva"""
+        w = min(w, self.n, self.ventana_max)
+        i = self._i
+        if i >= w:
+            return self._datos[i - w:i]
+        return self._datos[self.capacidad + i - w:self.capacidad + i]
+
+    def todo(self):
+        """Copia de todas las filas válidas en orden cronológico"""
+        if self.n < self.capacidad:
+            return self._datos[:self.n].copy()
+        return np.concatenate((self._datos[self._i:self.capacidad], self._datos[:self._i]))
@@ -0,0 +1,112 @@
+import sys
+import threading
+import time
+from collections import deque
+from enlace import dif_ticks
+
+
+class LectorSerial(threading.Thread):
+    """
+    Hilo que vacía el puerto serial continuamente y deja las muestras
+    decodificadas en una cola. La animación solo consume lo que llegó
+    desde el cuadro anterior (consumir()), así el puerto nunca se
+    acumula aunque el concentrador envíe más rápido que el refresco.
+
+    La cola es un deque: append() y popleft() son atómicos, por lo que
+    productor y consumidor no necesitan lock.
+    """
+
+    def __init__(self, ser, parser, max_cola=100000):
+        super().__init__(daemon=True)
+        self.ser = ser
+        self.parser = parser
+        self.cola = deque(maxlen=max_cola)
+        self._detener = threading.Event()
+
+        # Métricas
+        self.bytes_leidos = 0
+        self.muestras_recibidas = 0
+        self.muestras_descartadas = 0  # desbordes de la cola
+        self.retardo_ms = 0.0          # espera en la cola de la muestra más vieja consumida
+        self.retardo_extremo_ms = 0.0  # radio -> pantalla, según el reloj del concentrador
+        self._offset_reloj = None      # mínimo observado de (t_host - t_concentrador)
+        self._ticks_ref = None         # (ticks_ms, ms sin vuelta) más nuevo del concentrador
+
+    def run(self):
+        while not self._detener.is_set():
+            try:
+                datos = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                print(f"Error en la lectura: {e}", file=sys.stderr)
+                break
+            if not datos:
+                # Fin de una grabación (ver grabacion.ReproductorSerial)
+                if getattr(self.ser, "terminado", False):
+                    break
+                continue
+            t_host = time.perf_counter()
+            self.bytes_leidos += len(datos)
+            for muestra in self.parser.feed(datos):
+                if len(self.cola) == self.cola.maxlen:
+                    self.muestras_descartadas += 1
+                self.cola.append((t_host, muestra))
+                self.muestras_recibidas += 1
+
+    def detener(self):
+        self._detener.set()
+
+    def consumir(self):
+        """Devuelve todas las muestras que llegaron desde la última llamada"""
+        muestras = []
+        ahora = time.perf_counter()
+        t_primera = None
+        ultima = None
+        while True:
+            try:
+                t_host, muestra = self.cola.popleft()
+            except IndexError:
+                break
+            if t_primera is None:
+                t_primera = t_host
+            ultima = (t_host, muestra)
+            muestras.append(muestra)
+
+        if ultima is not None:
+            self.retardo_ms = (ahora - t_primera) * 1000
+            t_host, muestra = ultima
+            t_ms = self._sin_vuelta(muestra[3])
+            if t_ms is not None:
+                # El reloj del concentrador no está sincronizado: se usa como
+                # referencia el tránsito más rápido visto hasta ahora
+                offset = t_host * 1000 - t_ms
+                if self._offset_reloj is None or offset < self._offset_reloj:
+                    self._offset_reloj = offset
+                self.retardo_extremo_ms = ahora * 1000 - t_ms - self._offset_reloj
+        return muestras
+
+    def _sin_vuelta(self, t_ms):
+        """
+        ticks_ms del concentrador (vuelve a 0 en 2**30) llevado a una escala
+        continua, para que el offset del reloj no salte en cada vuelta
+        """
+        if not t_ms:
+            return None
+        if self._ticks_ref is None:
+            self._ticks_ref = (t_ms, t_ms)
+            return t_ms
+        ref, ref_continuo = self._ticks_ref
+        d = dif_ticks(t_ms, ref)
+        if d > 0:
+            self._ticks_ref = (t_ms, ref_continuo + d)
+        return ref_continuo + d
+
+    def metricas(self):
+        return {
+            "profundidad": len(self.cola),
+            "retardo_ms": self.retardo_ms,
+            "retardo_extremo_ms": self.retardo_extremo_ms,
+            "recibidas": self.muestras_recibidas,
+            "descartadas": self.muestras_descartadas,
+            "tramas_invalidas": self.parser.tramas_invalidas,
+            "bytes": self.bytes_leidos,
+        }
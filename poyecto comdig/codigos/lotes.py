@@ -0,0 +1,73 @@
+import struct
+
+try:
+    from utime import ticks_diff
+except ImportError:
+    def ticks_diff(a, b):
+        return a - b
+
+# Varias muestras con su hora en un solo payload de 32 bytes.
+# Copiar este archivo a la Pico de cada nodo y del concentrador.
+#
+#   0: formato de muestra | 1: cantidad | 2-3: reservado
+#   4-5: seq | 6-9: tick_ms de la primera muestra | 10: PAYLOAD_LOTE
+#   11..31: muestras, cada una con dt (ms desde la primera, u8) y valores
+#
+# seq/tick/tipo están donde los espera enlace.py, así el concentrador
+# distingue un lote de una lectura suelta o de un resumen.
+PAYLOAD_LOTE = 2
+OFFSET_FORMATO = 0
+OFFSET_CANTIDAD = 1
+OFFSET_MUESTRAS = 11
+TAM_PAYLOAD = 32
+
+FORMATO_RSSI = 1  # dt, RSSI (dBm, i8): 10 muestras por payload
+FORMATO_GYRO = 2  # dt, giroscopio X, Y, Z (1/100 °/s, i16): 3 muestras por payload
+MUESTRAS = {
+    FORMATO_RSSI: "<Bb",
+    FORMATO_GYRO: "<Bhhh",
+}
+
+MAX_ESPERA_MS = 255  # dt tiene que caber en un byte
+
+
+class Lote:
+    """
+    Acumula muestras y arma el payload cuando se llena o cuando la más
+    vieja esperó max_espera_ms.
+    """
+
+    def __init__(self, formato, max_espera_ms=50, tam_payload=TAM_PAYLOAD):
+        self.formato = formato
+        self.max_espera_ms = min(max_espera_ms, MAX_ESPERA_MS)
+        self._fmt = MUESTRAS[formato]
+        self._tam = struct.calcsize(self._fmt)
+        self.capacidad = (tam_payload - OFFSET_MUESTRAS) // self._tam
+        self.buf = bytearray(tam_payload)
+        self.n = 0
+        self._base = 0
+
+    def listo(self, ahora):
+        """True si hay que enviar: lote lleno o la primera muestra ya esperó demasiado"""
+        return self.n == self.capacidad or (
+            self.n > 0 and ticks_diff(ahora, self._base) >= self.max_espera_ms)
+
+    def agregar(self, tick, *valores):
+        """Agrega una muestra; el lote debe cerrarse antes si listo() es True"""
+        if self.n == 0:
+            self._base = tick
+        dt = ticks_diff(tick, self._base)
+        struct.pack_into(self._fmt, self.buf, OFFSET_MUESTRAS + self.n * self._tam,
+                         min(max(dt, 0), MAX_ESPERA_MS), *valores)
+        self.n += 1
+
+    def cerrar(self, seq):
+        """Completa la cabecera, devuelve el payload y vacía el lote"""
+        buf = self.buf
+        buf[OFFSET_FORMATO] = self.formato
+        buf[OFFSET_CANTIDAD] = self.n
+        struct.pack_into("<HI", buf, 4, seq & 0xFFFF, self._base)
+        buf[10] = PAYLOAD_LOTE
+        self.n = 0
+        return bytes(buf)
+
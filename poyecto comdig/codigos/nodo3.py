@@ -6,6 +6,12 @@ from machine import Pin, SPI, I2C
 from nrf24l01 import NRF24L01
 from micropython import const
 from ssd1306 import SSD1306_I2C
+from planificador import PlanificadorTx
+from estadistica import Welford
+from tdma import ClienteTdma, Transmisor
+from lotes import Lote, FORMATO_RSSI
+from reconexion_wifi import ReconexionWifi
+from enlace import FORMATO_BEACON, FORMATO_RESUMEN, PAYLOAD_RESUMEN, FORMATO_SIN_WIFI, PAYLOAD_SIN_WIFI
 
 POWER = {"0 dBm": const(0x06), "-6 dBm": const(0x04), "-12 dBm": const(0x02), "-18 dBm": const(0x00)}
 DATA_RATE = {"250 kbps": const(0x20), "1 Mbps": const(0x00), "2 Mbps": const(0x08),}
@@ -25,7 +31,8 @@ csn = Pin(cfg["csn"], mode=Pin.OUT, value=1)
 ce = Pin(cfg["ce"], mode=Pin.OUT, value=0)
 spi = cfg["spi"]
 
-nrf = NRF24L01(spi, csn, ce, channel = 100, payload_size=8)
+# Mismo tamaño de payload que el concentrador (payload estático del nRF)
+nrf = NRF24L01(spi, csn, ce, channel = 100, payload_size=32)
 nrf.set_power_speed(POWER["0 dBm"], DATA_RATE["2 Mbps"])
 
 nrf.open_tx_pipe(b'3Node')
@@ -33,46 +40,114 @@ nrf.open_tx_pipe(b'3Node')
 wifi = network.WLAN(network.STA_IF)
 wifi.active(True)
 
-def wifi_connect():
-    while not wifi.isconnected():
-        wifi.connect(SSID, PASSWORD)
-        utime.sleep(3)
-        oled.invert(True)
-        oled.fill(0)
-        oled.text("Connection Lost", 4, 12)
-        oled.show()
-    print("WiFi conectado! IP:", wifi.ifconfig()[0])
+# Reconexión sin bloquear (ver reconexion_wifi.py): mientras no hay WiFi el
+# nodo sigue transmitiendo avisos de enlace caído cada PERIODO_SIN_WIFI_MS
+reconexion = ReconexionWifi(wifi, SSID, PASSWORD)
+PERIODO_SIN_WIFI_MS = 500
+# Aviso: ms sin WiFi, seq, tick, tipo, intentos de reconexión (FORMATO_SIN_WIFI, ver enlace.py)
+proximo_aviso = utime.ticks_ms()
 
 # Variables para control de tiempo
 last_oled_update = utime.ticks_ms()
 OLED_UPDATE_INTERVAL = 2000  # 2 segundos
 
-wifi_connect()
+# Payload: RSSI, número de secuencia y ticks_ms del nodo (FORMATO_BEACON, ver enlace.py)
+seq = 0
+
+# Planificación de envíos (ver planificador.py): suprime repetidos, con latido
+# y desvío aleatorio. False = enviar cada 10 ms
+PLANIFICAR_TX = False
+PERIODO_TX_MS = 100      # tasa base
+MAX_INTERVALO_TX_MS = 1000  # latido: se envía aunque el RSSI no cambie
+JITTER_TX_MS = 20        # desvío aleatorio de cada turno
+planificador = PlanificadorTx(PERIODO_TX_MS, MAX_INTERVALO_TX_MS, JITTER_TX_MS)
+
+# Pre-agregación: 0 = enviar cada lectura; K > 0 = leer el RSSI cada
+# PERIODO_MUESTREO_MS y enviar un solo resumen (media, varianza, mín, máx)
+# cada K lecturas (ver FORMATO_RESUMEN en enlace.py)
+K_RESUMEN = 0
+PERIODO_MUESTREO_MS = 20
+resumen = Welford()
+proximo_muestreo = utime.ticks_ms()
+
+# TDMA (ver tdma.py): transmitir solo en el slot que asigna el concentrador
+TDMA = False
+NODO_ID = 3
+tdma = ClienteTdma(nrf, NODO_ID) if TDMA else None
+transmisor = Transmisor(nrf, tdma)
+pendiente = None  # payload listo esperando su turno
+
+# Lotes (ver lotes.py): juntar hasta 10 lecturas con su hora en un payload y
+# enviarlo al llenarse o cuando la primera esperó MAX_ESPERA_LOTE_MS
+LOTES = False
+MAX_ESPERA_LOTE_MS = 100
+lote = Lote(FORMATO_RSSI, MAX_ESPERA_LOTE_MS)
+valor_pendiente = 0
 
 while True:
     current_time = utime.ticks_ms()
+    conectado = reconexion.revisar(current_time)
+    # Una sola lectura del RSSI por vuelta, para la pantalla y el envío
+    rssi = wifi.status('rssi') if conectado else 0
     
     # Actualizar OLED cada 2 segundos (sin bloquear el loop)
     if utime.ticks_diff(current_time, last_oled_update) >= OLED_UPDATE_INTERVAL:
         oled.invert(True)
         oled.fill(0)
-        oled.text("Node 2", 40, 2)
-        oled.text("RSSI:", 10, 15)
-        oled.text(f"{wifi.status('rssi')} dBm", 50, 15)
+        if conectado:
+            oled.text("Node 2", 40, 2)
+            oled.text("RSSI:", 10, 15)
+            oled.text(f"{rssi} dBm", 50, 15)
+        else:
+            oled.text("Connection Lost", 4, 12)
         oled.show()
         last_oled_update = current_time
-    
-    # Transmisión continua del NRF (sin delays)
-    if wifi.isconnected():
-        try:
-            nrf.stop_listening()
-            rssi = wifi.status('rssi')
-            nrf.send(struct.pack("i", rssi))
-            print("Enviado:", rssi)
-        except OSError as e:
-            print("Error NRF:", e)
+
+    # Preparar el payload: aviso sin WiFi, resumen de K lecturas, lote o lectura individual
+    if not conectado:
+        if utime.ticks_diff(current_time, proximo_aviso) >= 0:
+            proximo_aviso = utime.ticks_add(current_time, PERIODO_SIN_WIFI_MS)
+            pendiente = struct.pack(FORMATO_SIN_WIFI, reconexion.sin_conexion_ms(current_time), seq,
+                                    utime.ticks_ms(), PAYLOAD_SIN_WIFI, min(reconexion.intentos, 255))
+            valor_pendiente = "sin WiFi"
+    elif K_RESUMEN:
+        if utime.ticks_diff(current_time, proximo_muestreo) >= 0:
+            proximo_muestreo = utime.ticks_add(proximo_muestreo, PERIODO_MUESTREO_MS)
+            resumen.agregar(rssi)
+            if resumen.n >= K_RESUMEN:
+                pendiente = struct.pack(FORMATO_RESUMEN, round(resumen.media * 100), seq, utime.ticks_ms(),
+                                        PAYLOAD_RESUMEN, min(resumen.n, 255), resumen.minimo, resumen.maximo,
+                                        min(round(resumen.varianza * 100), 0xFFFF))
+                valor_pendiente = resumen.media
+                resumen.reiniciar()
     else:
-        print("WiFi desconectado!")
-        wifi_connect()
-    
-    utime.sleep_ms(10)  # Pausa mínima para evitar saturación
+        if not PLANIFICAR_TX or planificador.debe_enviar(rssi, current_time):
+            if LOTES:
+                lote.agregar(current_time, rssi)
+            else:
+                pendiente = struct.pack(FORMATO_BEACON, rssi, seq, utime.ticks_ms())
+            valor_pendiente = rssi
+    # Un lote lleno reemplaza al pendiente para no desbordarse
+    if LOTES and lote.listo(current_time) and (pendiente is None or lote.n == lote.capacidad):
+        pendiente = lote.cerrar(seq)
+
+    # Transmitir: con TDMA sincronizado solo dentro del slot propio (ver tdma.py)
+    enviado = transmisor.intentar(pendiente)
+    if enviado is not None:
+        if enviado:
+            print("Enviado:", valor_pendiente)
+        # Un envío fallido también consume su número: el concentrador lo cuenta como perdido
+        seq = (seq + 1) & 0xFFFF
+        pendiente = None
+
+    # Dormir hasta el próximo evento
+    if TDMA:
+        utime.sleep_ms(1)
+    elif not conectado:
+        utime.sleep_ms(10)
+    elif K_RESUMEN:
+        utime.sleep_ms(max(utime.ticks_diff(proximo_muestreo, utime.ticks_ms()), 0))
+    elif PLANIFICAR_TX:
+        utime.sleep_ms(min(planificador.espera_ms(utime.ticks_ms()), PERIODO_TX_MS))
+    else:
+        utime.sleep_ms(10)  # Pausa mínima para evitar saturación
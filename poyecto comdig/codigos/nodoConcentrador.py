@@ -2,10 +2,16 @@ import random
 import sys
 import struct
 import utime
+import micropython
 from machine import I2C, Pin
-from machine import Pin, SPI, SoftSPI
+from machine import Pin, SPI, SoftSPI, UART
 from nrf24l01 import NRF24L01
 from micropython import const
+from enlace import EstadisticasEnlace, OFFSET_SEQ, OFFSET_TICK, OFFSET_TIPO, FORMATO_RESUMEN, PAYLOAD_RESUMEN, FORMATO_SIN_WIFI, PAYLOAD_SIN_WIFI
+import tdma
+from lotes import PAYLOAD_LOTE, OFFSET_CANTIDAD, OFFSET_MUESTRAS, MUESTRAS, FORMATO_GYRO
+from agregador import Agregador, int32_en, BLOQUES, DESLIZANTE, MEDIA, MEDIANA, EMA
+from trama import empaquetar_en, TIPO_RSSI, TIPO_GYRO, TIPO_ESTADO, TIPO_ENLACE, TIPO_RESUMEN, TIPO_SIN_WIFI, LARGO_CABECERA, MAX_PAYLOAD, LARGO_CRC
 
 POWER = {"0 dBm": const(0x06), "-6 dBm": const(0x04), "-12 dBm": const(0x02), "-18 dBm": const(0x00)}
 DATA_RATE = {"250 kbps": const(0x20), "1 Mbps": const(0x00), "2 Mbps": const(0x08),}
@@ -13,6 +19,28 @@ DATA_RATE = {"250 kbps": const(0x20), "1 Mbps": const(0x00), "2 Mbps": const(0x0
 SSID = "Sergio"
 PASSWORD = "sergio123"
 
+# Salida hacia la PC: True = tramas binarias (ver trama.py), False = texto
+SALIDA_BINARIA = True
+UART_ID = None  # None: USB (stdout). 0/1: UART por hardware
+BAUDRATE = 921600
+
+# Recepción por interrupción: pin conectado a IRQ del nRF24L01 (activo en bajo).
+# None = sin cable de IRQ, se consulta nrf.any() en el lazo principal
+PIN_IRQ = 7
+TAM_COLA = const(64)  # paquetes en espera (potencia de 2)
+PERIODO_ESTADO_MS = 1000  # cada cuánto se envían las métricas del concentrador
+
+# TDMA (ver tdma.py): el concentrador envía un sync por superframe y cada nodo
+# transmite solo en su slot. Con más nodos que pipes la tabla rota entre
+# superframes. Los nodos deben tener TDMA = True con el mismo NODO_ID
+TDMA = False
+NODOS_TDMA = [1, 2, 3, 4]
+SLOT_MS = 4
+GUARDA_MS = 1
+MAX_NODOS = const(16)
+
+micropython.alloc_emergency_exception_buf(100)
+
 i2c = I2C(0, scl=Pin(1), sda=Pin(0), freq=400000)
 spi = SPI(0, sck=Pin(2), mosi=Pin(3), miso=Pin(4))
 cfg = {"spi": spi, "csn": 5, "ce": 6}
@@ -21,55 +49,268 @@ csn = Pin(cfg["csn"], mode=Pin.OUT, value=1)
 ce = Pin(cfg["ce"], mode=Pin.OUT, value=0)
 spi = cfg["spi"]
 
-nrf = NRF24L01(spi, csn, ce, channel = 100, payload_size=16)
+# Todos los nodos usan el payload completo de 32 bytes (ver lotes.py)
+PAYLOAD = const(32)
+nrf = NRF24L01(spi, csn, ce, channel = 100, payload_size=PAYLOAD)
 nrf.set_power_speed(POWER["-12 dBm"], DATA_RATE["2 Mbps"])
 
-nrf.open_rx_pipe(1, b'1Node')
-nrf.open_rx_pipe(2, b'2Node')
-nrf.open_rx_pipe(3, b'3Node')
-nrf.open_rx_pipe(4, b'4Node')
+# Beacons: nodo -> (dirección, agregación de su RSSI; ver agregador.py).
+# Sin TDMA el número de nodo es su pipe. Para sumar un beacon basta con
+# agregar una línea (pipes 0..5 del nRF, o hasta MAX_NODOS con TDMA)
+BEACONS = {
+    1: (b'1Node', Agregador(ventana=5, modo=BLOQUES, reductor=MEDIA)),
+    2: (b'2Node', Agregador(ventana=5, modo=BLOQUES, reductor=MEDIA)),
+    3: (b'3Node', Agregador(ventana=5, modo=BLOQUES, reductor=MEDIA)),
+}
+# nodoMovil.py envía siempre lotes de muestras del giroscopio (ver lotes.py)
+NODO_GYRO = 4
+DIRECCION_GYRO = b'4Node'
+MUESTRA_GYRO = MUESTRAS[FORMATO_GYRO]
+TAM_MUESTRA_GYRO = struct.calcsize(MUESTRA_GYRO)
+
+agregadores = [None] * MAX_NODOS
+for nodo, (direccion, agregador) in BEACONS.items():
+    agregadores[nodo] = agregador
+# Nodo que transmite por cada pipe; sin TDMA es el mismo número
+nodo_de_pipe = bytearray(range(8))
+if TDMA:
+    for pipe in range(1, tdma.PIPES + 1):
+        nrf.open_rx_pipe(pipe, tdma.DIRECCIONES[pipe - 1])
+    # El sync no espera ACK: un solo intento sin reintentos
+    nrf.reg_write(tdma.SETUP_RETR, 0x00)
+    nrf.open_tx_pipe(tdma.DIRECCION_SYNC)
+else:
+    for nodo, (direccion, agregador) in BEACONS.items():
+        nrf.open_rx_pipe(nodo, direccion)
+    nrf.open_rx_pipe(NODO_GYRO, DIRECCION_GYRO)
+
+if UART_ID is None:
+    salida = sys.stdout.buffer
+else:
+    salida = UART(UART_ID, baudrate=BAUDRATE)
+buf_trama = bytearray(LARGO_CABECERA + MAX_PAYLOAD + LARGO_CRC)
+mv_trama = memoryview(buf_trama)
+secuencia = [0] * MAX_NODOS
 
-interval = 5
-avg1 = []
-avg2 = []
-avg3 = []
-avg4 = []
+def enviar(pipe, tipo, valores, t_ms=None):
+    if SALIDA_BINARIA:
+        if t_ms is None:
+            t_ms = utime.ticks_ms()
+        n = empaquetar_en(buf_trama, tipo, pipe, secuencia[pipe], t_ms, valores)
+        salida.write(mv_trama[:n])
+        secuencia[pipe] = (secuencia[pipe] + 1) & 0xFFFF
+    elif tipo == TIPO_GYRO:
+        print(pipe, valores[0], valores[1], valores[2])
+    else:
+        print(str(pipe) + str(valores[0]))
+
+STATUS = const(0x07)
+FIFO_STATUS = const(0x17)
+R_RX_PAYLOAD = const(0x61)
+RX_DR = const(0x40)
+RX_FULL = const(0x02)
 
 def leer_pipe():
-    STATUS = 0x07
     status = nrf.reg_read(STATUS)
     pipe_num = (status >> 1) & 0x07
     return pipe_num
 
+# Cola circular de paquetes recibidos: cada casilla guarda el nodo (su pipe
+# sin TDMA), la hora de llegada (ticks_ms, 4 bytes) y el payload.
+# vaciar_fifo() solo incrementa escritos y el lazo principal solo leidos,
+# así no hace falta deshabilitar interrupciones para compartirla.
+# vaciar_fifo() corre agendada por la IRQ y también llamada desde el lazo:
+# la agendada puede caer en medio de la directa (entre bytecodes), por eso
+# ocupado hace que solo una use el SPI y la cola a la vez
+OFFSET_LLEGADA = const(1)
+OFFSET_PAYLOAD = const(5)
+TAM_CASILLA = OFFSET_PAYLOAD + PAYLOAD
+cola = bytearray(TAM_COLA * TAM_CASILLA)
+mv_cola = memoryview(cola)
+payloads = [mv_cola[i * TAM_CASILLA + OFFSET_PAYLOAD:(i + 1) * TAM_CASILLA] for i in range(TAM_COLA)]
+escritos = 0
+leidos = 0
+
+# Métricas del periodo actual y acumuladas
+recibidos = 0
+descartados = 0
+fifo_llena = 0
+cola_max = 0
+recibidos_periodo = 0
+descarte = bytearray(PAYLOAD)
+enlace = EstadisticasEnlace(MAX_NODOS)
+
+def leer_payload_en(buf):
+    """Como nrf.recv() pero escribe en buf sin crear objetos nuevos"""
+    nrf.cs(0)
+    nrf.spi.readinto(nrf.buf, R_RX_PAYLOAD)
+    nrf.spi.readinto(buf)
+    nrf.cs(1)
+    nrf.reg_write(STATUS, RX_DR)
+
+ocupado = False
+
+def vaciar_fifo(_):
+    """Pasa todos los paquetes del RX FIFO del nRF a la cola"""
+    global ocupado
+    if ocupado:
+        # El SPI está en uso (otro vaciado o enviar_sync()); la IRQ del nRF
+        # sigue en bajo hasta leer todo, así que el lazo principal vacía después
+        return
+    ocupado = True
+    try:
+        _vaciar_fifo()
+    finally:
+        ocupado = False
+
+def _vaciar_fifo():
+    global escritos, recibidos, descartados, fifo_llena, recibidos_periodo, cola_max
+    if nrf.reg_read(FIFO_STATUS) & RX_FULL:
+        # Con el FIFO lleno el nRF descarta lo que siga llegando
+        fifo_llena += 1
+    while nrf.any():
+        pendientes = (escritos - leidos) & 0xFFFF
+        if pendientes >= TAM_COLA:
+            leer_payload_en(descarte)
+            descartados += 1
+            continue
+        i = escritos & (TAM_COLA - 1)
+        base = i * TAM_CASILLA
+        t = utime.ticks_ms()
+        cola[base] = nodo_de_pipe[leer_pipe()]
+        cola[base + 1] = t & 0xFF
+        cola[base + 2] = (t >> 8) & 0xFF
+        cola[base + 3] = (t >> 16) & 0xFF
+        cola[base + 4] = t >> 24
+        leer_payload_en(payloads[i])
+        escritos = (escritos + 1) & 0xFFFF
+        recibidos += 1
+        recibidos_periodo += 1
+        if pendientes + 1 > cola_max:
+            cola_max = pendientes + 1
+
+ref_vaciar = vaciar_fifo
+
+buf_sync = bytearray(PAYLOAD)
+superframe = 0
+
+def enviar_sync():
+    """Inicia un superframe: publica la tabla de slots y remapea los pipes"""
+    global superframe, ocupado
+    tabla = tdma.tabla_superframe(NODOS_TDMA, superframe)
+    tdma.empaquetar_sync(buf_sync, superframe, SLOT_MS, GUARDA_MS, tabla)
+    # stop/start_listening vacían el RX FIFO: rescatar lo pendiente antes
+    vaciar_fifo(0)
+    ocupado = True
+    try:
+        nrf.stop_listening()
+        try:
+            nrf.send(buf_sync)
+        except OSError:
+            pass  # sin ACK (o con ACKs superpuestos de varios nodos) es lo esperado
+        nrf.start_listening()
+    finally:
+        ocupado = False
+    for j in range(len(tabla)):
+        nodo_de_pipe[j + 1] = tabla[j]
+    superframe = (superframe + 1) & 0xFFFF
+    return len(tabla)
+
+def enviar_resumen(pipe, p):
+    """Reenvía el resumen calculado por el beacon, sin volver a agregar"""
+    media, _, _, _, n, minimo, maximo, var = struct.unpack_from(FORMATO_RESUMEN, cola, p)
+    enviar(pipe, TIPO_RESUMEN, (media / 100, var / 100, minimo, maximo, n))
+
+def enviar_sin_wifi(pipe, p):
+    """El beacon sigue en el aire pero sin WiFi: avisar a la PC"""
+    sin_wifi_ms, _, _, _, intentos = struct.unpack_from(FORMATO_SIN_WIFI, cola, p)
+    if SALIDA_BINARIA:
+        enviar(pipe, TIPO_SIN_WIFI, (sin_wifi_ms, intentos))
+    else:
+        print("#", pipe, "sin WiFi", sin_wifi_ms, "ms", intentos, "intentos")
+
+def irq_nrf(pin):
+    # Contexto de interrupción: solo agendar el vaciado
+    try:
+        micropython.schedule(ref_vaciar, 0)
+    except RuntimeError:
+        pass  # cola de schedule llena; el lazo principal revisa el pin
+
+def enviar_estado(periodo_ms):
+    global recibidos_periodo, cola_max
+    paquetes_s = recibidos_periodo * 1000 // periodo_ms
+    if SALIDA_BINARIA:
+        enviar(0, TIPO_ESTADO, (paquetes_s, recibidos, descartados, fifo_llena, cola_max))
+    else:
+        print("#", paquetes_s, "paq/s", recibidos, "recibidos", descartados, "descartados",
+              fifo_llena, "fifo llena", cola_max, "cola max")
+    recibidos_periodo = 0
+    cola_max = 0
+    ahora = utime.ticks_ms()
+    for pipe in list(BEACONS) + [NODO_GYRO]:
+        if SALIDA_BINARIA:
+            enviar(pipe, TIPO_ENLACE, (enlace.recibidos[pipe], enlace.perdidos[pipe],
+                                       enlace.duplicados[pipe], enlace.jitter_ms(pipe),
+                                       enlace.edad_ms(pipe, ahora)))
+        else:
+            print("#", pipe, enlace.recibidos[pipe], "recibidos", enlace.perdidos[pipe], "perdidos",
+                  enlace.duplicados[pipe], "duplicados", enlace.jitter_ms(pipe), "ms jitter")
+
+nrf.start_listening()
+if PIN_IRQ is not None:
+    pin_irq = Pin(PIN_IRQ, Pin.IN, Pin.PULL_UP)
+    pin_irq.irq(trigger=Pin.IRQ_FALLING, handler=irq_nrf, hard=True)
+ultimo_estado = utime.ticks_ms()
+proximo_sync = ultimo_estado
+
 while True:
-    nrf.start_listening()
-    if nrf.any():
-        pipe = leer_pipe()
-        if pipe == 1:
-            data = struct.unpack("i", nrf.recv())
-            avg1.append(data[0])
-            if(len(avg1) == interval):
-                avg = sum(avg1) / len(avg1)
-                avg1 = []
-                print(str(pipe) + str(avg))
-        if pipe == 2:
-            data = struct.unpack("i", nrf.recv())
-            avg2.append(data[0])
-            if(len(avg2) == interval):
-                avg = sum(avg2) / len(avg2)
-                avg2 = []
-                print(str(pipe) + str(avg))
-        if pipe == 3:
-            data = struct.unpack("i", nrf.recv())
-            avg3.append(data[0])
-            if(len(avg3) == interval):
-                avg = sum(avg3) / len(avg3)
-                avg3 = []
-                print(str(pipe) + str(avg))
-        if pipe == 4:
-            gyro_x, gyro_y, gyro_z= struct.unpack('fff', nrf.recv())
-        print(pipe, gyro_x, gyro_y, gyro_z)
-        print("1" + str(-45))
-        print("2" + str(-75))
-        print("3" + str(-80))
-        utime.sleep_ms(500)
+    # Si se perdió un flanco (o no hay IRQ) vaciar desde el lazo principal
+    if PIN_IRQ is None or pin_irq.value() == 0:
+        vaciar_fifo(0)
+
+    while leidos != escritos:
+        base = (leidos & (TAM_COLA - 1)) * TAM_CASILLA
+        nodo = cola[base]
+        agregador = agregadores[nodo]
+        p = base + OFFSET_PAYLOAD
+        llegada = int32_en(cola, base + OFFSET_LLEGADA)
+        if agregador is not None or nodo == NODO_GYRO:
+            enlace.registrar(nodo, cola[p + OFFSET_SEQ] | (cola[p + OFFSET_SEQ + 1] << 8),
+                             int32_en(cola, p + OFFSET_TICK), llegada)
+        if agregador is not None:
+            tipo_payload = cola[p + OFFSET_TIPO]
+            if tipo_payload == PAYLOAD_RESUMEN:
+                enviar_resumen(nodo, p)
+            elif tipo_payload == PAYLOAD_SIN_WIFI:
+                enviar_sin_wifi(nodo, p)
+            elif tipo_payload == PAYLOAD_LOTE:
+                # Cada muestra del lote (dt u8, RSSI i8) pasa por el agregador
+                q = p + OFFSET_MUESTRAS + 1
+                for _ in range(cola[p + OFFSET_CANTIDAD]):
+                    rssi = cola[q]
+                    if agregador.agregar(rssi - 256 if rssi > 127 else rssi):
+                        enviar(nodo, TIPO_RSSI, (agregador.resultado(),))
+                    q += 2
+            elif agregador.agregar(int32_en(cola, p)):
+                enviar(nodo, TIPO_RSSI, (agregador.resultado(),))
+        elif nodo == NODO_GYRO:
+            # La última muestra del lote se toma como recibida en `llegada`
+            # y las anteriores se corren según su dt
+            n = cola[p + OFFSET_CANTIDAD]
+            q = p + OFFSET_MUESTRAS
+            ultimo_dt = cola[q + (n - 1) * TAM_MUESTRA_GYRO] if n else 0
+            for _ in range(n):
+                dt, gyro_x, gyro_y, gyro_z = struct.unpack_from(MUESTRA_GYRO, cola, q)
+                enviar(nodo, TIPO_GYRO, (gyro_x / 100, gyro_y / 100, gyro_z / 100),
+                       utime.ticks_add(llegada, dt - ultimo_dt))
+                q += TAM_MUESTRA_GYRO
+        leidos = (leidos + 1) & 0xFFFF
+
+    ahora = utime.ticks_ms()
+    if TDMA and utime.ticks_diff(ahora, proximo_sync) >= 0:
+        slots = enviar_sync()
+        proximo_sync = utime.ticks_add(proximo_sync, tdma.duracion_superframe(SLOT_MS, slots))
+    transcurrido = utime.ticks_diff(ahora, ultimo_estado)
+    if transcurrido >= PERIODO_ESTADO_MS:
+        enviar_estado(transcurrido)
+        ultimo_estado = ahora
@@ -6,10 +6,15 @@ from nrf24l01 import NRF24L01
 from micropython import const
 from ssd1306 import SSD1306_I2C
 from mpu6050 import MPU6050
+from tdma import ClienteTdma, Transmisor
+from lotes import Lote, FORMATO_GYRO
 
 POWER = {"0 dBm": const(0x06), "-6 dBm": const(0x04), "-12 dBm": const(0x02), "-18 dBm": const(0x00)}
 DATA_RATE = {"250 kbps": const(0x20), "1 Mbps": const(0x00), "2 Mbps": const(0x08),}
+# ms entre lecturas del MPU6050. Los lotes rinden con lecturas más seguidas
+# que MAX_ESPERA_LOTE_MS (p. ej. 20 ms); con 1000 cada lote lleva una sola
 SAMPLE_INTERVAL = 1000
+IMPRIMIR_MUESTRAS = False
 
 i2c = I2C(0, scl=Pin(1), sda=Pin(0), freq=200000)
 mpu = MPU6050(i2c)
@@ -21,11 +26,24 @@ csn = Pin(cfg["csn"], mode=Pin.OUT, value=1)
 ce = Pin(cfg["ce"], mode=Pin.OUT, value=0)
 spi = cfg["spi"]
 
-nrf = NRF24L01(spi, csn, ce, channel = 100, payload_size=16)
+nrf = NRF24L01(spi, csn, ce, channel = 100, payload_size=32)
 nrf.set_power_speed(POWER["0 dBm"], DATA_RATE["2 Mbps"])
 
 nrf.open_tx_pipe(b'4Node')
 
+# TDMA (ver tdma.py): transmitir solo en el slot que asigna el concentrador
+TDMA = False
+NODO_ID = 4
+tdma = ClienteTdma(nrf, NODO_ID) if TDMA else None
+transmisor = Transmisor(nrf, tdma)
+
+# Las lecturas se envían en lotes de hasta 3 con su hora (ver lotes.py); el
+# lote sale al llenarse o cuando la primera lectura esperó MAX_ESPERA_LOTE_MS
+MAX_ESPERA_LOTE_MS = 60
+lote = Lote(FORMATO_GYRO, MAX_ESPERA_LOTE_MS)
+seq = 0
+pendiente = None
+
 last_sample_time = utime.ticks_ms()
 current_data = {'accel': {'x': 0, 'y': 0, 'z': 0}, 
                 'gyro': {'x': 0, 'y': 0, 'z': 0}}
@@ -35,17 +53,29 @@ def get_sensor_data():
         'accel': mpu.get_accel_data(),
         'gyro': mpu.get_gyro_data()
     }
+
+def centesimas(v):
+    """°/s -> entero de 16 bits en 1/100 °/s"""
+    return max(-32768, min(32767, round(v * 100)))
+
 while True:
     current_time = utime.ticks_ms()
-    # Tomar nueva muestra cada 2 segundos
+    # Tomar una muestra cada SAMPLE_INTERVAL y sumarla al lote
     if utime.ticks_diff(current_time, last_sample_time) >= SAMPLE_INTERVAL:
         current_data = get_sensor_data()
         last_sample_time = current_time
-        print("\n--- Nueva muestra tomada ---")
-        print(f"Aceleración: X={current_data['accel']['x']:.2f}, Y={current_data['accel']['y']:.2f}, Z={current_data['accel']['z']:.2f}")
-        print(f"Giroscopio: X={current_data['gyro']['x']:.2f}, Y={current_data['gyro']['y']:.2f}, Z={current_data['gyro']['z']:.2f}")
-    try:
-        nrf.stop_listening()
-        nrf.send(struct.pack("fff", round(current_data['gyro']['x'], 2), round(current_data['gyro']['y'], 2), round(current_data['gyro']['z'], 2)))
-    except OSError as e:
-        pass
+        if IMPRIMIR_MUESTRAS:
+            print("\n--- Nueva muestra tomada ---")
+            print(f"Aceleración: X={current_data['accel']['x']:.2f}, Y={current_data['accel']['y']:.2f}, Z={current_data['accel']['z']:.2f}")
+            print(f"Giroscopio: X={current_data['gyro']['x']:.2f}, Y={current_data['gyro']['y']:.2f}, Z={current_data['gyro']['z']:.2f}")
+        gyro = current_data['gyro']
+        lote.agregar(current_time, centesimas(gyro['x']), centesimas(gyro['y']), centesimas(gyro['z']))
+    # Un lote lleno reemplaza al pendiente para no desbordarse
+    if lote.listo(current_time) and (pendiente is None or lote.n == lote.capacidad):
+        pendiente = lote.cerrar(seq)
+
+    # Con TDMA sincronizado solo dentro del slot propio (ver tdma.py)
+    if transmisor.intentar(pendiente) is not None:
+        seq = (seq + 1) & 0xFFFF
+        pendiente = None
+    utime.sleep_ms(1)
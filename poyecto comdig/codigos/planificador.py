@@ -0,0 +1,51 @@
+import random
+import utime
+
+# Planificación de envíos de los beacons (nodo1.py..nodo3.py).
+# Copiar este archivo a la Pico de cada beacon.
+
+
+class PlanificadorTx:
+    """
+    Decide cuándo transmitir en lugar de enviar cada 10 ms.
+    periodo_ms: tasa base, cada cuánto se revisa si hay que enviar
+    max_intervalo_ms: latido, se envía aunque el valor no haya cambiado
+    jitter_ms: desvío aleatorio ±jitter_ms de cada turno para que los
+               beacons no transmitan siempre al mismo tiempo
+    suprimir: no reenviar un valor igual al último enviado
+    """
+
+    def __init__(self, periodo_ms=100, max_intervalo_ms=1000, jitter_ms=20, suprimir=True):
+        self.periodo_ms = periodo_ms
+        self.max_intervalo_ms = max_intervalo_ms
+        self.jitter_ms = min(jitter_ms, periodo_ms // 2)
+        self.suprimir = suprimir
+        ahora = utime.ticks_ms()
+        self._proximo = utime.ticks_add(ahora, self._desvio())
+        self._ultimo_envio = ahora
+        self._ultimo_valor = None
+        self.enviados = 0
+        self.suprimidos = 0
+
+    def _desvio(self):
+        if not self.jitter_ms:
+            return 0
+        return random.getrandbits(16) % (2 * self.jitter_ms + 1) - self.jitter_ms
+
+    def debe_enviar(self, valor, ahora):
+        """True si toca transmitir valor; registra el envío"""
+        if utime.ticks_diff(ahora, self._proximo) < 0:
+            return False
+        self._proximo = utime.ticks_add(ahora, self.periodo_ms + self._desvio())
+        if (self.suprimir and valor == self._ultimo_valor
+                and utime.ticks_diff(ahora, self._ultimo_envio) < self.max_intervalo_ms):
+            self.suprimidos += 1
+            return False
+        self._ultimo_valor = valor
+        self._ultimo_envio = ahora
+        self.enviados += 1
+        return True
+
+    def espera_ms(self, ahora):
+        """Milisegundos hasta el próximo turno"""
+        return max(utime.ticks_diff(self._proximo, ahora), 0)
@@ -0,0 +1,88 @@
+import network
+import random
+import utime
+
+# Reconexión WiFi sin bloquear el lazo principal (nodo1.py..nodo3.py).
+# Copiar este archivo a la Pico de cada beacon.
+#
+# wifi.connect() del Pico W vuelve enseguida y la conexión avanza sola;
+# aquí solo se decide cuándo volver a intentar y se revisa el resultado.
+CONECTADO = 0
+ESPERANDO = 1  # sin conexión, esperando el próximo intento
+CONECTANDO = 2  # wifi.connect() en curso
+
+# Estados de wifi.status() que terminan un intento sin conexión
+FALLAS = (network.STAT_WRONG_PASSWORD, network.STAT_NO_AP_FOUND, network.STAT_CONNECT_FAIL)
+
+
+class ReconexionWifi:
+    """
+    Máquina de estados de la conexión; revisar() se llama en cada vuelta del
+    lazo y nunca espera. Tras cada intento fallido la espera se duplica desde
+    espera_min_ms hasta espera_max_ms, con ±25 % aleatorio para que los
+    beacons no reintenten todos juntos después de un corte del AP.
+    timeout_ms: tiempo máximo de un intento antes de darlo por fallido
+    """
+
+    def __init__(self, wifi, ssid, password, espera_min_ms=500, espera_max_ms=16000, timeout_ms=10000):
+        self.wifi = wifi
+        self.ssid = ssid
+        self.password = password
+        self.espera_min_ms = espera_min_ms
+        self.espera_max_ms = espera_max_ms
+        self.timeout_ms = timeout_ms
+        ahora = utime.ticks_ms()
+        self.estado = CONECTADO if wifi.isconnected() else ESPERANDO
+        self.caidas = 0
+        self.intentos = 0  # intentos desde que se perdió la conexión
+        self._espera = espera_min_ms
+        self._desde = ahora  # inicio de la caída actual
+        self._proximo = ahora
+        self._inicio_intento = ahora
+
+    def _desvio(self, espera):
+        return random.getrandbits(16) % (espera // 2 + 1) - espera // 4
+
+    def _fallo(self, ahora):
+        self.wifi.disconnect()
+        self.estado = ESPERANDO
+        self._proximo = utime.ticks_add(ahora, self._espera + self._desvio(self._espera))
+        self._espera = min(self._espera * 2, self.espera_max_ms)
+
+    def conectado(self):
+        return self.estado == CONECTADO
+
+    def sin_conexion_ms(self, ahora):
+        """Tiempo desde que se perdió la conexión (0 si está conectado)"""
+        return 0 if self.estado == CONECTADO else utime.ticks_diff(ahora, self._desde)
+
+    def revisar(self, ahora):
+        """Avanza la máquina de estados; devuelve True si hay conexión"""
+        wifi = self.wifi
+        if self.estado == CONECTADO:
+            if wifi.isconnected():
+                return True
+            print("WiFi desconectado!")
+            self.estado = ESPERANDO
+            self.caidas += 1
+            self.intentos = 0
+            self._espera = self.espera_min_ms
+            self._desde = ahora
+            self._proximo = ahora
+        elif self.estado == CONECTANDO:
+            if wifi.isconnected():
+                print("WiFi conectado! IP:", wifi.ifconfig()[0])
+                self.estado = CONECTADO
+                return True
+            if wifi.status() in FALLAS or utime.ticks_diff(ahora, self._inicio_intento) >= self.timeout_ms:
+                self._fallo(ahora)
+            return False
+        if utime.ticks_diff(ahora, self._proximo) >= 0:
+            self.intentos += 1
+            self._inicio_intento = ahora
+            self.estado = CONECTANDO
+            try:
+                wifi.connect(self.ssid, self.password)
+            except OSError:
+                self._fallo(ahora)
+        return False
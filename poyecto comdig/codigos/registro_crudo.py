@@ -0,0 +1,115 @@
+"""
+Lectura del registro binario de muestras crudas de rssi/rssi.py
+(formato en rssi/registro.py). El archivo se mapea en memoria como arreglo
+estructurado de NumPy, sin parsear texto ni cargarlo entero en RAM.
+
+    cabecera (16 bytes): b"RSSI" | version (u8) | tamaño de registro (u8) | SAMPLE_MS (u16) | reservado
+    registros (8 bytes): t_ms (u32, ticks_ms de la Pico) | paso (u16) | rssi (i8) | medicion (u8)
+
+Uso:
+    python registro_crudo.py rssi_raw.bin
+    python registro_crudo.py rssi_raw.bin --json
+
+El resumen por medición se calcula con NumPy sobre cada tramo del memmap
+(los cuantiles son exactos; en la Pico, rssi.py los estima con P²).
+"""
+import argparse
+import json
+import os
+import numpy as np
+
+MAGICO = b"RSSI"
+VERSION = 1
+CABECERA = np.dtype([("magico", "S4"), ("version", "u1"), ("tam_registro", "u1"),
+                     ("periodo_ms", "<u2"), ("reservado", "V8")])
+REGISTRO = np.dtype([("t_ms", "<u4"), ("paso", "<u2"), ("rssi", "i1"), ("medicion", "u1")])
+CUANTILES = (0.1, 0.5, 0.9)
+PERIODO_TICKS = 1 << 30  # ticks_ms de la Pico vuelve a 0 en 2**30
+# Un paso hacia atrás de ticks_ms es la vuelta de 2**30 (y la medición sigue)
+# si, contado como vuelta, es menor que esto; si no, la Pico se reinició
+MAX_PASO_MS = 60000
+
+
+def abrir(ruta):
+    """
+    Devuelve (cabecera, registros); registros es un np.memmap de solo
+    lectura. Un registro incompleto al final (corte de energía) se ignora
+    """
+    cabecera = np.fromfile(ruta, dtype=CABECERA, count=1)
+    if len(cabecera) == 0 or cabecera[0]["magico"] != MAGICO:
+        raise ValueError(f"{ruta} no es un registro de rssi.py")
+    cabecera = cabecera[0]
+    if cabecera["version"] != VERSION or cabecera["tam_registro"] != REGISTRO.itemsize:
+        raise ValueError(f"Versión de registro no soportada: {cabecera['version']}")
+    n = (os.path.getsize(ruta) - CABECERA.itemsize) // REGISTRO.itemsize
+    if n == 0:
+        return cabecera, np.zeros(0, dtype=REGISTRO)
+    return cabecera, np.memmap(ruta, dtype=REGISTRO, mode="r", offset=CABECERA.itemsize, shape=(n,))
+
+
+def pasos_ms(t_ms):
+    """Diferencias de ticks_ms entre registros consecutivos, módulo 2**30"""
+    return np.diff(t_ms.astype(np.int64)) % PERIODO_TICKS
+
+
+def mediciones(registros):
+    """
+    Límites [inicio, fin) de cada medición: cambia el número de medición o
+    el paso, o ticks_ms vuelve atrás sin ser la vuelta de 2**30 (la Pico
+    se reinició)
+    """
+    if len(registros) == 0:
+        return []
+    t = registros["t_ms"].astype(np.int64)
+    reinicio = (np.diff(t) < 0) & (pasos_ms(t) > MAX_PASO_MS)
+    corte = ((np.diff(registros["medicion"]) != 0) | (np.diff(registros["paso"]) != 0) | reinicio)
+    limites = np.concatenate(([0], np.flatnonzero(corte) + 1, [len(registros)]))
+    return list(zip(limites[:-1], limites[1:]))
+
+
+def resumir(registros):
+    """Una fila por medición con las estadísticas de sus muestras"""
+    filas = []
+    for inicio, fin in mediciones(registros):
+        bloque = registros[inicio:fin]
+        rssi = bloque["rssi"]
+        descartada = bool(rssi[-1] == 0)
+        x = (rssi[:-1] if descartada else rssi).astype(np.float64)
+        n = len(x)
+        dt = pasos_ms(bloque["t_ms"])
+        q = np.quantile(x, CUANTILES) if n else [None] * len(CUANTILES)
+        filas.append({
+            "paso": int(bloque["paso"][0]),
+            "muestras": n,
+            "descartada": descartada,
+            "duracion_s": float(dt.sum()) / 1000,
+            "periodo_ms": float(dt.mean()) if len(dt) else 0.0,
+            "media": float(x.mean()) if n else 0.0,
+            "desviacion": float(x.std(ddof=1)) if n > 1 else 0.0,
+            **{f"p{round(p * 100)}": None if v is None else float(v) for p, v in zip(CUANTILES, q)},
+        })
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen del registro binario de rssi.py")
+    parser.add_argument("archivo")
+    parser.add_argument("--json", action="store_true", help="salida JSON en lugar de tabla")
+    args = parser.parse_args()
+
+    cabecera, registros = abrir(args.archivo)
+    filas = resumir(registros)
+    if args.json:
+        print(json.dumps(filas, indent=2))
+        return
+    print(f"{len(registros)} muestras, SAMPLE_MS = {cabecera['periodo_ms']} ms, {len(filas)} mediciones")
+    print(f"{'paso':>4} {'muestras':>8} {'dur (s)':>8} {'T (ms)':>7} {'media':>7} {'desv':>5}"
+          f" {'p10':>6} {'p50':>6} {'p90':>6}")
+    for f in filas:
+        print(f"{f['paso']:>4} {f['muestras']:>8} {f['duracion_s']:>8.1f} {f['periodo_ms']:>7.1f} "
+              f"{f['media']:>7.2f} {f['desviacion']:>5.2f} {f['p10'] or 0:>6.1f} {f['p50'] or 0:>6.1f} "
+              f"{f['p90'] or 0:>6.1f}" + ("  descartada" if f["descartada"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Simulación del canal nRF24L01 compartido: envíos sin coordinar (ALOHA,
+como nodo1..3.py cada 10 ms) contra el modo TDMA de tdma.py.
+
+Modelo: cada intento ocupa el canal el tiempo de aire del paquete más el
+ACK; dos intentos que se superponen se pierden los dos. Los reintentos son
+los automáticos del nRF (ARD fijo, hasta ARC reintentos). En ALOHA los
+nodos que no tienen pipe en el concentrador transmiten pero nadie los
+recibe. En TDMA cada nodo transmite solo en su slot, con la hora del sync
+desviada hasta 1 ms (resolución de ticks_ms y del lazo del nodo), y puede
+perder el sync con probabilidad --perdida-sync.
+
+Uso:
+    python simulacion_tdma.py --nodos 1,2,3,4,6,8,12 --duracion 20
+"""
+import argparse
+import heapq
+import json
+import numpy as np
+import tdma
+
+BITRATE = 2e6
+PAYLOAD = 32
+ARRANQUE_TX_US = 130  # asentamiento del PLL antes de cada paquete
+
+
+def tiempo_aire_ms(payload=PAYLOAD):
+    """Paquete + ACK: preámbulo, dirección de 5 bytes, control (9 bits), payload y CRC de 2 bytes"""
+    paquete = ((1 + 5 + payload + 2) * 8 + 9) / BITRATE * 1e6
+    ack = ((1 + 5 + 2) * 8 + 9) / BITRATE * 1e6
+    return (2 * ARRANQUE_TX_US + paquete + ack) / 1000
+
+
+def simular_canal(siguiente, nodos, aire, ard, arc, p_error, rng, sin_receptor=()):
+    """
+    siguiente(nodo, libre): hora (ms) del próximo paquete del nodo, que
+    quedó libre en `libre` (None al inicio), o None si no transmite más.
+    arc: reintentos por nodo (dict). Devuelve un dict por nodo con
+    paquetes, entregados e intentos, y el tiempo total de aire usado.
+    """
+    resultado = {n: {"paquetes": 0, "entregados": 0, "intentos": 0} for n in nodos}
+    eventos = []
+    for n in nodos:
+        t = siguiente(n, None)
+        if t is not None:
+            heapq.heappush(eventos, (t, n, 0))
+    en_vuelo = []  # [inicio, fin, nodo, intento, colision]
+    aire_total = 0.0
+
+    def finalizar(v):
+        _, fin, n, intento, colision = v
+        ok = not colision and n not in sin_receptor and rng.random() >= p_error
+        if ok or intento >= arc[n]:
+            resultado[n]["paquetes"] += 1
+            resultado[n]["entregados"] += ok
+            t = siguiente(n, fin)
+            if t is not None:
+                heapq.heappush(eventos, (max(t, fin), n, 0))
+        else:
+            heapq.heappush(eventos, (fin + ard[n], n, intento + 1))
+
+    while eventos or en_vuelo:
+        proximo = eventos[0][0] if eventos else float("inf")
+        if en_vuelo:
+            v = min(en_vuelo, key=lambda v: v[1])
+            if v[1] <= proximo:
+                en_vuelo.remove(v)
+                finalizar(v)
+                continue
+        t, n, intento = heapq.heappop(eventos)
+        v = [t, t + aire, n, intento, False]
+        for w in en_vuelo:
+            w[4] = v[4] = True
+        en_vuelo.append(v)
+        resultado[n]["intentos"] += 1
+        aire_total += aire
+    return resultado, aire_total
+
+
+def simular_aloha(n_nodos, duracion, periodo, p_error, rng, pipes=6, ard=1.75, arc=8):
+    """Cada nodo envía, espera `periodo` ms y vuelve a enviar (como nodo1.py)"""
+    nodos = list(range(1, n_nodos + 1))
+
+    def siguiente(n, libre):
+        t = rng.uniform(0, periodo) if libre is None else libre + periodo + rng.uniform(0, 0.5)
+        return t if t < duracion else None
+
+    return simular_canal(siguiente, nodos, tiempo_aire_ms(), {n: ard for n in nodos},
+                         {n: arc for n in nodos}, p_error, rng,
+                         sin_receptor=set(nodos[pipes:]))
+
+
+def simular_tdma(n_nodos, duracion, slot_ms, guarda_ms, p_error, p_sync, rng, ard=0.25, arc=2):
+    """Un paquete por nodo en su slot de cada superframe; el nodo 0 es el sync"""
+    nodos = list(range(1, n_nodos + 1))
+    slots = min(n_nodos, tdma.PIPES)
+    superframe = tdma.duracion_superframe(slot_ms, slots)
+    aire = tiempo_aire_ms()
+
+    # Horas de transmisión de cada nodo según las tablas de todos los superframes
+    turnos = {n: [] for n in nodos}
+    syncs = []
+    for k in range(int(duracion // superframe)):
+        inicio = k * superframe
+        syncs.append(inicio)
+        for j, n in enumerate(tdma.tabla_superframe(nodos, k)):
+            if rng.random() < p_sync:
+                continue
+            # El nodo ve el sync entre 0 y 1 ms tarde y transmite en el
+            # primer ms del slot (tras la guarda) en que revisa el reloj
+            visto = inicio + aire + rng.uniform(0, 1)
+            turnos[n].append(visto + slot_ms * (j + 1) + guarda_ms + rng.uniform(0, 1))
+    turnos[0] = syncs
+    pendientes = {n: iter(t) for n, t in turnos.items()}
+
+    def siguiente(n, libre):
+        for t in pendientes[n]:
+            if libre is None or t >= libre:
+                return t
+        return None
+
+    todos = [0] + nodos
+    resultado, aire_total = simular_canal(siguiente, todos, aire, {n: ard for n in todos},
+                                          {0: 0, **{n: arc for n in nodos}}, p_error, rng,
+                                          sin_receptor={0})
+    del resultado[0]
+    return resultado, aire_total
+
+
+def resumir(resultado, aire_total, duracion):
+    paquetes = sum(r["paquetes"] for r in resultado.values())
+    entregados = sum(r["entregados"] for r in resultado.values())
+    intentos = sum(r["intentos"] for r in resultado.values())
+    return {
+        "entrega": entregados / paquetes if paquetes else 0.0,
+        "utiles_s_nodo": entregados / len(resultado) / (duracion / 1000),
+        "intentos_paquete": intentos / paquetes if paquetes else 0.0,
+        # Aire de todos los intentos sobre el tiempo; pasa de 100 % si se superponen
+        "carga": aire_total / duracion,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ALOHA vs TDMA en un canal nRF24L01")
+    parser.add_argument("--nodos", default="1,2,3,4,5,6,8,10,12", help="cantidades de nodos a simular")
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos simulados")
+    parser.add_argument("--periodo", type=float, default=10.0, help="ms entre envíos en ALOHA")
+    parser.add_argument("--slot", type=int, default=4, help="ms por slot TDMA")
+    parser.add_argument("--guarda", type=int, default=1, help="ms de guarda dentro del slot")
+    parser.add_argument("--error", type=float, default=0.01, help="probabilidad de error por intento")
+    parser.add_argument("--perdida-sync", type=float, default=0.01)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="salida JSON en lugar de tabla")
+    args = parser.parse_args()
+
+    duracion = args.duracion * 1000
+    filas = []
+    for n in (int(v) for v in args.nodos.split(",")):
+        rng = np.random.default_rng(args.semilla)
+        aloha = resumir(*simular_aloha(n, duracion, args.periodo, args.error, rng), duracion)
+        rng = np.random.default_rng(args.semilla)
+        ranurado = resumir(*simular_tdma(n, duracion, args.slot, args.guarda, args.error,
+                                         args.perdida_sync, rng), duracion)
+        filas.append({"nodos": n, "aloha": aloha, "tdma": ranurado})
+
+    if args.json:
+        print(json.dumps(filas, indent=2))
+        return
+    print(f"{'nodos':>5} | {'entrega ALOHA':>13} {'TDMA':>6} | {'útiles/s/nodo ALOHA':>19} {'TDMA':>6} |"
+          f" {'intentos/paq ALOHA':>18} {'TDMA':>5} | {'carga ALOHA':>11} {'TDMA':>6}")
+    for f in filas:
+        a, t = f["aloha"], f["tdma"]
+        print(f"{f['nodos']:>5} | {a['entrega']:>13.1%} {t['entrega']:>6.1%} | "
+              f"{a['utiles_s_nodo']:>19.1f} {t['utiles_s_nodo']:>6.1f} | "
+              f"{a['intentos_paquete']:>18.2f} {t['intentos_paquete']:>5.2f} | "
+              f"{a['carga']:>11.1%} {t['carga']:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
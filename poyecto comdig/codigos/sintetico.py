@@ -0,0 +1,119 @@
+"""
+Generador de tráfico sintético del concentrador para pruebas sin hardware.
+
+Simula un nodo móvil que recorre el área de los beacons y produce las
+tramas binarias (trama.py) que enviaría nodoConcentrador.py: RSSI por
+beacon con modelo log-distancia, ruido gaussiano, pérdida de paquetes y
+llegadas desordenadas entre pipes, más el giroscopio por el pipe 4.
+
+Uso (genera una grabación reproducible con trilateracion.py --reproducir):
+    python sintetico.py sesion.bin --duracion 60 --tasa 50
+"""
+import argparse
+import struct
+import time
+import numpy as np
+from grabacion import CABECERA, MAGICO, REGISTRO, VERSION
+from trama import TIPO_GYRO, TIPO_RSSI, empaquetar_en, LARGO_CABECERA, LARGO_CRC, MAX_PAYLOAD
+from trilaterador import fspl_cte
+
+PIPE_GYRO = 4
+
+
+def trayectoria(beacons, t, velocidad=1.0):
+    """Recorrido tipo Lissajous dentro del rectángulo que cubren los beacons"""
+    p = np.array([[b["x"], b["y"]] for b in beacons], dtype=float)
+    centro = (p.min(axis=0) + p.max(axis=0)) / 2
+    semi = np.maximum((p.max(axis=0) - p.min(axis=0)) / 2 * 0.8, 0.5)
+    # Frecuencias elegidas para que la rapidez media sea del orden de velocidad (m/s)
+    w = velocidad / semi
+    x = centro[0] + semi[0] * np.sin(w[0] * t)
+    y = centro[1] + semi[1] * np.sin(w[1] * t * 0.7 + 0.5)
+    return np.column_stack([x, y])
+
+
+def generar(beacons, duracion=10.0, tasa=20.0, p0=None, n=2.0, ruido_db=2.0,
+            perdida=0.05, tasa_gyro=10.0, velocidad=1.0, jitter=0.3, semilla=0):
+    """
+    Devuelve (tramas, tiempos, verdad):
+      tramas: lista de bytes, una trama por muestra, ordenadas por llegada
+      tiempos: arreglo con la hora de llegada (s) de cada trama
+      verdad: dict con 't' y 'pos' (posición real del nodo móvil)
+
+    tasa: muestras RSSI por segundo y por beacon
+    jitter: desorden de llegada entre pipes, en fracciones del periodo
+    """
+    rng = np.random.default_rng(semilla)
+    if p0 is None:
+        p0 = fspl_cte()
+    nb = len(beacons)
+    p = np.array([[b["x"], b["y"]] for b in beacons], dtype=float)
+    pipes = [b.get("pipe", i + 1) for i, b in enumerate(beacons)]
+
+    # Muestras RSSI: una por beacon y periodo, con llegadas intercaladas
+    k = int(duracion * tasa)
+    t_base = np.arange(k) / tasa
+    t_rssi = t_base[:, None] + rng.uniform(0, jitter, (k, nb)) / tasa
+    pos = trayectoria(beacons, t_rssi.ravel(), velocidad).reshape(k, nb, 2)
+    d = np.maximum(np.linalg.norm(pos - p, axis=2), 0.1)
+    rssi = p0 - 10 * n * np.log10(d) + rng.normal(0, ruido_db, (k, nb))
+    recibido = rng.random((k, nb)) >= perdida
+
+    # Giroscopio: velocidad angular del rumbo (°/s) con ruido
+    kg = int(duracion * tasa_gyro)
+    t_gyro = np.arange(kg) / tasa_gyro
+    v = np.gradient(trayectoria(beacons, t_gyro, velocidad), axis=0)
+    rumbo = np.unwrap(np.arctan2(v[:, 1], v[:, 0]))
+    gz = np.degrees(np.gradient(rumbo)) * tasa_gyro
+    gyro = np.column_stack([rng.normal(0, 0.5, kg), rng.normal(0, 0.5, kg), gz])
+
+    eventos = []
+    fila, col = np.nonzero(recibido)
+    for f, c in zip(fila, col):
+        eventos.append((t_rssi[f, c], TIPO_RSSI, pipes[c], (float(rssi[f, c]),)))
+    for i in range(kg):
+        eventos.append((t_gyro[i], TIPO_GYRO, PIPE_GYRO, tuple(float(g) for g in gyro[i])))
+    eventos.sort(key=lambda e: e[0])
+
+    buf = bytearray(LARGO_CABECERA + MAX_PAYLOAD + LARGO_CRC)
+    secuencia = {}
+    tramas = []
+    for t, tipo, pipe, valores in eventos:
+        seq = secuencia.get(pipe, 0)
+        secuencia[pipe] = seq + 1
+        largo = empaquetar_en(buf, tipo, pipe, seq, int(t * 1000), valores)
+        tramas.append(bytes(buf[:largo]))
+    tiempos = np.array([e[0] for e in eventos])
+    return tramas, tiempos, {"t": t_base, "pos": trayectoria(beacons, t_base, velocidad)}
+
+
+def escribir_grabacion(ruta, tramas, tiempos):
+    """Guarda las tramas en el formato de grabacion.py (un registro por trama)"""
+    with open(ruta, "wb") as f:
+        f.write(struct.pack(CABECERA, MAGICO, VERSION, time.time()))
+        for trama, t in zip(tramas, tiempos):
+            f.write(struct.pack(REGISTRO, int(t * 1e6), len(trama)))
+            f.write(trama)
+
+
+def main():
+    from trilateracion import beacons
+
+    parser = argparse.ArgumentParser(description="Genera una grabación sintética del concentrador")
+    parser.add_argument("archivo")
+    parser.add_argument("--duracion", type=float, default=60.0, help="segundos")
+    parser.add_argument("--tasa", type=float, default=20.0, help="muestras RSSI/s por beacon")
+    parser.add_argument("--n", type=float, default=2.0, help="exponente de pérdida de trayectoria")
+    parser.add_argument("--ruido", type=float, default=2.0, help="desviación del RSSI (dB)")
+    parser.add_argument("--perdida", type=float, default=0.05, help="probabilidad de perder un paquete")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    tramas, tiempos, _ = generar(beacons, args.duracion, args.tasa, n=args.n, ruido_db=args.ruido,
+                                 perdida=args.perdida, semilla=args.semilla)
+    escribir_grabacion(args.archivo, tramas, tiempos)
+    print(f"{len(tramas)} tramas ({sum(map(len, tramas))} bytes) en {args.archivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import struct
+
+try:
+    from utime import ticks_add, ticks_diff, ticks_ms
+except ImportError:
+    pass  # En la PC (simulacion_tdma.py) solo se usan las funciones del superframe
+
+# Modo TDMA del enlace nRF24L01 (nodoConcentrador.py, nodo1..3.py, nodoMovil.py).
+# Copiar este archivo a la Pico de cada nodo.
+#
+# Superframe: slot 0 = sync del concentrador, slots 1..n = un nodo cada uno.
+# El slot j+1 usa el pipe j+1 del concentrador (dirección DIRECCIONES[j]).
+# Si hay más nodos que pipes, la tabla rota entre superframes y el
+# concentrador sabe qué nodo está detrás de cada pipe en cada superframe.
+PIPES = 5  # pipes de datos 1..5; el 0 queda para el ACK del sync
+DIRECCIONES = (b'1Node', b'2Node', b'3Node', b'4Node', b'5Node')
+DIRECCION_SYNC = b'SYNC0'
+
+# superframe, largo del slot (ms), guarda (ms), slots usados, nodo de cada slot (0 = libre)
+FORMATO_SYNC = "<HHBB" + "B" * PIPES
+
+SETUP_RETR = 0x04
+EN_RXADDR = 0x02
+STATUS = 0x07
+PIPE_SYNC = 1
+
+
+def tabla_superframe(nodos, superframe, pipes=PIPES):
+    """Nodo asignado a cada slot en el superframe dado"""
+    n = len(nodos)
+    if n <= pipes:
+        return list(nodos)
+    inicio = (superframe * pipes) % n
+    return [nodos[(inicio + j) % n] for j in range(pipes)]
+
+
+def duracion_superframe(slot_ms, slots):
+    return slot_ms * (slots + 1)
+
+
+def empaquetar_sync(buf, superframe, slot_ms, guarda_ms, tabla):
+    ids = list(tabla) + [0] * (PIPES - len(tabla))
+    struct.pack_into(FORMATO_SYNC, buf, 0, superframe & 0xFFFF, slot_ms, guarda_ms, len(tabla), *ids)
+
+
+def leer_sync(buf):
+    """Devuelve (superframe, slot_ms, guarda_ms, tabla)"""
+    valores = struct.unpack_from(FORMATO_SYNC, buf)
+    return valores[0], valores[1], valores[2], valores[4:4 + valores[3]]
+
+
+class ClienteTdma:
+    """
+    Lado del nodo: escucha el sync en el pipe 1 y dice cuándo transmitir.
+    revisar() debe llamarse seguido (cada ~1 ms): la hora de lectura del
+    sync es la referencia del slot. Si no llega un sync en sin_sync_ms el
+    nodo vuelve a transmitir cuando quiera por su dirección fija.
+    El pipe 0 solo se habilita mientras se transmite: open_tx_pipe() le
+    carga la dirección del slot y, escuchando, el nodo recibiría (y
+    confirmaría) los datos de otros nodos enviados a esa dirección.
+    """
+
+    def __init__(self, nrf, nodo, sin_sync_ms=1000):
+        self.nrf = nrf
+        self.nodo = nodo
+        self.sin_sync_ms = sin_sync_ms
+        self._pipe_fijo = (nodo - 1) % PIPES + 1
+        self._pipe = 0
+        self._direccion = 0  # pipe cuya dirección está cargada para transmitir
+        self._inicio = 0
+        self._fin = 0
+        self._ultimo_sync = None
+        self.enviado = True
+        self.superframe = -1
+        self.syncs = 0
+        # Reintentos cortos (ARD 250 µs, 2 reintentos) para no salirse del slot
+        nrf.reg_write(SETUP_RETR, 0x02)
+        nrf.open_rx_pipe(PIPE_SYNC, DIRECCION_SYNC)
+        self._pipe0(False)
+        nrf.start_listening()
+
+    def _pipe0(self, habilitado):
+        """ERX_P0: necesario para recibir el ACK al transmitir"""
+        v = self.nrf.reg_read(EN_RXADDR)
+        self.nrf.reg_write(EN_RXADDR, v | 0x01 if habilitado else v & ~0x01)
+
+    def revisar(self):
+        """Procesa los sync recibidos y calcula el slot propio"""
+        while self.nrf.any():
+            pipe = (self.nrf.reg_read(STATUS) >> 1) & 0x07
+            buf = self.nrf.recv()
+            if pipe != PIPE_SYNC:
+                continue  # no es un sync: descartar
+            # La hora se toma al leer, no al principio de la vuelta del lazo
+            # (antes de la pantalla o del WiFi, que bloquean varios ms)
+            ahora = ticks_ms()
+            superframe, slot_ms, guarda_ms, tabla = leer_sync(buf)
+            self.superframe = superframe
+            self._ultimo_sync = ahora
+            self.syncs += 1
+            self._pipe = 0
+            self.enviado = True
+            for j in range(len(tabla)):
+                if tabla[j] == self.nodo:
+                    self._pipe = j + 1
+                    self._inicio = ticks_add(ahora, slot_ms * (j + 1) + guarda_ms)
+                    self._fin = ticks_add(ahora, slot_ms * (j + 2) - guarda_ms)
+                    self.enviado = False
+
+    def sincronizado(self, ahora):
+        return self._ultimo_sync is not None and ticks_diff(ahora, self._ultimo_sync) < self.sin_sync_ms
+
+    def turno(self, ahora):
+        """True si ahora es el slot propio y todavía no se transmitió en él"""
+        if self.enviado or ticks_diff(ahora, self._inicio) < 0:
+            return False
+        if ticks_diff(ahora, self._fin) >= 0:
+            self.enviado = True  # se pasó el slot: esperar el próximo sync
+            return False
+        return True
+
+    def enviar(self, payload, ahora):
+        """Transmite en el slot (o por la dirección fija si no hay sync) y vuelve a escuchar"""
+        pipe = self._pipe if self._pipe and self.sincronizado(ahora) else self._pipe_fijo
+        self.nrf.stop_listening()
+        self._pipe0(True)
+        try:
+            if pipe != self._direccion:
+                self.nrf.open_tx_pipe(DIRECCIONES[pipe - 1])
+                self._direccion = pipe
+            self.nrf.send(payload)
+        finally:
+            self.enviado = True
+            self._pipe0(False)
+            self.nrf.start_listening()
+
+
+class Transmisor:
+    """
+    Envío del payload pendiente de un nodo (nodo1..3.py, nodoMovil.py):
+    directo por la dirección abierta o, con tdma (un ClienteTdma), solo en
+    el slot propio. intentar() se llama en cada vuelta del lazo, aunque no
+    haya nada pendiente, para no perder los sync.
+    """
+
+    def __init__(self, nrf, tdma=None):
+        self.nrf = nrf
+        self.tdma = tdma
+
+    def intentar(self, payload):
+        """
+        None si no se transmitió (nada pendiente o no es el turno); True si
+        se envió; False si no hubo ACK. En los dos últimos casos el payload
+        ya salió y su seq queda usado
+        """
+        tdma = self.tdma
+        if tdma is not None:
+            tdma.revisar()
+            # Hora tomada ahora y no al principio de la vuelta: lo que el
+            # nodo hizo antes (sensores, pantalla, WiFi) no corre el slot
+            ahora = ticks_ms()
+            if not (tdma.turno(ahora) or not tdma.sincronizado(ahora)):
+                return None
+        if payload is None:
+            return None
+        try:
+            if tdma is not None:
+                tdma.enviar(payload, ahora)
+            else:
+                self.nrf.stop_listening()
+                self.nrf.send(payload)
+        except OSError as e:
+            print("Error NRF:", e)
+            return False
+        return True
@@ -0,0 +1,92 @@
+import random
+import statistics
+import struct
+
+import pytest
+
+from agregador import Agregador, int32_en, BLOQUES, DESLIZANTE, EMA, MEDIA, MEDIANA
+
+REFERENCIA = {MEDIA: statistics.fmean, MEDIANA: statistics.median}
+
+
+def rssi_al_azar(n, semilla):
+    r = random.Random(semilla)
+    return [r.randint(-95, -30) for _ in range(n)]
+
+
+def correr(a, valores):
+    return [(k, a.resultado()) for k, v in enumerate(valores) if a.agregar(v)]
+
+
+@pytest.mark.parametrize("reductor", [MEDIA, MEDIANA])
+@pytest.mark.parametrize("ventana", [1, 2, 5, 8])
+def test_deslizante(reductor, ventana):
+    valores = rssi_al_azar(200, ventana)
+    resultados = correr(Agregador(ventana, DESLIZANTE, reductor), valores)
+    assert [k for k, _ in resultados] == list(range(ventana - 1, len(valores)))
+    for k, r in resultados:
+        assert r == pytest.approx(REFERENCIA[reductor](valores[k - ventana + 1:k + 1]))
+
+
+@pytest.mark.parametrize("reductor", [MEDIA, MEDIANA])
+@pytest.mark.parametrize("ventana", [1, 3, 4, 10])
+def test_bloques_sin_solape(reductor, ventana):
+    valores = rssi_al_azar(103, ventana + 100)
+    resultados = correr(Agregador(ventana, BLOQUES, reductor), valores)
+    assert len(resultados) == len(valores) // ventana
+    for b, (k, r) in enumerate(resultados):
+        assert k == (b + 1) * ventana - 1
+        assert r == pytest.approx(REFERENCIA[reductor](valores[b * ventana:(b + 1) * ventana]))
+
+
+def test_mediana_con_repetidos():
+    a = Agregador(4, DESLIZANTE, MEDIANA)
+    valores = [-50, -50, -50, -60, -50, -60, -60, -60, -40, -40]
+    for k, r in correr(a, valores):
+        assert r == statistics.median(valores[k - 3:k + 1])
+
+
+@pytest.mark.parametrize("alfa", [0.125, 0.25, 0.5])
+def test_ema_contra_punto_flotante(alfa):
+    valores = rssi_al_azar(500, int(alfa * 8))
+    resultados = correr(Agregador(5, DESLIZANTE, EMA, alfa), valores)
+    assert len(resultados) == len(valores)  # un resultado por muestra
+    ema = valores[0]
+    for k, r in resultados:
+        if k:
+            ema += alfa * (valores[k] - ema)
+        # Error de redondeo acotado a 1/256 dB por paso
+        assert r == pytest.approx(ema, abs=4 / 256)
+
+
+def test_ema_no_se_corre_hacia_abajo():
+    # Con un valor constante la EMA entera se acerca desde arriba y queda
+    # a menos de 1 / (2 alfa) unidades de 1/256 dB, no por debajo
+    a = Agregador(5, DESLIZANTE, EMA, 0.25)
+    a.agregar(-40)
+    for _ in range(100):
+        a.agregar(-71)
+    assert -71 <= a.resultado() <= -71 + 2 / 256
+
+
+def test_ema_en_bloques():
+    a = Agregador(3, BLOQUES, EMA, 0.5)
+    assert [a.agregar(v) for v in (-40, -60, -60, -60)] == [False, False, True, False]
+    assert a.resultado() == pytest.approx(-57.5)  # -40, -50, -55, -57.5
+
+
+def test_reiniciar():
+    a = Agregador(3, DESLIZANTE, MEDIA)
+    for v in (-10, -20, -30):
+        a.agregar(v)
+    a.reiniciar()
+    assert not a.agregar(-90)
+    assert not a.agregar(-90)
+    assert a.agregar(-60)
+    assert a.resultado() == -80
+
+
+@pytest.mark.parametrize("valor", [0, 1, -1, -42, 0x7FFFFFFF, -0x80000000, 123456789])
+def test_int32_en(valor):
+    buf = b"\x00" + struct.pack("<i", valor)
+    assert int32_en(buf, 1) == valor
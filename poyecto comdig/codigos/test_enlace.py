@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from enlace import EstadisticasEnlace, dif_ticks, PERIODO_TICKS
+
+
+@pytest.mark.parametrize("a, b, esperado", [
+    (10, 3, 7),
+    (3, 10, -7),
+    (5, PERIODO_TICKS - 5, 10),        # a dio la vuelta
+    (PERIODO_TICKS - 5, 5, -10),
+    (PERIODO_TICKS // 2 - 1, 0, PERIODO_TICKS // 2 - 1),
+    (PERIODO_TICKS // 2, 0, -PERIODO_TICKS // 2),
+])
+def test_dif_ticks(a, b, esperado):
+    assert dif_ticks(a, b) == esperado
+
+
+def test_cuenta_perdidos_y_duplicados():
+    e = EstadisticasEnlace()
+    for seq in (0, 1, 2, 2, 5, 6, 6, 6, 10):
+        e.registrar(1, seq, seq * 100, seq * 100)
+    assert e.recibidos[1] == 6
+    assert e.duplicados[1] == 3
+    assert e.perdidos[1] == 2 + 3
+    assert e.recibidos[0] == e.perdidos[0] == 0  # los demás pipes no cambian
+
+
+def test_vuelta_de_seq():
+    e = EstadisticasEnlace()
+    for seq in (0xFFFD, 0xFFFE, 0xFFFF, 0, 1, 3):
+        e.registrar(2, seq, 0, 0)
+    assert e.recibidos[2] == 6
+    assert e.perdidos[2] == 1
+    assert e.duplicados[2] == 0
+
+
+def test_paquete_atrasado_descuenta_la_perdida():
+    e = EstadisticasEnlace()
+    for seq in (0xFFFE, 1, 0xFFFF, 0):
+        e.registrar(3, seq, 0, 0)
+    assert e.recibidos[3] == 4
+    assert e.perdidos[3] == 0
+    # El atrasado no cambia la referencia: el siguiente sigue a 1
+    e.registrar(3, 2, 0, 0)
+    assert e.perdidos[3] == 0
+
+
+def test_jitter_rfc3550():
+    # Llegada = envío + demora; D = diferencia de demoras entre paquetes
+    r = random.Random(3)
+    e = EstadisticasEnlace()
+    jitter = 0.0
+    anterior = 0
+    for seq in range(400):
+        demora = r.randint(5, 40)
+        e.registrar(0, seq, seq * 100, seq * 100 + demora)
+        if seq:
+            jitter += (abs(demora - anterior) - jitter) / 16
+        anterior = demora
+        # Enteros en 1/16 ms: el redondeo acota el error a medio ms
+        assert e.jitter_ms(0) == pytest.approx(jitter, abs=0.5)
+
+
+def test_jitter_constante():
+    e = EstadisticasEnlace()
+    for seq in range(200):
+        e.registrar(0, seq, seq * 50, seq * 50 + (7 if seq & 1 else 0))
+    assert e.jitter_ms(0) == pytest.approx(7, abs=0.5)
+
+
+def test_jitter_con_vuelta_de_ticks():
+    # Mismo intervalo en los dos relojes aunque uno dé la vuelta: jitter 0
+    e = EstadisticasEnlace()
+    for seq in range(20):
+        tick = (PERIODO_TICKS - 500 + seq * 100) % PERIODO_TICKS
+        e.registrar(4, seq, tick, 1000 + seq * 100)
+    assert e.jitter_ms(4) == 0
+
+
+def test_edad():
+    e = EstadisticasEnlace()
+    e.registrar(5, 0, 0, PERIODO_TICKS - 100)
+    assert e.edad_ms(5, 50) == 150
@@ -0,0 +1,127 @@
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from estadistica import CuantilP2, Estadisticas, Histograma, Welford
+
+# Ejemplo de Jain y Chlamtac (1985), tabla I: mediana de 20 observaciones
+EJEMPLO_P2 = [0.02, 0.15, 0.74, 3.39, 0.83, 22.37, 10.15, 15.43, 38.62, 15.92,
+              34.60, 10.28, 1.47, 0.40, 0.05, 11.39, 0.27, 0.42, 0.09, 11.37]
+
+
+def rssi_al_azar(n, semilla):
+    r = random.Random(semilla)
+    return [round(r.gauss(-65, 6)) for _ in range(n)]
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 10, 1000])
+def test_welford_contra_statistics(n):
+    datos = [x + 0.25 for x in rssi_al_azar(n, n)]
+    w = Welford()
+    for x in datos:
+        w.agregar(x)
+    assert w.n == n
+    assert w.media == pytest.approx(statistics.fmean(datos))
+    assert w.varianza == pytest.approx(statistics.variance(datos) if n > 1 else 0.0)
+    assert w.desviacion == pytest.approx(statistics.stdev(datos) if n > 1 else 0.0)
+    assert (w.minimo, w.maximo) == (min(datos), max(datos))
+
+
+def test_welford_con_desplazamiento_grande():
+    # Sin cancelación: la varianza de 1e9 + x es la de x
+    datos = [1e9 + x for x in (4, 7, 13, 16)]
+    w = Welford()
+    for x in datos:
+        w.agregar(x)
+    assert w.varianza == pytest.approx(30.0)
+
+
+def test_welford_reiniciar():
+    w = Welford()
+    w.agregar(5)
+    w.reiniciar()
+    assert (w.n, w.media, w.varianza, w.minimo) == (0, 0.0, 0.0, None)
+
+
+def test_p2_ejemplo_del_articulo():
+    c = CuantilP2(0.5)
+    for x in EJEMPLO_P2:
+        c.agregar(x)
+    assert c._pos == [1, 6, 10, 16, 20]
+    assert c._q == pytest.approx([0.02, 0.49, 4.44, 17.20, 38.62], abs=0.005)
+    assert c.valor == pytest.approx(4.44, abs=0.005)
+
+
+@pytest.mark.parametrize("p", [0.05, 0.25, 0.5, 0.9, 0.99])
+@pytest.mark.parametrize("distribucion", ["normal", "uniforme", "exponencial"])
+def test_p2_contra_numpy(p, distribucion):
+    rng = np.random.default_rng(int(p * 100))
+    datos = {"normal": lambda: rng.normal(-65, 6, 20000),
+             "uniforme": lambda: rng.uniform(-90, -40, 20000),
+             "exponencial": lambda: rng.exponential(5, 20000)}[distribucion]()
+    c = CuantilP2(p)
+    for x in datos:
+        c.agregar(float(x))
+    # Error relativo al rango intercuartil
+    iqr = np.subtract(*np.quantile(datos, [0.75, 0.25]))
+    assert abs(c.valor - np.quantile(datos, p)) < 0.05 * iqr
+
+
+@pytest.mark.parametrize("p, esperado", [(0.0, 1), (0.5, 3), (0.75, 3), (0.9, 4), (1.0, 4)])
+def test_p2_exacto_con_pocas_muestras(p, esperado):
+    c = CuantilP2(p)
+    assert c.valor is None
+    for x in (4, 1, 3, 2):
+        c.agregar(x)
+    assert c.valor == esperado
+
+
+def test_histograma_clases_y_desbordes():
+    h = Histograma(-100, -30, 5)
+    assert h.clases == 14
+    for x in (-120, -100, -96, -95, -31, -30, 0):
+        h.agregar(x)
+    assert (h.n, h.debajo, h.encima) == (7, 1, 2)
+    assert h.conteos[0] == 2 and h.conteos[1] == 1 and h.conteos[13] == 1
+    assert h.limite(3) == -85
+
+
+def test_histograma_cuantil_interpolado():
+    h = Histograma(0, 10)
+    for x in range(10):
+        h.agregar(x)
+    # Cada valor entero ocupa su clase completa: cuantil lineal en [0, 10]
+    for p in (0.1, 0.35, 0.5, 0.9):
+        assert h.cuantil(p) == pytest.approx(10 * p)
+    assert h.cuantil(0) == 0
+    assert h.cuantil(1) == 10
+
+
+def test_histograma_cuantil_contra_numpy():
+    datos = rssi_al_azar(5000, 7)
+    h = Histograma(-100, -30)
+    for x in datos:
+        h.agregar(x)
+    for p in (0.1, 0.5, 0.9):
+        # Enteros: la clase [k, k+1) contiene al cuantil discreto k
+        assert h.cuantil(p) == pytest.approx(np.quantile(datos, p), abs=1)
+    h.reiniciar()
+    assert h.cuantil(0.5) is None and sum(h.conteos) == 0
+
+
+def test_estadisticas_combinadas():
+    datos = rssi_al_azar(3000, 11)
+    e = Estadisticas((0.1, 0.5, 0.9), Histograma(-100, -30))
+    for x in datos:
+        e.agregar(x)
+    assert e.media == pytest.approx(statistics.fmean(datos))
+    assert e.varianza == pytest.approx(statistics.variance(datos))
+    assert e.mediana == pytest.approx(statistics.median(datos), abs=1)
+    assert e.cuantil(0.9) == pytest.approx(np.quantile(datos, 0.9), abs=1)
+    assert e.histograma.n == len(datos)
+    with pytest.raises(ValueError):
+        e.cuantil(0.75)
+    e.reiniciar()
+    assert e.n == 0 and e.mediana is None and e.histograma.n == 0
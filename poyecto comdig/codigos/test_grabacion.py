@@ -0,0 +1,121 @@
+import struct
+import time
+
+import pytest
+
+from grabacion import (GrabadorSerial, ReproductorSerial, CABECERA, LARGO_CABECERA, MAGICO, REGISTRO,
+                       VERSION)
+
+
+class SerialFalso:
+    """Entrega los bloques de a uno, como si llegaran de a ráfagas"""
+
+    def __init__(self, bloques):
+        self.bloques = list(bloques)
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self.bloques[0]) if self.bloques else 0
+
+    def read(self, n=1):
+        if not self.bloques:
+            return b""
+        bloque = self.bloques[0]
+        if n < len(bloque):
+            self.bloques[0] = bloque[n:]
+        else:
+            self.bloques.pop(0)
+        return bloque[:n]
+
+    def close(self):
+        self.is_open = False
+
+
+def escribir(ruta, registros):
+    with open(ruta, "wb") as f:
+        f.write(struct.pack(CABECERA, MAGICO, VERSION, 1700000000.0))
+        for t_us, datos in registros:
+            f.write(struct.pack(REGISTRO, t_us, len(datos)) + datos)
+
+
+def leer_todo(rep, n=7):
+    datos = b""
+    while not rep.terminado:
+        datos += rep.read(n)
+    return datos
+
+
+def test_formato_del_archivo(tmp_path):
+    ruta = tmp_path / "g.bin"
+    ser = SerialFalso([b"\xaa\x55abc", b"", b"xy"])
+    g = GrabadorSerial(ser, ruta)
+    assert g.read(100) == b"\xaa\x55abc"
+    assert g.read(100) == b""  # lectura vacía: no se graba
+    assert g.read(1) == b"x"
+    g.close()
+    assert not ser.is_open and g.bytes_grabados == 6
+
+    crudo = ruta.read_bytes()
+    magico, version, inicio = struct.unpack_from(CABECERA, crudo, 0)
+    assert (magico, version) == (MAGICO, VERSION)
+    assert abs(inicio - time.time()) < 60
+    t1, n1 = struct.unpack_from(REGISTRO, crudo, LARGO_CABECERA)
+    assert n1 == 5
+    pos = LARGO_CABECERA + struct.calcsize(REGISTRO)
+    assert crudo[pos:pos + 5] == b"\xaa\x55abc"
+    t2, n2 = struct.unpack_from(REGISTRO, crudo, pos + 5)
+    assert n2 == 1 and t2 >= t1
+    assert len(crudo) == pos + 5 + struct.calcsize(REGISTRO) + 1
+
+
+def test_grabar_y_reproducir(tmp_path):
+    ruta = tmp_path / "g.bin"
+    bloques = [bytes(range(k, k + 1 + k % 17)) for k in range(50)]
+    g = GrabadorSerial(SerialFalso(bloques), ruta)
+    while g.read(g.in_waiting or 1):
+        pass
+    g.close()
+
+    rep = ReproductorSerial(ruta, velocidad=0)
+    assert abs(rep.inicio - time.time()) < 60
+    assert leer_todo(rep) == b"".join(bloques)
+    assert rep.read(10) == b""
+
+
+def test_sin_esperas_entrega_por_bloques(tmp_path):
+    ruta = tmp_path / "g.bin"
+    registros = [(k, bytes([k % 256]) * 1000) for k in range(200)]
+    escribir(ruta, registros)
+    rep = ReproductorSerial(ruta, velocidad=0)
+    assert (1 << 16) <= rep.in_waiting < (1 << 16) + 1000
+    assert leer_todo(rep, 4096) == b"".join(d for _, d in registros)
+
+
+def test_respeta_los_tiempos(tmp_path):
+    ruta = tmp_path / "g.bin"
+    escribir(ruta, [(0, b"uno"), (300_000, b"dos")])
+    rep = ReproductorSerial(ruta, velocidad=2, timeout=1)
+    t0 = time.perf_counter()
+    assert rep.read(10) == b"uno"
+    assert rep.in_waiting == 0
+    assert rep.read(10) == b"dos"
+    assert 0.14 <= time.perf_counter() - t0 < 0.5  # 300 ms a 2x
+
+
+def test_timeout_sin_datos(tmp_path):
+    ruta = tmp_path / "g.bin"
+    escribir(ruta, [(0, b"a"), (5_000_000, b"b")])
+    rep = ReproductorSerial(ruta, velocidad=1, timeout=0.05)
+    assert rep.read(1) == b"a"
+    t0 = time.perf_counter()
+    assert rep.read(1) == b""
+    assert time.perf_counter() - t0 < 0.5
+    assert not rep.terminado
+
+
+def test_archivo_invalido(tmp_path):
+    ruta = tmp_path / "g.bin"
+    ruta.write_bytes(struct.pack(CABECERA, b"OTRA!!", VERSION, 0.0))
+    with pytest.raises(ValueError):
+        ReproductorSerial(ruta)
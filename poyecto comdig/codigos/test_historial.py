@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from historial import Historial
+
+
+def llenar(h, desde, hasta):
+    for k in range(desde, hasta):
+        h.agregar(float(k), [-k, -k - 1, -k - 2, 99], [k, k, k], k / 2, -k / 2, (k, 0, -k),
+                  [[k, 1], [1, 2 * k]])
+
+
+def test_ventana_mayor_que_la_capacidad():
+    with pytest.raises(ValueError):
+        Historial(4, 5)
+
+
+def test_antes_de_llenarse():
+    h = Historial(10, 4)
+    llenar(h, 0, 3)
+    assert len(h) == 3
+    assert list(h.ultimos(4)['t']) == [0, 1, 2]
+    assert list(h.todo()['t']) == [0, 1, 2]
+
+
+def test_campos_de_una_fila():
+    h = Historial(4, 2)
+    llenar(h, 5, 6)
+    h.agregar(6.0, [-60, -61, -62], [1, 2, 3], 1.5, 2.5, (0.5, 0, 0))
+    a, b = h.ultimos(2)
+    assert list(a['rssi']) == [-5, -6, -7]  # el cuarto valor se ignora
+    assert (a['x'], a['y']) == (2.5, -2.5)
+    assert list(a['cov']) == [5, 1, 10]
+    assert list(b['dist']) == [1, 2, 3]
+    assert list(b['cov']) == [0, 0, 0]
+
+
+@pytest.mark.parametrize("total", range(7, 30))
+def test_vuelta_del_anillo(total):
+    capacidad, ventana = 7, 4
+    h = Historial(capacidad, ventana)
+    llenar(h, 0, total)
+    assert len(h) == capacidad
+    assert list(h.todo()['t']) == list(range(total - capacidad, total))
+    for w in range(1, ventana + 1):
+        assert list(h.ultimos(w)['t']) == list(range(total - w, total))
+    assert len(h.ultimos(ventana + 3)) == ventana
+
+
+@pytest.mark.parametrize("total", range(1, 20))
+def test_ultimos_es_una_vista(total):
+    h = Historial(6, 6)
+    llenar(h, 0, total)
+    v = h.ultimos(6)
+    assert np.shares_memory(v, h._datos)
+    assert v.flags['C_CONTIGUOUS']
+
+
+def test_todo_es_una_copia():
+    h = Historial(3, 2)
+    llenar(h, 0, 5)
+    t = h.todo()
+    t['t'] = -1
+    assert list(h.todo()['t']) == [2, 3, 4]
@@ -0,0 +1,84 @@
+import pytest
+
+import lector_serial
+from enlace import PERIODO_TICKS
+from lector_serial import LectorSerial
+from trama import ParserTramas, empaquetar, TIPO_RSSI
+
+
+class SerialFalso:
+    """Entrega los bloques de a uno y después se comporta como una grabación terminada"""
+
+    def __init__(self, bloques):
+        self.bloques = list(bloques)
+        self.terminado = False
+
+    @property
+    def in_waiting(self):
+        return len(self.bloques[0]) if self.bloques else 0
+
+    def read(self, n=1):
+        if not self.bloques:
+            self.terminado = True
+            return b""
+        return self.bloques.pop(0)
+
+
+class Reloj:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def muestra(t_ms):
+    return (1, TIPO_RSSI, 0, t_ms, (-50.0,))
+
+
+def test_lee_hasta_el_final_de_la_grabacion():
+    tramas = [empaquetar(TIPO_RSSI, 1, k, 10 * k, (-40.0 - k,)) for k in range(30)]
+    flujo = b"".join(tramas)
+    lector = LectorSerial(SerialFalso([flujo[i:i + 11] for i in range(0, len(flujo), 11)]), ParserTramas())
+    lector.start()
+    lector.join(2)
+    assert not lector.is_alive()
+    muestras = lector.consumir()
+    assert [m[2] for m in muestras] == list(range(30))
+    assert lector.metricas()["bytes"] == len(flujo)
+    assert lector.metricas()["recibidas"] == 30
+    assert lector.consumir() == []
+
+
+def test_cola_llena_cuenta_descartes():
+    flujo = b"".join(empaquetar(TIPO_RSSI, 1, k, 0, (-40.0,)) for k in range(10))
+    lector = LectorSerial(SerialFalso([flujo]), ParserTramas(), max_cola=4)
+    lector.run()
+    assert lector.muestras_descartadas == 6
+    assert [m[2] for m in lector.consumir()] == [6, 7, 8, 9]
+
+
+def test_sin_vuelta_es_continuo():
+    lector = LectorSerial(None, ParserTramas())
+    ticks = [PERIODO_TICKS - 300, PERIODO_TICKS - 100, 50, 40, 250]
+    assert [lector._sin_vuelta(t) for t in ticks] == [
+        PERIODO_TICKS - 300, PERIODO_TICKS - 100, PERIODO_TICKS + 50, PERIODO_TICKS + 40,
+        PERIODO_TICKS + 250]
+    assert lector._sin_vuelta(0) is None
+
+
+def test_retardo_extremo_no_salta_con_la_vuelta(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(lector_serial.time, "perf_counter", reloj)
+    lector = LectorSerial(None, ParserTramas())
+    t_ms = PERIODO_TICKS - 250
+    retardos = []
+    for k in range(6):
+        # Tránsito de 5 ms y 2 ms más hasta que se consume
+        lector.cola.append((reloj.t + 0.005, muestra(t_ms)))
+        reloj.t += 0.007
+        lector.consumir()
+        retardos.append(lector.retardo_extremo_ms)
+        reloj.t += 0.093  # 100 ms por vuelta, igual que t_ms
+        t_ms = (t_ms + 100) % PERIODO_TICKS
+    assert retardos == pytest.approx([2.0] * 6)
@@ -0,0 +1,129 @@
+import importlib.util
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+import registro_crudo
+from registro_crudo import abrir, mediciones, pasos_ms, resumir, MAX_PASO_MS, PERIODO_TICKS
+
+# Formato de rssi/registro.py, escrito aquí con struct para no depender de NumPy
+CABECERA = "<4sBBH8x"
+REGISTRO = "<IHbB"
+
+
+def escribir(ruta, registros, periodo_ms=100, sobrante=b""):
+    with open(ruta, "wb") as f:
+        f.write(struct.pack(CABECERA, b"RSSI", 1, struct.calcsize(REGISTRO), periodo_ms))
+        for r in registros:
+            f.write(struct.pack(REGISTRO, *r))
+        f.write(sobrante)
+    return ruta
+
+
+def test_abrir_mapea_los_registros(tmp_path):
+    ruta = escribir(tmp_path / "r.bin", [(1000, 1, -50, 0), (1100, 1, -52, 0)], 100, b"\x01\x02\x03")
+    cabecera, reg = abrir(ruta)
+    assert cabecera["periodo_ms"] == 100
+    assert isinstance(reg, np.memmap)
+    assert reg["t_ms"].tolist() == [1000, 1100]
+    assert reg["rssi"].tolist() == [-50, -52]  # el registro incompleto se ignora
+
+
+def test_abrir_vacio_e_invalido(tmp_path):
+    _, reg = abrir(escribir(tmp_path / "v.bin", []))
+    assert len(reg) == 0 and mediciones(reg) == [] and resumir(reg) == []
+    otro = tmp_path / "x.bin"
+    otro.write_bytes(b"NOPE" + bytes(12))
+    with pytest.raises(ValueError):
+        abrir(otro)
+    viejo = tmp_path / "w.bin"
+    viejo.write_bytes(struct.pack(CABECERA, b"RSSI", 2, 8, 100))
+    with pytest.raises(ValueError):
+        abrir(viejo)
+
+
+def test_pasos_con_vuelta_de_ticks():
+    t = np.array([PERIODO_TICKS - 150, PERIODO_TICKS - 50, 50, 150], dtype=np.uint32)
+    assert pasos_ms(t).tolist() == [100, 100, 100]
+
+
+def test_medicion_sigue_despues_de_la_vuelta(tmp_path):
+    t0 = PERIODO_TICKS - 250
+    reg = [((t0 + 100 * k) % PERIODO_TICKS, 3, -60 - k % 2, 7) for k in range(6)]
+    _, r = abrir(escribir(tmp_path / "r.bin", reg))
+    assert mediciones(r) == [(0, 6)]
+    (fila,) = resumir(r)
+    assert fila["duracion_s"] == pytest.approx(0.5)
+    assert fila["periodo_ms"] == pytest.approx(100)
+
+
+def test_cortes_por_medicion_paso_y_reinicio(tmp_path):
+    reg = ([(5000 + 100 * k, 1, -50, 0) for k in range(3)]
+           + [(5300 + 100 * k, 1, -55, 1) for k in range(2)]     # otra medición
+           + [(5500 + 100 * k, 2, -60, 1) for k in range(2)]     # otro paso
+           + [(40 + 100 * k, 2, -61, 1) for k in range(2)])      # la Pico se reinició
+    _, r = abrir(escribir(tmp_path / "r.bin", reg))
+    assert mediciones(r) == [(0, 3), (3, 5), (5, 7), (7, 9)]
+
+
+def test_salto_atras_corto_es_vuelta(tmp_path):
+    # Hacia atrás pero a menos de MAX_PASO_MS contado como vuelta: sigue;
+    # unos pocos ms hacia atrás son un reinicio
+    reg = [(PERIODO_TICKS - MAX_PASO_MS // 2, 1, -50, 0), (10, 1, -50, 0), (20, 1, -50, 0),
+           (5, 1, -50, 0)]
+    _, r = abrir(escribir(tmp_path / "r.bin", reg))
+    assert mediciones(r) == [(0, 3), (3, 4)]
+
+
+def test_resumen_contra_numpy(tmp_path):
+    rng = np.random.default_rng(1)
+    a = rng.integers(-80, -40, 200)
+    b = rng.integers(-90, -50, 50)
+    reg = ([(1000 + 50 * k, 4, int(x), 0) for k, x in enumerate(a)]
+           + [(20000 + 50 * k, 6, int(x), 1) for k, x in enumerate(b)] + [(22500, 6, 0, 1)])
+    _, r = abrir(escribir(tmp_path / "r.bin", reg, 50))
+    primera, segunda = resumir(r)
+    assert primera["paso"] == 4 and primera["muestras"] == 200 and not primera["descartada"]
+    assert primera["media"] == pytest.approx(a.mean())
+    assert primera["desviacion"] == pytest.approx(a.std(ddof=1))
+    assert [primera["p10"], primera["p50"], primera["p90"]] == pytest.approx(np.quantile(a, [0.1, 0.5, 0.9]))
+    assert primera["duracion_s"] == pytest.approx(199 * 0.05)
+    # RSSI 0 al final: medición descartada, ese registro no entra en las cuentas
+    assert segunda["descartada"] and segunda["muestras"] == 50
+    assert segunda["media"] == pytest.approx(b.mean())
+    assert segunda["p50"] == pytest.approx(np.median(b))
+    json.dumps([primera, segunda])  # tipos de Python, no de NumPy
+
+
+def test_lee_lo_que_escribe_la_pico(tmp_path):
+    ruta = os.path.join(os.path.dirname(__file__), "..", "..", "rssi", "registro.py")
+    spec = importlib.util.spec_from_file_location("registro_pico", ruta)
+    pico = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(pico)
+    archivo = str(tmp_path / "rssi_raw.bin")
+    reg = pico.RegistroCrudo(archivo, 250, tam_bloque=64)
+    for k in range(20):
+        reg.agregar(PERIODO_TICKS - 1000 + 250 * k, 0x10005, -70 + k, 0x102)
+    reg.cerrar()
+    # Reabrir agrega registros sin repetir la cabecera
+    reg = pico.RegistroCrudo(archivo, 250)
+    reg.agregar(123, 6, 0, 3)
+    reg.cerrar()
+
+    cabecera, r = abrir(archivo)
+    assert cabecera["periodo_ms"] == 250
+    assert len(r) == 21
+    assert r["paso"][0] == 5 and r["medicion"][0] == 2  # truncados a u16 / u8
+    assert mediciones(r) == [(0, 20), (20, 21)]
+    assert resumir(r)[0]["duracion_s"] == pytest.approx(19 * 0.25)
+
+
+def test_main_json(tmp_path, capsys, monkeypatch):
+    ruta = escribir(tmp_path / "r.bin", [(0, 1, -50, 0), (100, 1, -60, 0)])
+    monkeypatch.setattr("sys.argv", ["registro_crudo.py", str(ruta), "--json"])
+    registro_crudo.main()
+    (fila,) = json.loads(capsys.readouterr().out)
+    assert fila["media"] == -55 and fila["muestras"] == 2
@@ -0,0 +1,101 @@
+import struct
+
+import pytest
+
+from trama import (ParserAscii, ParserTramas, empaquetar, empaquetar_en, crc_hqx, LARGO_CABECERA,
+                   LARGO_CRC, MAX_PAYLOAD, TIPO_ENLACE, TIPO_ESTADO, TIPO_GYRO, TIPO_RSSI)
+
+
+def test_crc_ccitt_valor_conocido():
+    # CRC-16/CCITT-FALSE (inicial 0xFFFF) de "123456789"
+    assert crc_hqx(b"123456789", 0xFFFF) == 0x29B1
+
+
+def test_trama_rssi_byte_a_byte():
+    trama = empaquetar(TIPO_RSSI, 2, 0x1234, 0xDEADBEEF, (-42.5,))
+    assert trama[:2] == b"\xaa\x55"
+    assert trama[2:12] == bytes([1, TIPO_RSSI, 2, 4]) + b"\x34\x12" + b"\xef\xbe\xad\xde"
+    assert trama[12:16] == struct.pack("<f", -42.5)
+    assert struct.unpack("<H", trama[16:])[0] == crc_hqx(trama[2:16], 0xFFFF)
+    assert len(trama) == LARGO_CABECERA + 4 + LARGO_CRC
+
+
+def test_empaquetar_en_buffer_reusado():
+    buf = bytearray(LARGO_CABECERA + MAX_PAYLOAD + LARGO_CRC)
+    n = empaquetar_en(buf, TIPO_GYRO, 4, 7, 100, (1.0, 2.0, 3.0))
+    assert bytes(buf[:n]) == empaquetar(TIPO_GYRO, 4, 7, 100, (1.0, 2.0, 3.0))
+
+
+def test_ida_y_vuelta():
+    p = ParserTramas()
+    flujo = (empaquetar(TIPO_RSSI, 1, 1, 10, (-50.0,))
+             + empaquetar(TIPO_GYRO, 4, 2, 20, (0.5, -0.25, 8.0))
+             + empaquetar(TIPO_ESTADO, 0, 3, 30, (100, 2000, 3, 1, 12))
+             + empaquetar(TIPO_ENLACE, 2, 0xFFFF, 40, (10, 1, 0, 0.5, 7)))
+    muestras = p.feed(flujo)
+    assert muestras == [
+        (1, TIPO_RSSI, 1, 10, (-50.0,)),
+        (4, TIPO_GYRO, 2, 20, (0.5, -0.25, 8.0)),
+        (0, TIPO_ESTADO, 3, 30, (100, 2000, 3, 1, 12)),
+        (2, TIPO_ENLACE, 0xFFFF, 40, (10, 1, 0, 0.5, 7)),
+    ]
+    assert p.tramas_ok == 4
+    assert p.tramas_invalidas == 0
+    assert p.bytes_descartados == 0
+
+
+@pytest.mark.parametrize("tam", [1, 2, 3, 5, 7, 13])
+def test_tramas_partidas_entre_lecturas(tam):
+    flujo = b"".join(empaquetar(TIPO_RSSI, k % 3 + 1, k, k * 10, (-40.0 - k,)) for k in range(20))
+    p = ParserTramas()
+    muestras = []
+    for i in range(0, len(flujo), tam):
+        muestras += p.feed(flujo[i:i + tam])
+    assert [m[2] for m in muestras] == list(range(20))
+    assert [m[4][0] for m in muestras] == [-40.0 - k for k in range(20)]
+    assert p.bytes_descartados == 0
+
+
+def test_resincroniza_despues_de_basura():
+    basura = b"\x00\xaa\x13\xaa\x55\x09hola\xaa"
+    p = ParserTramas()
+    muestras = p.feed(basura + empaquetar(TIPO_RSSI, 3, 5, 50, (-61.0,)) + b"\xff\xfe"
+                      + empaquetar(TIPO_RSSI, 1, 6, 60, (-62.0,)))
+    assert [(m[0], m[2], m[4]) for m in muestras] == [(3, 5, (-61.0,)), (1, 6, (-62.0,))]
+    assert p.tramas_invalidas >= 1  # "AA 55 09" es una cabecera con versión inválida
+
+
+def test_crc_invalido_se_descarta():
+    mala = bytearray(empaquetar(TIPO_RSSI, 1, 1, 10, (-50.0,)))
+    mala[12] ^= 0x01  # un bit del payload
+    buena = empaquetar(TIPO_RSSI, 2, 2, 20, (-51.0,))
+    p = ParserTramas()
+    muestras = p.feed(bytes(mala) + buena)
+    assert muestras == [(2, TIPO_RSSI, 2, 20, (-51.0,))]
+    assert p.tramas_invalidas == 1
+
+
+def test_largo_que_no_coincide_con_el_tipo():
+    mala = bytearray(empaquetar(TIPO_RSSI, 1, 1, 10, (-50.0,)))
+    mala[5] = 12  # largo de un giroscopio en una trama RSSI
+    p = ParserTramas()
+    assert p.feed(bytes(mala)) == []
+    assert p.tramas_invalidas == 1
+
+
+def test_aa_suelto_al_final_se_conserva():
+    trama = empaquetar(TIPO_RSSI, 1, 9, 90, (-70.0,))
+    p = ParserTramas()
+    assert p.feed(b"xyz" + trama[:1]) == []
+    assert p.feed(trama[1:]) == [(1, TIPO_RSSI, 9, 90, (-70.0,))]
+    assert p.bytes_descartados == 3
+
+
+def test_parser_ascii():
+    p = ParserAscii()
+    assert p.feed(b"1-45.5\n4 1.0 2.0 -3.5\n# comentario\n2-6") == [
+        (1, TIPO_RSSI, 0, 0, (-45.5,)),
+        (4, TIPO_GYRO, 0, 0, (1.0, 2.0, -3.5)),
+    ]
+    assert p.feed(b"0.25\nzzz\n") == [(2, TIPO_RSSI, 0, 0, (-60.25,))]
+    assert p.tramas_invalidas == 1
@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+import pytest
+
+from trilaterador import (Multilaterator, TablaDistancias, Trilaterator, fspl_cte, RSSI_MAX, RSSI_MIN)
+
+BEACONS = [{"pipe": 1, "x": 0.0, "y": 0.0}, {"pipe": 2, "x": 10.0, "y": 0.0},
+           {"pipe": 3, "x": 0.0, "y": 8.0}]
+PERIMETRO = BEACONS + [{"pipe": 4, "x": 10.0, "y": 8.0}, {"pipe": 5, "x": 5.0, "y": -3.0}]
+
+
+def rssi_fspl(beacons, x, y, freq_mhz=2400):
+    """RSSI exacto del modelo FSPL en (x, y)"""
+    cte = fspl_cte(freq_mhz)
+    return [cte - 20 * math.log10(math.hypot(b["x"] - x, b["y"] - y)) for b in beacons]
+
+
+def test_fspl_cte():
+    assert fspl_cte(2400) == pytest.approx(-6 + 27.56 - 20 * math.log10(2400))
+    assert fspl_cte(2400, tx_power=4) == pytest.approx(fspl_cte(2400) + 4)
+
+
+def test_trilateracion_exacta():
+    t = Trilaterator(BEACONS)
+    puntos = [(3.0, 2.0), (7.5, 6.0), (1.0, 1.0)]
+    posiciones, distancias = t.resolver([rssi_fspl(BEACONS, x, y) for x, y in puntos])
+    np.testing.assert_allclose(posiciones, puntos, atol=1e-9)
+    np.testing.assert_allclose(distancias[0], [math.hypot(3, 2), math.hypot(7, 2), math.hypot(3, 6)])
+
+
+def test_trilaterator_usa_los_tres_primeros():
+    t = Trilaterator(PERIMETRO)
+    posiciones, distancias = t.resolver([rssi_fspl(PERIMETRO, 4.0, 4.0)])
+    assert distancias.shape == (1, 3)
+    np.testing.assert_allclose(posiciones[0], (4.0, 4.0), atol=1e-9)
+
+
+def test_multilateracion_con_cinco_beacons():
+    m = Multilaterator(PERIMETRO)
+    posiciones, distancias = m.resolver([rssi_fspl(PERIMETRO, 6.0, 3.0), rssi_fspl(PERIMETRO, 2.0, 7.0)])
+    assert distancias.shape == (2, 5)
+    np.testing.assert_allclose(posiciones, [(6.0, 3.0), (2.0, 7.0)], atol=1e-9)
+
+
+def test_pesos_por_varianza():
+    # Un beacon con 6 dB de error: con su varianza alta pesa menos
+    rssi = np.array(rssi_fspl(PERIMETRO, 6.0, 3.0))
+    rssi[4] -= 6
+    m = Multilaterator(PERIMETRO)
+    error_igual = np.linalg.norm(m.resolver(rssi)[0][0] - (6.0, 3.0))
+    varianzas = [1, 1, 1, 1, 100]
+    por_muestra = m.resolver(np.array([rssi, rssi]), np.array([varianzas, varianzas]))[0]
+    fijas = m.resolver(rssi, varianzas)[0]
+    en_constructor = Multilaterator(PERIMETRO, varianzas=varianzas).resolver(rssi)[0]
+    np.testing.assert_allclose(por_muestra, np.vstack([fijas, fijas]))
+    np.testing.assert_allclose(fijas, en_constructor)
+    assert np.linalg.norm(fijas[0] - (6.0, 3.0)) < error_igual / 2
+
+
+def test_geometria_invalida():
+    with pytest.raises(ValueError):
+        Multilaterator(BEACONS[:2])
+    colineales = [{"x": 0.0, "y": 0.0}, {"x": 1.0, "y": 1.0}, {"x": 2.0, "y": 2.0}]
+    with pytest.raises(np.linalg.LinAlgError):
+        Multilaterator(colineales)
+
+
+def test_tabla_en_dbm_enteros():
+    p0 = [-40.0, -45.0]
+    n = [2.0, 3.0]
+    tabla = TablaDistancias(p0, n)
+    rssi = np.array([[-60, -75], [-40, -45]])
+    esperado = 10 ** ((np.array(p0) - rssi) / (10 * np.array(n)))
+    np.testing.assert_allclose(tabla(rssi), esperado)
+
+
+def test_tabla_interpola_y_recorta():
+    tabla = TablaDistancias([-40.0], [2.0])
+    d60, d61 = tabla([[-60]])[0, 0], tabla([[-61]])[0, 0]
+    assert tabla([[-60.5]])[0, 0] == pytest.approx((d60 + d61) / 2)
+    assert tabla([[RSSI_MAX + 20]])[0, 0] == pytest.approx(tabla([[RSSI_MAX]])[0, 0])
+    assert tabla([[RSSI_MIN - 20]])[0, 0] == pytest.approx(tabla([[RSSI_MIN]])[0, 0])
+
+
+def test_tabla_desde_calibracion():
+    calibracion = {2: {"p0": -38.0, "n": 2.5}}
+    tabla = TablaDistancias.desde_calibracion(calibracion, BEACONS)
+    np.testing.assert_allclose(tabla.p0, [fspl_cte(), -38.0, fspl_cte()])
+    np.testing.assert_allclose(tabla.n, [2.0, 2.5, 2.0])
+
+
+def test_modelo_calibrado_en_el_localizador():
+    # Con la tabla FSPL (n = 2) y RSSI entero el resultado es el del modelo directo
+    tabla = TablaDistancias.desde_calibracion({}, BEACONS)
+    rssi = np.round(rssi_fspl(BEACONS, 3.0, 2.0))
+    con_tabla = Trilaterator(BEACONS, modelo=tabla).resolver(rssi)[0]
+    directo = Trilaterator(BEACONS).resolver(rssi)[0]
+    np.testing.assert_allclose(con_tabla, directo)
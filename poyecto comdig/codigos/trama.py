@@ -0,0 +1,181 @@
+import struct
+
+try:
+    from binascii import crc_hqx
+except ImportError:
+    # MicroPython no trae crc_hqx: CRC-16/CCITT (poly 0x1021) por tabla
+    _TABLA_CRC = []
+    for _i in range(256):
+        _c = _i << 8
+        for _ in range(8):
+            _c = ((_c << 1) ^ 0x1021) if _c & 0x8000 else (_c << 1)
+        _TABLA_CRC.append(_c & 0xFFFF)
+
+    def crc_hqx(datos, crc):
+        for b in datos:
+            crc = ((crc << 8) & 0xFFFF) ^ _TABLA_CRC[(crc >> 8) ^ b]
+        return crc
+
+# Formato de trama binaria entre nodoConcentrador.py y trilateracion.py
+# (todo little-endian):
+#
+#   AA 55 | version | tipo | pipe | largo | seq (u16) | t_ms (u32) | payload | CRC16
+#
+# El CRC (CRC-16/CCITT, inicial 0xFFFF) cubre desde version hasta el final
+# del payload. largo es el tamaño del payload en bytes.
+SYNC = b"\xaa\x55"
+VERSION = 1
+CABECERA = "<BBBBHI"
+LARGO_SYNC = 2
+LARGO_CABECERA = LARGO_SYNC + struct.calcsize(CABECERA)
+LARGO_CRC = 2
+MAX_PAYLOAD = 32
+
+# Tipos de payload
+TIPO_RSSI = 1  # promedio RSSI de un beacon (dBm)
+TIPO_GYRO = 2  # giroscopio del nodo movil (°/s)
+TIPO_ESTADO = 3  # métricas del concentrador (pipe 0), ver nodoConcentrador.py
+TIPO_ENLACE = 4  # estadísticas del enlace de radio de un beacon, ver enlace.py
+TIPO_RESUMEN = 5  # resumen de K lecturas RSSI calculado en el beacon
+TIPO_SIN_WIFI = 6  # el beacon perdió el WiFi y no tiene RSSI
+
+FORMATOS = {
+    TIPO_RSSI: "<f",
+    TIPO_GYRO: "<fff",
+    # paquetes/s, recibidos, descartados por cola llena, RX FIFO llena, cola máxima
+    TIPO_ESTADO: "<HIIIH",
+    # por beacon: recibidos, perdidos, duplicados, jitter (ms), ms desde el último paquete
+    TIPO_ENLACE: "<IIIfI",
+    # media (dBm), varianza (dBm²), mínimo, máximo, lecturas
+    TIPO_RESUMEN: "<ffbbH",
+    # ms sin WiFi, intentos de reconexión
+    TIPO_SIN_WIFI: "<IB",
+}
+
+
+def empaquetar_en(buf, tipo, pipe, seq, t_ms, valores):
+    """
+    Escribe una trama completa en buf (bytearray preasignado)
+    y devuelve su largo en bytes
+    """
+    fmt = FORMATOS[tipo]
+    largo = struct.calcsize(fmt)
+    buf[0] = 0xAA
+    buf[1] = 0x55
+    struct.pack_into(CABECERA, buf, LARGO_SYNC, VERSION, tipo, pipe, largo,
+                     seq & 0xFFFF, t_ms & 0xFFFFFFFF)
+    struct.pack_into(fmt, buf, LARGO_CABECERA, *valores)
+    fin = LARGO_CABECERA + largo
+    crc = crc_hqx(memoryview(buf)[LARGO_SYNC:fin], 0xFFFF)
+    struct.pack_into("<H", buf, fin, crc)
+    return fin + LARGO_CRC
+
+
+def empaquetar(tipo, pipe, seq, t_ms, valores):
+    """Devuelve la trama como bytes"""
+    buf = bytearray(LARGO_CABECERA + MAX_PAYLOAD + LARGO_CRC)
+    n = empaquetar_en(buf, tipo, pipe, seq, t_ms, valores)
+    return bytes(buf[:n])
+
+
+class ParserTramas:
+    """
+    Decodifica tramas binarias desde un flujo de bytes arbitrario.
+    feed() acepta cualquier trozo recibido del puerto (no necesita líneas
+    completas) y devuelve las muestras válidas como tuplas
+    (pipe, tipo, seq, t_ms, valores). Las tramas con CRC o cabecera
+    inválidos se descartan y se cuentan.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.tramas_ok = 0
+        self.tramas_invalidas = 0
+        self.bytes_descartados = 0
+
+    def feed(self, datos):
+        self._buf += datos
+        buf = self._buf
+        n = len(buf)
+        muestras = []
+        i = 0
+        mv = memoryview(buf)
+        try:
+            while True:
+                j = buf.find(SYNC, i)
+                if j < 0:
+                    # Conservar un posible 0xAA suelto al final del buffer
+                    resto = 1 if n and buf[n - 1] == 0xAA else 0
+                    self.bytes_descartados += n - i - resto
+                    i = n - resto
+                    break
+                self.bytes_descartados += j - i
+                i = j
+                if n - j < LARGO_CABECERA + LARGO_CRC:
+                    break
+                version, tipo, pipe, largo, seq, t_ms = struct.unpack_from(
+                    CABECERA, mv, j + LARGO_SYNC)
+                fmt = FORMATOS.get(tipo)
+                if (version != VERSION or largo > MAX_PAYLOAD or fmt is None
+                        or struct.calcsize(fmt) != largo):
+                    self.tramas_invalidas += 1
+                    self.bytes_descartados += 1
+                    i = j + 1
+                    continue
+                fin = j + LARGO_CABECERA + largo
+                if fin + LARGO_CRC > n:
+                    break
+                crc, = struct.unpack_from("<H", mv, fin)
+                if crc_hqx(mv[j + LARGO_SYNC:fin], 0xFFFF) != crc:
+                    self.tramas_invalidas += 1
+                    self.bytes_descartados += 1
+                    i = j + 1
+                    continue
+                valores = struct.unpack_from(fmt, mv, j + LARGO_CABECERA)
+                muestras.append((pipe, tipo, seq, t_ms, valores))
+                self.tramas_ok += 1
+                i = fin + LARGO_CRC
+        finally:
+            mv.release()
+        del buf[:i]
+        return muestras
+
+
+class ParserAscii:
+    """
+    Decodifica el formato de texto anterior ("1-45.2", "4 x y z")
+    con la misma interfaz que ParserTramas
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.tramas_ok = 0
+        self.tramas_invalidas = 0
+        self.bytes_descartados = 0
+
+    def feed(self, datos):
+        self._buf += datos
+        muestras = []
+        fin = self._buf.rfind(b"\n")
+        if fin < 0:
+            return muestras
+        lineas = self._buf[:fin].decode("utf-8", "ignore").split("\n")
+        del self._buf[:fin + 1]
+        for linea in lineas:
+            linea = linea.strip()
+            if not linea or linea[0] == "#":
+                continue
+            try:
+                if linea[0] == "4":
+                    partes = linea.split()
+                    valores = (float(partes[1]), float(partes[2]), float(partes[3]))
+                    muestras.append((4, TIPO_GYRO, 0, 0, valores))
+                elif linea[0] in "123":
+                    muestras.append((int(linea[0]), TIPO_RSSI, 0, 0, (float(linea[1:]),)))
+                else:
+                    raise ValueError(linea)
+                self.tramas_ok += 1
+            except (ValueError, IndexError):
+                self.tramas_invalidas += 1
+                self.bytes_descartados += len(linea)
+        return muestras
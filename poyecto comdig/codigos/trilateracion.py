@@ -1,257 +1,370 @@
-import serial
 import time
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from collections import deque
+T_ARRANQUE = time.perf_counter()
+import argparse
+import json
 import math
+import os
+import sys
+import serial
+import numpy as np
+from grabacion import GrabadorSerial, ReproductorSerial
+from historial import Historial
+from enlace import dif_ticks
+from lector_serial import LectorSerial
+from filtro_particulas import FiltroParticulas
+from trilaterador import Trilaterator, Multilaterator, TablaDistancias, cargar_calibracion, fspl_cte, VARIANZA_MIN
+from trama import ParserTramas, ParserAscii, TIPO_RSSI, TIPO_GYRO, TIPO_ESTADO, TIPO_ENLACE, TIPO_RESUMEN, TIPO_SIN_WIFI
 
 # Configuración de visualización
 WINDOW_SIZE = 20  # Muestra últimos 60 puntos (~6 segundos con interval=100)
-MAX_HISTORY = 50  # Máximo de puntos en memoria
+MAX_HISTORY = 100000  # Máximo de puntos en memoria (64 bytes por punto)
+INTERVALO_MS = 33  # Periodo de refresco de la gráfica (~30 fps)
+BLIT = True  # Redibujar solo las líneas; False para backends sin soporte de blit
 
 # Configuración del puerto serial
 port = 'COM8'
-baudrate = 9600
+baudrate = 921600
+FORMATO = 'binario'  # 'binario' (tramas de trama.py) o 'ascii' (formato anterior)
+
+# Sin --headless se abre la gráfica; con --headless no se importa matplotlib y
+# las posiciones se escriben como NDJSON o CSV
+argumentos = argparse.ArgumentParser(description="Localización por RSSI del nodo móvil")
+argumentos.add_argument("--headless", action="store_true", help="sin gráfica, escribe las posiciones en --salida")
+argumentos.add_argument("--salida", default="-", help="archivo de salida del modo headless ('-' = stdout)")
+argumentos.add_argument("--formato-salida", choices=["ndjson", "csv"], default="ndjson")
+argumentos.add_argument("--puerto", default=port)
+argumentos.add_argument("--baudrate", type=int, default=baudrate)
+argumentos.add_argument("--grabar", metavar="ARCHIVO", help="guarda los bytes recibidos con su hora de llegada")
+argumentos.add_argument("--reproducir", metavar="ARCHIVO", help="lee una grabación en lugar del puerto serial")
+argumentos.add_argument("--velocidad", type=float, default=1.0,
+                        help="velocidad de reproducción: 1 = tiempo real, N = N veces, 0 = sin esperas")
+# En modo headless stdout puede ser la salida de datos: los mensajes van a stderr
+consola = sys.stdout
+
+parser = ParserTramas() if FORMATO == 'binario' else ParserAscii()
 
-# Variables globales para almacenar los valores RSSI
-node1 = 0
-node2 = 0
-node3 = 0
-gyro_x = 0
-gyro_y = 0
-gyro_z = 0
+# Localización: 'trilateracion' (3 primeros beacons),
+# 'multilateracion' (todos los beacons, mínimos cuadrados ponderados) o
+# 'filtro' (filtro de partículas con RSSI + giroscopio, ver filtro_particulas.py)
+MODO_LOCALIZACION = 'trilateracion'
+N_PARTICULAS = 2000  # Con el filtro el concentrador puede usar interval=1
 
-# Posiciones de los 3 nodos fijos (beacons) en metros - Triángulo equilátero recomendado
+# Última lectura del giroscopio (X, Y, Z)
+gyro_actual = np.zeros(3)
+
+# Últimas métricas enviadas por el concentrador (TIPO_ESTADO) y
+# estadísticas del enlace de cada beacon (TIPO_ENLACE, por pipe)
+estado_concentrador = {}
+enlace = {}
+# Beacons sin WiFi (TIPO_SIN_WIFI): pipe -> (ms sin conexión, intentos).
+# Su último RSSI queda viejo hasta que vuelvan a enviar
+sin_wifi = {}
+
+# Posiciones de los nodos fijos (beacons) en metros - Triángulo equilátero recomendado
+# pipe: pipe del concentrador por el que llega su RSSI
+# var: varianza del RSSI en dBm² (opcional, peso en multilateración)
 beacons = [
-    {"x": 0, "y": 0, "name": "Nodo 1"},
-    {"x": 50, "y": 0, "name": "Nodo 2"},
-    {"x": 25, "y": 4, "name": "Nodo 3"}  # Altura triángulo equilátero: √3/2 * lado
+    {"x": 0, "y": 0, "name": "Nodo 1", "pipe": 1},
+    {"x": 50, "y": 0, "name": "Nodo 2", "pipe": 2},
+    {"x": 25, "y": 4, "name": "Nodo 3", "pipe": 3}  # Altura triángulo equilátero: √3/2 * lado
 ]
 
 freq_mhz = 2400
-# Historial de datos
-time_history = deque(maxlen=MAX_HISTORY)
-rssi_history = [deque(maxlen=MAX_HISTORY) for _ in range(3)]
-distance_history = [deque(maxlen=MAX_HISTORY) for _ in range(3)]
-position_history = {'x': deque(maxlen=MAX_HISTORY), 'y': deque(maxlen=MAX_HISTORY)}
-gyro_history = [deque(maxlen=MAX_HISTORY) for _ in range(3)]
-
-# Configuración de la gráfica principal
-plt.style.use('default')
-fig = plt.figure(figsize=(15, 10))
-gs = fig.add_gridspec(4, 2)
-ax_main = fig.add_subplot(gs[0:2, 0:2])  # Gráfica principal
-ax_rssi = fig.add_subplot(gs[2, 0])     # Subgráfica RSSI
-ax_dist = fig.add_subplot(gs[2, 1])     # Subgráfica distancias
-ax_gyro = fig.add_subplot(gs[3, 0])
-ax_rssi_node1 = fig.add_subplot(gs[3, 1])
-# Configuración de la gráfica principal
-ax_main.set_xlim(-2, 52)
-ax_main.set_ylim(-2, 6)
-ax_main.set_xlabel('Coordenada X (metros)')
-ax_main.set_ylabel('Coordenada Y (metros)')
-ax_main.set_title('Sistema de Localización con 3 Nodos (Espacio Libre)')
-ax_main.grid(True)
-
-# Elementos gráficos
-scatter = ax_main.scatter([], [], color='blue', s=100, label='Nodo Móvil')
-lines = [ax_main.plot([], [], 'k--', alpha=0.5)[0] for _ in beacons]
-
-# Dibujar nodos fijos (solo una etiqueta en la leyenda)
-for i, beacon in enumerate(beacons):
-    if i == 0:
-        ax_main.scatter(beacon["x"], beacon["y"], color='red', s=100, label='Nodos Fijos')
-    else:
-        ax_main.scatter(beacon["x"], beacon["y"], color='red', s=100)
-    ax_main.text(beacon["x"] + 0.3, beacon["y"] + 0.3, beacon["name"], fontsize=10)
-
-# Configurar leyenda principal
-ax_main.legend(loc='upper left', bbox_to_anchor=(0, 1), frameon=True, fancybox=True)
-
-# Configuración de subgráficas
-ax_rssi.set_title('Valores RSSI en Tiempo Real')
-ax_rssi.set_ylabel('RSSI (dBm)')
-ax_rssi.grid(True)
-rssi_lines = [ax_rssi.plot([], [], label=f'Nodo {i+1}')[0] for i in range(3)]
-ax_rssi.legend(loc='upper right', bbox_to_anchor=(1, 1), ncol=1, frameon=True)
-
-ax_gyro.set_title('Datos del Giroscopio (X, Y, Z)')
-ax_gyro.set_xlabel('Tiempo')
-ax_gyro.set_ylabel('Velocidad angular (°/s)')
-ax_gyro.grid(True)
-gyro_lines = [
-    ax_gyro.plot([], [], label='Eje X')[0],
-    ax_gyro.plot([], [], label='Eje Y')[0],
-    ax_gyro.plot([], [], label='Eje Z')[0]
-]
-ax_gyro.legend(loc='upper right')
+# Modelo de propagación ajustado con calibracion.py; si no existe se usa FSPL
+CALIBRACION = 'calibracion.json'
+modelo = None
+if os.path.exists(CALIBRACION):
+    calibracion = cargar_calibracion(CALIBRACION)
+    modelo = TablaDistancias.desde_calibracion(calibracion, beacons, freq_mhz)
+    for b in beacons:
+        if b["pipe"] in calibracion:
+            b.setdefault("var", calibracion[b["pipe"]]["var"])
+
+# Geometría de los beacons precalculada (ver trilaterador.py)
+trilaterador = Trilaterator(beacons, freq_mhz, modelo=modelo)
+if MODO_LOCALIZACION == 'multilateracion':
+    localizador = Multilaterator(beacons, freq_mhz, varianzas=[b.get("var", 1.0) for b in beacons],
+                                 modelo=modelo)
+else:
+    localizador = trilaterador
+filtro = None
+if MODO_LOCALIZACION == 'filtro':
+    tabla = modelo or TablaDistancias.desde_calibracion({}, beacons, freq_mhz)
+    filtro = FiltroParticulas(beacons, N_PARTICULAS, tabla.p0, tabla.n)
+    # Desviación del RSSI de cada beacon según la calibración (None = la del filtro)
+    sigma_rssi = [math.sqrt(b["var"]) if "var" in b else None for b in beacons]
+
+# Último RSSI recibido de cada beacon y su hora según el concentrador (s)
+rssi_actual = np.zeros(len(beacons))
+t_rssi = np.zeros(len(beacons))
+# Varianza del RSSI de cada beacon; los beacons que envían resúmenes la actualizan
+var_actual = np.array([b.get("var", 1.0) for b in beacons])
+var_reportada = False
+pipe_a_beacon = {b["pipe"]: i for i, b in enumerate(beacons)}
 
-ax_rssi_node1.set_title('RSSI Nodo 1')
-ax_rssi_node1.set_xlabel('Tiempo')
-ax_rssi_node1.set_ylabel('RSSI (dBm)')
-ax_rssi_node1.grid(True)
-rssi_node1_line = ax_rssi_node1.plot([], [], 'r-', label='RSSI Nodo 1')[0]
-ax_rssi_node1.legend(loc='upper right')
+# Historial de datos: una fila por posición calculada (ver historial.py)
+historial = Historial(MAX_HISTORY, WINDOW_SIZE)
+t_inicio = time.perf_counter()
 
-ax_dist.set_title('Distancias Estimadas')
-ax_dist.set_ylabel('Distancia')
-ax_dist.grid(True)
-dist_lines = [ax_dist.plot([], [], label=f'Dist a Nodo {i+1}')[0] for i in range(3)]
-ax_dist.legend(loc='upper right', bbox_to_anchor=(1, 1), ncol=1, frameon=True)
+# FSPL (n = 2) tabulado una vez para freq_mhz: cada conversión solo interpola
+tabla_fspl = TablaDistancias([fspl_cte(freq_mhz)], [2.0])
 
 def fspl_to_distance(rssi, tx_power=0):
     """
     Convierte RSSI a distancia usando el modelo FSPL
     """
-    d = 10 ** ((-6 + tx_power-rssi+27.56-20*math.log10(freq_mhz))/20)
-    return d
+    return float(tabla_fspl([rssi - tx_power])[0])
 
 def trilaterate(rssi_values, beacons, tx_power=0):
     """
     Trilateración usando las ecuaciones del diagrama
     rssi_values: [RSSI_P1, RSSI_P2, RSSI_P3]
     beacons: Lista con las posiciones de los nodos
+    Para procesar muchas muestras a la vez usar trilaterador.resolver()
     """
-    # Obtener distancias usando FSPL
-    r1 = fspl_to_distance(rssi_values[0], tx_power)
-    r2 = fspl_to_distance(rssi_values[1], tx_power)
-    r3 = fspl_to_distance(rssi_values[2], tx_power)
-    # Parámetros geométricos
-    x1, y1 = beacons[0]["x"], beacons[0]["y"]
-    x2, y2 = beacons[1]["x"], beacons[1]["y"]
-    x3, y3 = beacons[2]["x"], beacons[2]["y"]
-    
-    A = 2*(x2 - x1) 
-    B = 2*(y2 - y1)
-    C = r1**2 - r2**2 - x1**2 + x2**2 - y1**2 + y2**2
-
-    D = 2*(x3 - x1)
-    E = 2*(y3 - y1)
-    F = r1**2 - r3**2 - x1**2 + x3**2 - y1**2 + y3**2
-
-    # Resolver sistema lineal: A*x + B*y = C y D*x + E*y = F
-    M = np.array([[A, B], [D, E]])
-    N = np.array([C, F])
+    t = trilaterador
     try:
-        X, Y = np.linalg.solve(M, N)
-        print(X,Y)
-        return X, Y, [r1, r2, r3]
+        if beacons is not t.beacons or tx_power != t.tx_power:
+            t = Trilaterator(beacons, freq_mhz, tx_power)
     except np.linalg.LinAlgError:
         return None
-def update(frame):
-    global node1, node2, node3, gyro_x, gyro_y, gyro_z
-    
+    posiciones, distancias = t.resolver(rssi_values)
+    X, Y = posiciones[0]
+    return X, Y, list(distancias[0])
+
+def procesar_muestra(pipe, tipo, valores, t, t_radio=None):
+    """
+    Actualiza los valores RSSI/giroscopio con una muestra decodificada.
+    Devuelve la posición (x, y) si se pudo trilaterar.
+    t_radio: tiempo de la muestra según el concentrador (s, ver tiempo_radio());
+    es el tiempo del filtro y del historial. Si no se conoce se usa t
+    """
+    global var_reportada
+    if t_radio is not None:
+        t = t_radio
+    i = None
+    if tipo == TIPO_RSSI or tipo == TIPO_RESUMEN:
+        i = pipe_a_beacon.get(pipe)
+        if i is not None:
+            rssi_actual[i] = valores[0]
+            sin_wifi.pop(pipe, None)
+            t_rssi[i] = t
+            if tipo == TIPO_RESUMEN:
+                var_actual[i] = max(valores[1], VARIANZA_MIN)
+                var_reportada = True
+    elif tipo == TIPO_GYRO:
+        gyro_actual[:] = valores
+        if filtro is not None:
+            filtro.predecir(t)
+            filtro.actualizar_giro(valores[2])
+        return None
+    elif tipo == TIPO_ESTADO:
+        estado_concentrador.update(zip(
+            ("paquetes_s", "recibidos", "descartados", "fifo_llena", "cola_max"), valores))
+        return None
+    elif tipo == TIPO_ENLACE:
+        enlace[pipe] = dict(zip(("recibidos", "perdidos", "duplicados", "jitter_ms", "edad_ms"), valores))
+        return None
+    elif tipo == TIPO_SIN_WIFI:
+        sin_wifi[pipe] = valores
+        return None
+    else:
+        return None
+
+    if filtro is not None and i is not None:
+        filtro.predecir(t)
+        sigma = math.sqrt(var_actual[i]) if tipo == TIPO_RESUMEN else sigma_rssi[i]
+        filtro.actualizar_rssi(i, valores[0], sigma)
+
+    # Solo procesar si tenemos datos de todos los nodos
+    if rssi_actual.all():
+        if filtro is not None:
+            x, y, cov = filtro.estimacion()
+            distancias = localizador.distancias(rssi_actual)
+            historial.agregar(t, rssi_actual, distancias, x, y, gyro_actual, cov)
+            return x, y
+        if var_reportada and localizador is not trilaterador:
+            # Pesos con la varianza que reportan los nodos
+            posiciones, distancias = localizador.resolver(rssi_actual, var_actual)
+        else:
+            posiciones, distancias = localizador.resolver(rssi_actual)
+        x, y = posiciones[0]
+        historial.agregar(t, rssi_actual, distancias[0], x, y, gyro_actual)
+        return x, y
+    return None
+
+# Tiempo de las filas: el reloj del concentrador (t_ms de la trama) desde la
+# primera trama, así reproducir una grabación da siempre la misma salida.
+# La hora de la PC solo se usa con el formato ASCII, que no trae t_ms.
+# Las diferencias entre ticks son con signo: el concentrador fecha hacia
+# atrás las muestras de un lote del giroscopio, que pueden ser anteriores
+# a la trama de referencia.
+t_radio_ref = None  # (ticks_ms, segundos) de la trama más nueva vista
+
+def tiempo_radio(t_ms):
+    """Segundos desde la primera trama según el concentrador (None sin t_ms)"""
+    global t_radio_ref
+    if not t_ms:
+        return None
+    if t_radio_ref is None:
+        t_radio_ref = (t_ms, 0.0)
+        return 0.0
+    ref_ms, ref_s = t_radio_ref
+    d = dif_ticks(t_ms, ref_ms)
+    t = ref_s + d / 1000
+    # La referencia avanza con el reloj: sesiones de más de 2**29 ms siguen bien
+    if d > 0:
+        t_radio_ref = (t_ms, t)
+    return t
+
+def edad_rssi_ms():
+    """Diferencia de tiempo entre el RSSI más viejo y el más nuevo que se combinan"""
+    return (t_rssi.max() - t_rssi.min()) * 1000
+
+def update():
     try:
-        if ser.in_waiting > 0:
-            data = ser.readline().decode('utf-8', errors='ignore').strip()
-            if len(data) > 0:
-                pipe = data[0]
-                if pipe == '1':
-                    node1 = float(data[1:])
-                elif pipe == '2':
-                    node2 = float(data[1:])
-                elif pipe == '3':
-                    node3 = float(data[1:])
-                elif pipe == '4':
-                    parts = data.split()
-                    if len(parts) >= 4:
-                        gyro_x = float(parts[1])
-                        gyro_y = float(parts[2])
-                        gyro_z = float(parts[3])
-                        gyro_history[0].append(gyro_x)
-                        gyro_history[1].append(gyro_y)
-                        gyro_history[2].append(gyro_z)
-                
-                # Solo procesar si tenemos datos de los 3 nodos
-                if node1 and node2 and node3:
-                    x, y, distances = trilaterate([node1, node2, node3], beacons)
-                    
-                    # Actualizar historiales
-                    time_history.append(frame)
-                    position_history['x'].append(x)
-                    position_history['y'].append(y)
-                    
-                    for i in range(3):
-                        rssi_history[i].append([node1, node2, node3][i])
-                        distance_history[i].append(distances[i])
-                    
-                    # Obtener el tamaño mínimo común
-                    min_len = min(len(time_history), 
-                                len(rssi_history[0]), 
-                                len(distance_history[0]), 
-                                len(gyro_history[0]))
-                    
-                    # Obtener datos recientes sincronizados
-                    recent_time = list(time_history)[-min_len:][-WINDOW_SIZE:]
-                    recent_rssi = [list(h)[-min_len:][-WINDOW_SIZE:] for h in rssi_history]
-                    recent_dist = [list(h)[-min_len:][-WINDOW_SIZE:] for h in distance_history]
-                    recent_gyro = [list(h)[-min_len:][-WINDOW_SIZE:] for h in gyro_history]
-                    
-                    # Actualizar gráficas solo si tenemos datos
-                    if len(recent_time) > 0:
-                        # Gráfica principal
-                        scatter.set_offsets(np.c_[x, y])
-                        for i, line in enumerate(lines):
-                            line.set_data([beacons[i]["x"], x], [beacons[i]["y"], y])
-                        
-                        # Subgráfica de RSSI
-                        for i, line in enumerate(rssi_lines):
-                            line.set_data(recent_time, recent_rssi[i])
-                        ax_rssi.relim()
-                        ax_rssi.set_xlim(min(recent_time), max(recent_time))
-                        ax_rssi.autoscale_view(scaley=True)
-                        
-                        # Subgráfica de distancias
-                        for i, line in enumerate(dist_lines):
-                            line.set_data(recent_time, recent_dist[i])
-                        ax_dist.relim()
-                        ax_dist.set_xlim(min(recent_time), max(recent_time))
-                        ax_dist.autoscale_view(scaley=True)
-                        
-                        # Gráfica del giroscopio
-                        for i, line in enumerate(gyro_lines):
-                            line.set_data(recent_time, recent_gyro[i])
-                        ax_gyro.relim()
-                        ax_gyro.set_xlim(min(recent_time), max(recent_time))
-                        ax_gyro.autoscale_view(scaley=True)
-                        
-                        # Gráfica de RSSI del Nodo 1
-                        rssi_node1_line.set_data(recent_time, recent_rssi[0])
-                        ax_rssi_node1.relim()
-                        ax_rssi_node1.set_xlim(min(recent_time), max(recent_time))
-                        ax_rssi_node1.autoscale_view(scaley=True)
-                        
-#                         print(f"Posición: ({x:.2f}, {y:.2f}) m | RSSI: {node1:.1f}, {node2:.1f}, {node3:.1f} dBm")
-#                         print(f"Giroscopio: X={gyro_x:.2f}°/s, Y={gyro_y:.2f}°/s, Z={gyro_z:.2f}°/s")
+        # Consumir solo lo que el hilo lector recibió desde el último cuadro
+        posicion = None
+        t = time.perf_counter() - t_inicio
+        for pipe, tipo, seq, t_ms, valores in lector.consumir():
+            posicion = procesar_muestra(pipe, tipo, valores, t, tiempo_radio(t_ms)) or posicion
+
+        metricas = lector.metricas()
+        texto = (f"Cola: {metricas['profundidad']} | "
+                 f"Retardo: {metricas['retardo_ms']:.0f} ms | "
+                 f"Radio->pantalla: {metricas['retardo_extremo_ms']:.0f} ms")
+        if estado_concentrador:
+            texto += (f" | Concentrador: {estado_concentrador['paquetes_s']} paq/s, "
+                      f"{estado_concentrador['descartados']} descartados")
+        if enlace:
+            texto += " | Pérdida: " + " ".join(
+                f"{e['perdidos'] / max(e['recibidos'] + e['perdidos'], 1):.1%}" for _, e in sorted(enlace.items()))
+        texto += f" | Edad RSSI: {edad_rssi_ms():.0f} ms"
+        if sin_wifi:
+            texto += " | Sin WiFi: " + ", ".join(
+                f"{beacons[pipe_a_beacon[pipe]]['name'] if pipe in pipe_a_beacon else pipe} ({ms / 1000:.1f} s)"
+                for pipe, (ms, _) in sorted(sin_wifi.items()))
+
+        if posicion is not None:
+            x, y = posicion
+
+            # Vista (sin copia) de las últimas filas del historial
+            reciente = historial.ultimos(WINDOW_SIZE)
+            dashboard.actualizar(x, y, reciente['t'], reciente['rssi'], reciente['dist'],
+                                 reciente['gyro'], texto)
+            
+#             print(f"Posición: ({x:.2f}, {y:.2f}) m | RSSI: {rssi_actual[0]:.1f}, {rssi_actual[1]:.1f}, {rssi_actual[2]:.1f} dBm")
+#             print(f"Giroscopio: X={gyro_actual[0]:.2f}°/s, Y={gyro_actual[1]:.2f}°/s, Z={gyro_actual[2]:.2f}°/s")
+        else:
+            dashboard.texto_metricas.set_text(texto)
     
     except Exception as e:
         print(f"Error en la lectura: {e}")
-    
-    return [scatter] + lines + rssi_lines + dist_lines + gyro_lines + [rssi_node1_line]
 
-# Ajustar el tamaño de la figura para acomodar las nuevas gráficas
-fig.set_size_inches(15, 14)  # Aumentar la altura
+COLUMNAS_CSV = "t,x,y,rssi1,rssi2,rssi3,dist1,dist2,dist3,gyro_x,gyro_y,gyro_z,cov_xx,cov_xy,cov_yy\n"
 
-try:
-    # Iniciar conexión serial
-    ser = serial.Serial(port, baudrate, timeout=1)
-    print(f"Conexión exitosa a {port}. Iniciando visualización...")
-    
-    # Configurar animación
-    ani = FuncAnimation(fig, update, interval=100, blit=False, cache_frame_data=False)
-    plt.tight_layout()
-    plt.show()
-
-except serial.SerialException as e:
-    print(f"Error al abrir {port}: {e}")
-    print("Posibles soluciones:")
-    print("- Verifica que el puerto sea correcto")
-    print("- Asegúrate que no hay otros programas usando el puerto")
-    print("- Prueba ejecutando como administrador")
-
-except KeyboardInterrupt:
-    print("\nCerrando programa...")
-    if 'ser' in locals() and ser.is_open:
+def ejecutar_headless(ruta, formato):
+    """Procesa el flujo serial sin gráfica y escribe una línea por posición"""
+    salida = sys.stdout if ruta == '-' else open(ruta, 'w', newline='')
+    if formato == 'csv':
+        salida.write(COLUMNAS_CSV)
+    reporte_arranque()
+    try:
+        while True:
+            # is_alive() antes de consumir(): si el hilo ya terminó, este
+            # consumir() se lleva todo lo que alcanzó a dejar en la cola
+            vivo = lector.is_alive()
+            muestras = lector.consumir()
+            if not muestras:
+                if not vivo:
+                    break
+                time.sleep(0.01)
+                continue
+            t = time.perf_counter() - t_inicio
+            for pipe, tipo, seq, t_ms, valores in muestras:
+                if procesar_muestra(pipe, tipo, valores, t, tiempo_radio(t_ms)) is None:
+                    continue
+                f = historial.ultimos(1)[0]
+                if formato == 'csv':
+                    salida.write("%.3f,%.3f,%.3f,%.1f,%.1f,%.1f,%.3f,%.3f,%.3f,%.2f,%.2f,%.2f,%.4f,%.4f,%.4f\n" % (
+                        f['t'], f['x'], f['y'], *f['rssi'], *f['dist'], *f['gyro'], *f['cov']))
+                else:
+                    salida.write(json.dumps({
+                        "t": round(float(f['t']), 3), "x": round(float(f['x']), 3), "y": round(float(f['y']), 3),
+                        "rssi": [round(float(v), 1) for v in f['rssi']],
+                        "dist": [round(float(v), 3) for v in f['dist']],
+                        "gyro": [round(float(v), 2) for v in f['gyro']],
+                        "cov": [round(float(v), 4) for v in f['cov']],
+                    }) + "\n")
+            salida.flush()
+    except BrokenPipeError:
+        # La salida se cerró antes (por ejemplo "| head"): terminar sin
+        # traceback y sin que Python falle otra vez al vaciar stdout al salir
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+def reporte_arranque():
+    """Tiempo desde el inicio del script y memoria pico del proceso"""
+    mensaje = f"Listo en {(time.perf_counter() - T_ARRANQUE) * 1000:.0f} ms"
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS bytes
+        pico_mb = pico / (1 << 20) if sys.platform == 'darwin' else pico / 1024
+        mensaje += f", memoria pico {pico_mb:.1f} MB"
+    except ImportError:
+        pass
+    mensaje += ", matplotlib " + ("cargado" if "matplotlib" in sys.modules else "no cargado")
+    print(mensaje, file=consola)
+
+if __name__ == "__main__":
+    args = argumentos.parse_args()
+    port = args.puerto
+    baudrate = args.baudrate
+    if args.headless:
+        consola = sys.stderr
+
+    try:
+        # Iniciar conexión serial
+        if args.reproducir:
+            ser = ReproductorSerial(args.reproducir, args.velocidad)
+            port = args.reproducir
+        else:
+            ser = serial.Serial(port, baudrate, timeout=1)
+        if args.grabar:
+            ser = GrabadorSerial(ser, args.grabar)
+        print(f"Conexión exitosa a {port}. Iniciando {'modo headless' if args.headless else 'visualización'}...",
+              file=consola)
+
+        # Hilo que vacía el puerto de forma continua, independiente de la animación
+        lector = LectorSerial(ser, parser)
+        lector.start()
+
+        if args.headless:
+            ejecutar_headless(args.salida, args.formato_salida)
+        else:
+            # matplotlib solo se importa al pedir la gráfica
+            from dashboard import Dashboard
+            dashboard = Dashboard(beacons, blit=BLIT)
+            reporte_arranque()
+            dashboard.animar(update, INTERVALO_MS)
+        lector.detener()
         ser.close()
-    plt.close()
+
+    except serial.SerialException as e:
+        print(f"Error al abrir {port}: {e}", file=consola)
+        print("Posibles soluciones:", file=consola)
+        print("- Verifica que el puerto sea correcto", file=consola)
+        print("- Asegúrate que no hay otros programas usando el puerto", file=consola)
+        print("- Prueba ejecutando como administrador", file=consola)
+
+    except KeyboardInterrupt:
+        print("\nCerrando programa...", file=consola)
+        if 'lector' in locals():
+            lector.detener()
+        if 'ser' in locals() and ser.is_open:
+            ser.close()
+        if 'dashboard' in locals():
+            dashboard.cerrar()
@@ -0,0 +1,152 @@
+import json
+import math
+import numpy as np
+
+# Varianza mínima del RSSI (dBm²): cuantización de 1 dBm -> 1/12
+VARIANZA_MIN = 1 / 12
+
+# Rango de RSSI cubierto por las tablas de distancia (dBm)
+RSSI_MIN = -120
+RSSI_MAX = 0
+
+
+def fspl_cte(freq_mhz=2400, tx_power=0):
+    """RSSI a 1 m según el modelo FSPL (ver fspl_to_distance)"""
+    return -6 + tx_power + 27.56 - 20 * math.log10(freq_mhz)
+
+
+def cargar_calibracion(ruta):
+    """Lee el JSON generado por calibracion.py: {pipe: {"p0", "n", "var", ...}}"""
+    with open(ruta) as f:
+        return {int(pipe): params for pipe, params in json.load(f).items()}
+
+
+class TablaDistancias:
+    """
+    Conversión RSSI -> distancia precalculada por beacon con el modelo
+    log-distancia  RSSI = p0 - 10 n log10(d).
+
+    El RSSI llega en dBm enteros (o promedios de ellos) dentro de un rango
+    pequeño, así que la distancia se tabula una vez por dBm y cada muestra
+    solo interpola entre dos entradas, sin potencias ni logaritmos.
+    La columna j del RSSI corresponde al beacon j.
+    """
+
+    def __init__(self, p0, n):
+        p0 = np.asarray(p0, dtype=float)
+        n = np.asarray(n, dtype=float)
+        rssi = np.arange(RSSI_MIN, RSSI_MAX + 1)
+        self.p0 = p0
+        self.n = n
+        self.tabla = 10 ** ((p0[:, None] - rssi) / (10 * n[:, None]))
+
+    @classmethod
+    def desde_calibracion(cls, calibracion, beacons, freq_mhz=2400, tx_power=0):
+        """Los beacons sin calibrar usan FSPL (p0 a 1 m, n = 2)"""
+        cte = fspl_cte(freq_mhz, tx_power)
+        p0 = [calibracion.get(b["pipe"], {}).get("p0", cte) for b in beacons]
+        n = [calibracion.get(b["pipe"], {}).get("n", 2.0) for b in beacons]
+        return cls(p0, n)
+
+    def __call__(self, rssi):
+        rssi = np.asarray(rssi, dtype=float)
+        ultimo = self.tabla.shape[1] - 1
+        x = np.clip(rssi - RSSI_MIN, 0, ultimo)
+        i = np.minimum(x.astype(np.intp), ultimo - 1)
+        f = x - i
+        filas = np.arange(rssi.shape[-1])
+        return self.tabla[filas, i] * (1 - f) + self.tabla[filas, i + 1] * f
+
+
+class Multilaterator:
+    """
+    Multilateración por mínimos cuadrados ponderados con N >= 3 beacons.
+
+    Restando la ecuación del beacon 0 a la de cada beacon i se obtiene el
+    sistema lineal A @ [x, y] = N con una fila por beacon i = 1..N-1:
+
+        2(xi - x0) x + 2(yi - y0) y = r0² - ri² + xi² + yi² - x0² - y0²
+
+    A solo depende de la geometría, así que la pseudo-inversa ponderada
+    P = (Aᵀ W A)⁻¹ Aᵀ W se calcula una vez en el constructor y cada lote de
+    muestras se resuelve con un producto de matrices. El peso de la fila i
+    es 1 / (var0 + vari), con las varianzas del RSSI de cada beacon.
+
+    modelo: conversión RSSI -> distancia (p. ej. TablaDistancias calibrada).
+    Por defecto se usa FSPL.
+    """
+
+    def __init__(self, beacons, freq_mhz=2400, tx_power=0, varianzas=None, modelo=None):
+        if len(beacons) < 3:
+            raise ValueError("Se necesitan al menos 3 beacons")
+        self.beacons = beacons
+        self.tx_power = tx_power
+        p = np.array([[b["x"], b["y"]] for b in beacons], dtype=float)
+
+        self._A = 2 * (p[1:] - p[0])
+        if np.linalg.matrix_rank(self._A) < 2:
+            raise np.linalg.LinAlgError("Beacons colineales")
+        # Parte constante de N: xi² + yi² - x0² - y0²
+        self._k = (p[1:] ** 2).sum(axis=1) - (p[0] ** 2).sum()
+        # Término constante del modelo FSPL (ver fspl_to_distance)
+        self._cte = fspl_cte(freq_mhz, tx_power)
+        self._modelo = modelo
+
+        if varianzas is None:
+            varianzas = np.ones(len(beacons))
+        self._P_T = self._pseudo_inversa(self._pesos(varianzas)).T
+
+    def _pesos(self, varianzas):
+        v = np.maximum(np.asarray(varianzas, dtype=float), VARIANZA_MIN)
+        return 1 / (v[..., :1] + v[..., 1:])
+
+    def _pseudo_inversa(self, w):
+        Aw = self._A * w[:, None]
+        return np.linalg.solve(self._A.T @ Aw, Aw.T)
+
+    def distancias(self, rssi):
+        """Convierte RSSI (dBm, una columna por beacon) a distancia"""
+        if self._modelo is not None:
+            return self._modelo(rssi)
+        return 10 ** ((self._cte - np.asarray(rssi, dtype=float)) / 20)
+
+    def resolver(self, rssi, varianzas=None):
+        """
+        rssi: arreglo (M, N) con el RSSI de cada beacon para M muestras
+        varianzas: opcional, (M, N) o (N,) para pesos distintos a los del
+                   constructor (p. ej. la varianza reportada por cada nodo)
+        Devuelve posiciones (M, 2) y distancias (M, N)
+        """
+        r = self.distancias(np.atleast_2d(rssi))
+        r2 = r * r
+        N = r2[:, :1] - r2[:, 1:] + self._k
+        if varianzas is None:
+            return N @ self._P_T, r
+
+        w = self._pesos(varianzas)
+        if w.ndim == 1:
+            return N @ self._pseudo_inversa(w).T, r
+        # Pesos por muestra: ecuaciones normales 2x2 de todo el lote a la vez
+        A = self._A
+        G = np.einsum('mi,ij,ik->mjk', w, A, A)
+        b = np.einsum('mi,ij,mi->mj', w, A, N)
+        return np.linalg.solve(G, b[..., None])[..., 0], r
+
+
+class Trilaterator(Multilaterator):
+    """
+    Trilateración con los 3 primeros beacons y la geometría precalculada.
+    Con 3 beacons el sistema es cuadrado y la pseudo-inversa es la inversa
+    de la matriz de las ecuaciones del diagrama.
+    """
+
+    def __init__(self, beacons, freq_mhz=2400, tx_power=0, modelo=None):
+        super().__init__(beacons[:3], freq_mhz, tx_power, modelo=modelo)
+        self.beacons = beacons
+
+    def resolver(self, rssi):
+        """
+        rssi: arreglo (N, 3) con los tripletes [RSSI_P1, RSSI_P2, RSSI_P3]
+        Devuelve posiciones (N, 2) y distancias (N, 3)
+        """
+        return super().resolver(np.atleast_2d(rssi)[:, :3])
@@ -0,0 +1,57 @@
+import os
+import struct
+
+# Registro binario de muestras crudas para rssi.py.
+# Copiar a la Pico junto con rssi.py; en la PC se lee con
+# poyecto comdig/codigos/registro_crudo.py.
+#
+#   cabecera (16 bytes, solo al crear el archivo):
+#       "RSSI" | versión (u8) | tamaño de registro (u8) | SAMPLE_MS (u16) | 8 bytes reservados
+#   registros (8 bytes): ticks_ms (u32) | paso (u16) | RSSI dBm (i8) | medición (u8)
+#
+# Una medición descartada por pérdida del enlace termina en un registro con RSSI 0.
+MAGICO = b"RSSI"
+VERSION = 1
+CABECERA = "<4sBBH8x"
+REGISTRO = "<IHbB"
+TAM_REGISTRO = struct.calcsize(REGISTRO)
+TAM_BLOQUE = 4096  # sector de la flash del RP2040
+
+
+class RegistroCrudo:
+    """
+    Acumula registros en RAM y los escribe en bloques de tam_bloque bytes
+    para no tocar la flash en cada muestra
+    """
+
+    def __init__(self, ruta, periodo_ms, tam_bloque=TAM_BLOQUE):
+        try:
+            nuevo = os.stat(ruta)[6] == 0
+        except OSError:
+            nuevo = True
+        self._f = open(ruta, 'ab')
+        if nuevo:
+            self._f.write(struct.pack(CABECERA, MAGICO, VERSION, TAM_REGISTRO, periodo_ms))
+            self._f.flush()
+        self.buf = bytearray(tam_bloque - tam_bloque % TAM_REGISTRO)
+        self._mv = memoryview(self.buf)
+        self.n = 0  # bytes ocupados en buf
+        self.registros = 0
+
+    def agregar(self, t_ms, paso, rssi, medicion):
+        struct.pack_into(REGISTRO, self.buf, self.n, t_ms, paso & 0xFFFF, rssi, medicion & 0xFF)
+        self.n += TAM_REGISTRO
+        self.registros += 1
+        if self.n == len(self.buf):
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe lo acumulado en la flash"""
+        if self.n:
+            self._f.write(self._mv[:self.n])
+            self._f.flush()
+            self.n = 0
+
+    def cerrar(self):
+        self.vaciar()
+        self._f.close()
@@ -1,8 +1,12 @@
 import network
+import os
 import time
-import math
-from machine import Pin, I2C
+import uasyncio as asyncio
+from machine import Pin, I2C, Timer
 from ssd1306 import SSD1306_I2C
+from pantalla import Pantalla
+from estadistica import Welford, Estadisticas
+from registro import RegistroCrudo
 button = Pin(18, Pin.IN, Pin.PULL_UP)
 ledAdvance = Pin(16, Pin.OUT)
 ledMeasure = Pin(17, Pin.OUT)
@@ -11,253 +15,372 @@ ledDisc = Pin(19, Pin.OUT)
 WIDTH = 128
 HEIGHT = 32
 i2c = I2C(1, scl=Pin(15), sda=Pin(14), freq=200000)
-oled = SSD1306_I2C(WIDTH, HEIGHT, i2c)
+# Solo se transfiere lo que cambió, a lo sumo cada PERIODO_PANTALLA_MS
+# salvo show(True) (ver pantalla.py, en la carpeta nrf24l01)
+PERIODO_PANTALLA_MS = 40
+oled = Pantalla(SSD1306_I2C(WIDTH, HEIGHT, i2c), periodo_ms=PERIODO_PANTALLA_MS)
+
+# Muestreo: una muestra cada SAMPLE_MS marcada por un Timer (100 = 10 Hz);
+# 0 = tan rápido como responda wifi.status('rssi'). Las estadísticas son
+# en línea (ver estadistica.py, en poyecto comdig/codigos): N_SAMPLES puede
+# ser de decenas de miles sin usar más RAM
+SAMPLE_MS = 100
+N_SAMPLES = 200
+QUANTILES = (0.1, 0.5, 0.9)
+BUTTON_MS = 20  # lectura del botón
 
-linkStatus = True
-j = 0
 counter = -1
 filename = "rssi_measurements.txt"
-with open(filename, 'a') as file:
-    file.write("Distance(m)\tAverageRSSI(dBm)\tStandard_deviation\n")
+# La cabecera solo al crear el archivo, no en cada arranque
+try:
+    newFile = os.stat(filename)[6] == 0
+except OSError:
+    newFile = True
+if newFile:
+    with open(filename, 'a') as file:
+        file.write("Distance(m)\tAverageRSSI(dBm)\tStandard_deviation\n")
+
+# Registro de todas las muestras crudas en binario (ver registro.py): es
+# donde queda la hora real (ticks_ms) de cada muestra, en bloques de 4 KB
+# sin que la RAM crezca con N_SAMPLES. False = solo las estadísticas
+RAW_LOG = True
+rawFilename = "rssi_raw.bin"
+rawLog = RegistroCrudo(rawFilename, SAMPLE_MS) if RAW_LOG else None
+run = 0  # número de medición en el registro crudo, incluidas las descartadas
 
 wifi = network.WLAN(network.STA_IF)
 wifi.active(True)
 ssid = "Sergio"
 password = "sergio123"
 
-def buttonAnimation():
-    ledAdvance.value(1)
-    if not counter == -1:
-        oled.invert(True)
-        oled.fill(0)
-        oled.text("PRESS BUTTON", 18, 8)
-        oled.show()
-    for x in range(6):
-        oled.fill_rect(37, 19, 51, 12, 0)
-        for i in range(3):
-            oled.text("-", 40 + i, 26)
-        for i in range(8 - x):
-            oled.text(".", 46, 23 - i)    
-        for i in range(18):
-            oled.text("-", 49 + i, 18 + x)
-        for i in range(8 - x):
-            oled.text(".", 70, 23 - i)
-        for i in range(3):
-            oled.text("-", 73 + i, 26)
-        oled.show()
-    
-    for i in range(3):
-        oled.text(".", 35 + 3 * i, 17 + i)
-        oled.text(".", 68 - 2 * i, 14 + i)
-        oled.text(".", 49 + 2 * i, 14 + i)
-        oled.text(".", 81 - 3 * i, 17 + i)
-        oled.show()
-    time.sleep(0.1)
-    ledAdvance.value(0)
-    time.sleep(0.2)
+# Tareas (uasyncio): wifiTask supervisa la conexión, buttonTask lee el
+# botón, measureTask lleva la medición y displayTask dibuja el estado.
+# Se comunican por estas variables; ninguna bloquea a las demás
+IDLE = 0
+PRESSED = 1
+MEASURING = 2
+OFF = 3
+RESULT = 4
+SAVING = 5
+DISCARDING = 6
+state = IDLE
+stateStart = time.ticks_ms()
+pressed = asyncio.Event()
+
+# intervals: periodo real entre muestras (ms)
+stats = Estadisticas(QUANTILES)
+intervals = Welford()
+nSamples = 0
+firstTime = 0
+lastTime = 0
+lastValue = 0
+
+def setState(s):
+    global state, stateStart
+    state = s
+    stateStart = time.ticks_ms()
+
+# Reconexión con espera exponencial entre intentos
+RETRY_MIN_MS = 1000
+RETRY_MAX_MS = 16000
+CONNECT_TIMEOUT_MS = 10000
+WIFI_CHECK_MS = 50
+wifiUp = False
+
+async def wifiTask():
+    global wifiUp
+    connecting = False
+    retryDelay = RETRY_MIN_MS
+    nextRetry = time.ticks_ms()
+    attemptStart = 0
+    while True:
+        now = time.ticks_ms()
+        if wifi.isconnected():
+            if not wifiUp:
+                wifiUp = True
+                connecting = False
+                retryDelay = RETRY_MIN_MS
+                print("Conexión establecida!")
+                print("Dirección IP:", wifi.ifconfig()[0])
+        else:
+            if wifiUp:
+                wifiUp = False
+                nextRetry = now
+                print("Conexión perdida!")
+            if connecting and time.ticks_diff(now, attemptStart) >= CONNECT_TIMEOUT_MS:
+                connecting = False
+                wifi.disconnect()
+                nextRetry = time.ticks_add(now, retryDelay)
+                retryDelay = min(2 * retryDelay, RETRY_MAX_MS)
+            if not connecting and time.ticks_diff(now, nextRetry) >= 0:
+                wifi.connect(ssid, password)
+                connecting = True
+                attemptStart = now
+        await asyncio.sleep_ms(WIFI_CHECK_MS)
+
+async def buttonTask():
+    while True:
+        if button.value() == 1 and state == IDLE and wifiUp:
+            pressed.set()
+        await asyncio.sleep_ms(BUTTON_MS)
+
+# El Timer solo levanta la bandera; la muestra se toma en la tarea.
+# La bandera no acumula: si otra tarea retiene el lazo más de SAMPLE_MS,
+# varios ticks se funden en uno. timerTicks los cuenta todos y sample()
+# anota en missedTicks los periodos que se quedaron sin muestra
+tick = asyncio.ThreadSafeFlag()
+timer = Timer()
+timerTicks = 0
+missedTicks = 0
+
+def onTimer(t):
+    global timerTicks
+    timerTicks += 1
+    tick.set()
+
+async def sample():
+    """Toma N_SAMPLES muestras al ritmo del Timer; False si se perdió el enlace"""
+    global nSamples, firstTime, lastTime, lastValue, run, timerTicks, missedTicks
+    nSamples = 0
+    missedTicks = 0
+    stats.reiniciar()
+    intervals.reiniciar()
+    if SAMPLE_MS:
+        timerTicks = 0
+        seen = 0
+        timer.init(period=SAMPLE_MS, mode=Timer.PERIODIC, callback=onTimer)
+    try:
+        for i in range(N_SAMPLES):
+            if SAMPLE_MS:
+                await tick.wait()
+                ticks = timerTicks
+                missedTicks += ticks - seen - 1
+                seen = ticks
+            else:
+                await asyncio.sleep_ms(0)
+            now = time.ticks_ms()
+            rssiMeasure = wifi.status('rssi')
+            if i:
+                intervals.agregar(time.ticks_diff(now, lastTime))
+            else:
+                firstTime = now
+            lastTime = now
+            lastValue = rssiMeasure
+            nSamples = i + 1
+            if rawLog:
+                rawLog.agregar(now, counter, rssiMeasure, run)
+            if rssiMeasure == 0:
+                print("Conexión perdida!")
+                return False
+            stats.agregar(rssiMeasure)
+    finally:
+        timer.deinit()
+        run += 1
+        if rawLog:
+            rawLog.vaciar()
+    return True
+
+async def measureTask():
+    global counter
+    while True:
+        await pressed.wait()
+        pressed.clear()
+        counter += 1
+        setState(PRESSED)
+        while button.value() == 1:
+            await asyncio.sleep_ms(BUTTON_MS)
+        await asyncio.sleep_ms(100)
+        print(counter)
+        ledMeasure.value(1)
+        setState(MEASURING)
+        ok = await sample()
+        if ok:
+            await asyncio.sleep(2)
+            ledMeasure.value(0)
+            print("Duración real:", time.ticks_diff(lastTime, firstTime), "ms, periodo:",
+                  intervals.media, "±", intervals.desviacion, "ms (máx", intervals.maximo, "ms),",
+                  missedTicks, "periodos sin muestra")
+            print("RSSI: media", stats.media, "desviación", stats.desviacion, "mín", stats.minimo,
+                  "máx", stats.maximo, "cuantiles", [(p, stats.cuantil(p)) for p in QUANTILES])
+            setState(RESULT)
+            await asyncio.sleep(4)
+            setState(SAVING)
+            await asyncio.sleep_ms(BORDER_DOTS * PERIODO_PANTALLA_MS)
+            with open(filename, "a") as file:
+                file.write("{}\t{:.3f}\t{:.2f}\n".format(counter, stats.media, stats.desviacion))
+        else:
+            ledMeasure.value(0)
+            setState(OFF)
+            await asyncio.sleep(2)
+            setState(DISCARDING)
+            await asyncio.sleep_ms(BORDER_DOTS * PERIODO_PANTALLA_MS)
+            counter -= 1
+        await asyncio.sleep_ms(200)
+        setState(IDLE)
+
+# Pantallas: cada función dibuja un cuadro según el estado y la hora.
+# fresh = primer cuadro del estado, para lo que se dibuja una sola vez
+BUTTON_CYCLE_MS = 1000
+
+def drawButton(x):
+    """Botón hundido x píxeles (0..5)"""
     oled.fill_rect(37, 19, 51, 12, 0)
     for i in range(3):
         oled.text("-", 40 + i, 26)
-    for i in range(8):
-        oled.text(".", 46, 23 - i)    
+    for i in range(8 - x):
+        oled.text(".", 46, 23 - i)
     for i in range(18):
-        oled.text("-", 49 + i, 18)
-    for i in range(8):
+        oled.text("-", 49 + i, 18 + x)
+    for i in range(8 - x):
         oled.text(".", 70, 23 - i)
     for i in range(3):
-            oled.text("-", 73 + i, 26)
-    oled.show()
-def standardDeviation(data):
-    n = len(data)
-    median = sum(data) / n
-    variance = sum((x - median) ** 2 for x in data) / (n - 1)
-    return math.sqrt(variance)
+        oled.text("-", 73 + i, 26)
 
-def wifiStatus():
-    counter = 0
-    while wifi.isconnected() == False:
-        ledAdvance.value(0)
-        ledMeasure.value(0)
-        oled.invert(True)
-        oled.fill(0)
-        oled.text("Connection Lost", 4, 12)
-        oled.fill_rect(48, 20, 28, 4, 0)
-        oled.show()
-        ledDisc(1)
-        for i in range(5):
-            oled.text(".", 48 + 5 * i, 17)
-            time.sleep(0.2)
-            oled.show()
-            if i == 4:
-                ledDisc.value(0)
-                time.sleep(0.2)
-        time.sleep(0.8)
-        counter += 1
-        if counter == 3:
-            wifi.connect(ssid, password)
-    print("Conexión establecida!")
-    print("Dirección IP:", wifi.ifconfig()[0])
-    oled.invert(True)
+def drawIdle(now):
     oled.fill(0)
-    oled.text("Connection Up", 12, 10)
-    oled.show()
-    time.sleep(2)
-    oled.fill(0)
-    
-wifi.connect(ssid, password)
-wifiStatus()
-
-while True:
-    ledDisc.value(0)
-    ledMeasure.value(0)
     if counter == -1:
-        oled.fill(0)
         oled.text("Connection Up", 12, 10)
-        oled.show()
-    buttonAnimation()
-    if wifi.isconnected() == False:
-        print("Conexión perdida!")
-        wifi.connect(ssid, password)
-        wifiStatus()
-    if button.value() == 1:
-        counter += 1
+    else:
+        oled.text("PRESS BUTTON", 18, 8)
+    k = (now % BUTTON_CYCLE_MS) // PERIODO_PANTALLA_MS
+    if k < 6:
+        drawButton(k)
+    elif k < 12:
+        drawButton(5)
+        for i in range(min(k - 5, 3)):
+            oled.text(".", 35 + 3 * i, 17 + i)
+            oled.text(".", 68 - 2 * i, 14 + i)
+            oled.text(".", 49 + 2 * i, 14 + i)
+            oled.text(".", 81 - 3 * i, 17 + i)
+    else:
+        drawButton(0)
+    ledAdvance.value(1 if k < 9 else 0)
+
+def drawLost(now):
+    frame = (now // 200) % 6
+    oled.fill(0)
+    oled.text("Connection Lost", 4, 12)
+    for i in range(frame):
+        oled.text(".", 48 + 5 * i, 17)
+    ledDisc.value(1 if frame < 5 else 0)
+    ledAdvance.value(0)
+
+dotsDrawn = 0
+
+def drawMeasuring(fresh):
+    global dotsDrawn
+    if fresh:
         oled.fill(0)
-        oled.text("MEASURE", 36, 11)
-        oled.text("#" + str(counter + 1), 58, 20)
-        oled.show()
-        while button.value() == 1:
-            time.sleep(0.1)
-        time.sleep(0.1)
-        print(counter)
-        if counter >= 0:
-            ledMeasure.value(1)
-            oled.invert(True)
-            oled.fill(0)
-            rssiMeasureArray = []
-            for i in range(200):
-                rssiMeasure = wifi.status('rssi')
-                rssiMeasureArray.append(rssiMeasure)
-                oled.text("ON", 5, 2)
-                time.sleep(0.1)
-                oled.text("MEASURING", 28, 11)
-                oled.fill_rect(100, -5, 20, 15, 0)
-                if rssiMeasure >= -60:
-                    for b in range(7):
-                        oled.text(".", 115, -5 + b)
-                if rssiMeasure > -80:
-                    for b in range(5):
-                        oled.text(".", 112, -3 + b)
-                if rssiMeasure >= -95:
-                    for b in range(3):
-                        oled.text(".", 109, -1 + b)
-                if rssiMeasure >= -105:
-                    for b in range(1):
-                        oled.text(".", 106, 1 + b)
-                if rssiMeasure <= -115 or rssiMeasure == 0.0:
-                    oled.fill_rect(100, -5, 20, 15, 0)
-                    for b in range(5):
-                        oled.text(".", 110 + 2 * b, -3 + b)
-                    for b in range(5):
-                        oled.text(".", 118 - 2 * b, -3 + b)
-                for x in range(99):
-                    oled.text("-", 10 + x, 17)
-                    oled.text("-", 10 + x, 19)
-                if i % 2 == 0:
-                    j += 1
-                    oled.text(".", 8 + j, 16)
-                    oled.fill_rect(36, 2, 55, 7, 0)
-                    oled.text(str(rssiMeasure) + " dBm", 35, 2)
-                    oled.show()
-                for x in range(j):
-                    oled.text(".", 8 + x, 16)
-                if i % 5 == 0:
-                    oled.fill_rect(50, 25, 80, 7, 0)
-                    oled.text(str(i) + "/200", 60, 25)
-                if i % 10 == 0:
-                    oled.fill_rect(5, 25, 40, 7, 0)
-                    oled.text(str(i / 10) + "s", 5, 25)
-                    oled.show()
-                if i == 199:
-                    oled.fill_rect(5, 25, 40, 7, 0)
-                    oled.fill_rect(50, 25, 80, 7, 0)
-                    oled.text(".", 109, 16)
-                    oled.text("200/200", 60, 25)
-                    oled.text("20.0s", 5, 25)
-                    oled.show()
-                    j = 0
-                    time.sleep(2)
-                    ledMeasure(0)
-                if rssiMeasure == 0.0:
-                    linkStatus = False
-                    print("Conexión perdida!")
-                    oled.fill_rect(5, 2, 20, 7, 0)
-                    oled.fill_rect(36, 2, 55, 7, 0)
-                    oled.text(str(rssiMeasure) + " dBm", 45, 2)
-                    oled.text("OFF", 5, 2)
-                    oled.show()
-                    time.sleep(2)
-                    oled.fill(0)
-                    wifi.connect(ssid, password)
-                    wifiStatus()
-            rssiAverage = sum(rssiMeasureArray) / len(rssiMeasureArray)
-            deviation = standardDeviation(rssiMeasureArray)
-            if linkStatus == True:
-                oled.invert(True)
-                oled.fill(0)
-                oled.text("Dist: " + str(counter) + " m", 4, 20)
-                oled.text("Dev: " + str(round(deviation, 3)), 4, 11)
-                oled.text("Avg: " + str(round(rssiAverage,2)) + " dBm", 4, 2)
-                oled.text("#" + str(counter + 1), 105, 25)
-                oled.show()
-                time.sleep(4)
-                oled.fill(0)
-                oled.text("SAVING DATA", 20, 11)
-                for i in range(24):
-                    oled.text(".", 14 + 4 * i, 3)
-                    oled.show()
-                    time.sleep(0.02)
-                for i in range(4):
-                    oled.text(".", 107, 3 + 3 * i)
-                    oled.show()
-                    time.sleep(0.02)
-                for i in range(24):
-                    oled.text(".", 107 - 4 * i, 15)
-                    oled.show()
-                    time.sleep(0.02)
-                for i in range(4):
-                    oled.text(".", 14, 15 - 3 * i)
-                    oled.show()
-                    time.sleep(0.02)
-                with open(filename, "a") as file:
-                    file.write("{}\t{:.3f}\t{:.2f}\n".format(counter, rssiAverage, deviation))
-                time.sleep(0.2)
-                oled.fill(0)
-                oled.text("PRESS BUTTON", 18, 8)
-                oled.show()
-            else:
-                oled.invert(True)
-                oled.fill(0)
-                oled.text("DISCARDING", 24, 11)
-                for i in range(24):
-                    oled.text(".", 14 + 4 * i, 3)
-                    oled.show()
-                    time.sleep(0.02)
-                for i in range(4):
-                    oled.text(".", 107, 3 + 3 * i)
-                    oled.show()
-                    time.sleep(0.02)
-                for i in range(24):
-                    oled.text(".", 107 - 4 * i, 15)
-                    oled.show()
-                    time.sleep(0.02)
-                for i in range(4):
-                    oled.text(".", 14, 15 - 3 * i)
-                    oled.show()
-                    time.sleep(0.02)
-                counter -= 1
-                linkStatus = True
-                time.sleep(0.2)
-                oled.invert(True)
+        oled.text("ON", 5, 2)
+        oled.text("MEASURING", 28, 11)
+        for x in range(99):
+            oled.text("-", 10 + x, 17)
+            oled.text("-", 10 + x, 19)
+        dotsDrawn = 0
+    n = nSamples
+    if n == 0:
+        return
+    rssiMeasure = lastValue
+    oled.fill_rect(100, -5, 20, 15, 0)
+    if rssiMeasure >= -60:
+        for b in range(7):
+            oled.text(".", 115, -5 + b)
+    if rssiMeasure > -80:
+        for b in range(5):
+            oled.text(".", 112, -3 + b)
+    if rssiMeasure >= -95:
+        for b in range(3):
+            oled.text(".", 109, -1 + b)
+    if rssiMeasure >= -105:
+        for b in range(1):
+            oled.text(".", 106, 1 + b)
+    if rssiMeasure <= -115 or rssiMeasure == 0:
+        oled.fill_rect(100, -5, 20, 15, 0)
+        for b in range(5):
+            oled.text(".", 110 + 2 * b, -3 + b)
+        for b in range(5):
+            oled.text(".", 118 - 2 * b, -3 + b)
+    # Barra de avance: un punto cada 2 muestras (100 en la medición completa)
+    dots = (n + 1) * 100 // N_SAMPLES
+    while dotsDrawn < dots:
+        dotsDrawn += 1
+        oled.text(".", 8 + dotsDrawn, 16)
+    oled.fill_rect(36, 2, 55, 7, 0)
+    oled.text(str(rssiMeasure) + " dBm", 35, 2)
+    oled.fill_rect(50, 25, 80, 7, 0)
+    oled.text(str(n) + "/" + str(N_SAMPLES), 60, 25)
+    # Tiempo real transcurrido según la hora de las muestras
+    oled.fill_rect(5, 25, 45, 7, 0)
+    oled.text("{:.1f}s".format(time.ticks_diff(lastTime, firstTime) / 1000), 5, 25)
+
+def drawOff():
+    oled.fill_rect(5, 2, 20, 7, 0)
+    oled.fill_rect(36, 2, 55, 7, 0)
+    oled.text(str(lastValue) + " dBm", 45, 2)
+    oled.text("OFF", 5, 2)
+
+def drawResult():
+    oled.fill(0)
+    oled.text("Dist: " + str(counter) + " m", 4, 20)
+    oled.text("Dev: " + str(round(stats.desviacion, 3)), 4, 11)
+    oled.text("Avg: " + str(round(stats.media, 2)) + " dBm", 4, 2)
+    oled.text("#" + str(counter + 1), 105, 25)
+
+BORDER_DOTS = 56
+
+def drawBorder(title, x, now):
+    """Título y recuadro de puntos que avanza uno por cuadro"""
+    oled.fill(0)
+    oled.text(title, x, 11)
+    for k in range(min(time.ticks_diff(now, stateStart) // PERIODO_PANTALLA_MS, BORDER_DOTS)):
+        if k < 24:
+            oled.text(".", 14 + 4 * k, 3)
+        elif k < 28:
+            oled.text(".", 107, 3 + 3 * (k - 24))
+        elif k < 52:
+            oled.text(".", 107 - 4 * (k - 28), 15)
+        else:
+            oled.text(".", 14, 15 - 3 * (k - 52))
+
+async def displayTask():
+    shown = None
+    while True:
+        now = time.ticks_ms()
+        oled.invert(True)
+        lost = not wifiUp and (state == IDLE or state == PRESSED)
+        screen = (-1 if lost else state, stateStart)
+        fresh = screen != shown
+        shown = screen
+        if lost:
+            drawLost(now)
+        elif state == IDLE:
+            ledDisc.value(0)
+            drawIdle(now)
+        elif state == PRESSED:
+            if fresh:
+                ledAdvance.value(0)
                 oled.fill(0)
-                oled.text("PRESS BUTTON", 18, 8)
-                oled.show()
\ No newline at end of file
+                oled.text("MEASURE", 36, 11)
+                oled.text("#" + str(counter + 1), 58, 20)
+        elif state == MEASURING:
+            drawMeasuring(fresh)
+        elif state == OFF:
+            if fresh:
+                drawOff()
+        elif state == RESULT:
+            if fresh:
+                drawResult()
+        elif state == SAVING:
+            drawBorder("SAVING DATA", 20, now)
+        elif state == DISCARDING:
+            drawBorder("DISCARDING", 24, now)
+        oled.show()
+        await asyncio.sleep_ms(PERIODO_PANTALLA_MS)
+
+async def main():
+    asyncio.create_task(wifiTask())
+    asyncio.create_task(buttonTask())
+    asyncio.create_task(displayTask())
+    await measureTask()
+
+asyncio.run(main())